@@ -1,5 +1,11 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
 
 
 class PostsConfig(AppConfig):
     name = 'posts'
+
+    def ready(self):
+        from . import checks, signals, tasks  # noqa: F401
+        from yatube import sqlite
+        connection_created.connect(sqlite.configure)
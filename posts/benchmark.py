@@ -0,0 +1,271 @@
+"""Синтетические данные, замер представлений и нагрузка на базу."""
+import datetime as dt
+import gc
+import math
+import random
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import StringIO
+
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import (OperationalError, close_old_connections, connection,
+                       transaction)
+from django.db.models import Count
+from django.test import Client, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from yatube.settings import COUNT_PAGE
+from . import counters
+from .models import Comment, Follow, Group, Post, User
+from .transfer import keep_dates
+
+PREFIX = 'bench'
+QUERIES_RE = re.compile(r'SQL, (\d+) queries')
+
+
+def _batches(items, size):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _zipf(count):
+    """Накопленные веса Ципфа: немногие авторы пишут большую часть постов."""
+    total, weights = 0.0, []
+    for rank in range(1, count + 1):
+        total += 1 / rank
+        weights.append(total)
+    return weights
+
+
+def generate(users=200, posts=5000, comments=10000, follows=20, groups=10,
+             seed=0, batch_size=1000):
+    """Заполняет базу пользователями, группами, постами и подписками.
+
+    follows — сколько авторов в среднем читает каждый пользователь;
+    и посты, и подписки смещены к популярным авторам.
+    """
+    rng = random.Random(seed)
+    password = make_password(None)
+    User.objects.bulk_create(
+        (User(username=f'{PREFIX}{index}', password=password)
+         for index in range(users)), batch_size=batch_size)
+    user_ids = list(User.objects.filter(
+        username__startswith=PREFIX).order_by('pk').values_list(
+        'pk', flat=True))
+    Group.objects.bulk_create(
+        Group(title=f'Группа {index}', slug=f'{PREFIX}-{index}',
+              description='Синтетическая группа') for index in range(groups))
+    group_ids = list(Group.objects.filter(
+        slug__startswith=PREFIX).values_list('pk', flat=True)) + [None]
+    weights = _zipf(len(user_ids))
+    now = timezone.now()
+    with keep_dates():
+        for batch in _batches(range(posts), batch_size):
+            authors = rng.choices(user_ids, cum_weights=weights, k=len(batch))
+            Post.objects.bulk_create(
+                Post(text=f'Синтетический пост {index} ' * 10,
+                     author_id=author, group_id=rng.choice(group_ids),
+                     pub_date=now - dt.timedelta(
+                         seconds=rng.randrange(365 * 24 * 3600)))
+                for index, author in zip(batch, authors))
+        post_ids = list(Post.objects.values_list('pk', flat=True))
+        for batch in _batches(range(comments), batch_size):
+            Comment.objects.bulk_create(
+                Comment(text=f'Комментарий {index}',
+                        post_id=rng.choice(post_ids),
+                        author_id=rng.choice(user_ids),
+                        created=now - dt.timedelta(
+                            seconds=rng.randrange(365 * 24 * 3600)))
+                for index in batch)
+    pairs = set()
+    for user in user_ids:
+        for author in rng.choices(user_ids, cum_weights=weights, k=follows):
+            if author != user:
+                pairs.add((user, author))
+    for batch in _batches(sorted(pairs), batch_size):
+        Follow.objects.bulk_create(
+            Follow(user_id=user, author_id=author) for user, author in batch)
+    counters.rebuild(batch_size)
+    call_command('rebuild_timelines', stdout=StringIO())
+    return {'users': users, 'posts': posts, 'comments': comments,
+            'follows': follows, 'groups': groups, 'seed': seed}
+
+
+def targets():
+    """Адреса и читатель для каждого замеряемого представления.
+
+    Берутся самые тяжёлые случаи: автор с наибольшим числом постов,
+    пост с наибольшим числом комментариев, самый активный читатель.
+    """
+    author = User.objects.annotate(
+        total=Count('author_posts')).order_by('-total').first()
+    post = Post.objects.order_by('-comments_count', 'pk').first()
+    reader = User.objects.annotate(
+        total=Count('follower')).order_by('-total').first()
+    group = Group.objects.annotate(
+        total=Count('group_posts')).order_by('-total').first()
+    return {
+        'index': (reverse('posts:index'), None),
+        'group_posts': (reverse('posts:group_posts', args=[group.slug]),
+                        None),
+        'profile': (reverse('posts:profile', args=[author.username]), None),
+        'post_view': (reverse('posts:post', args=[post.author.username,
+                                                  post.pk]), None),
+        'follow_index': (reverse('posts:follow_index'), reader),
+    }
+
+
+def percentile(values, share):
+    """Перцентиль по ближайшему рангу."""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(share * len(ordered)) - 1)]
+
+
+def measure(url, user=None, requests=50, warmup=3, cold=False):
+    """Задержки и наибольшее число запросов к базе для одного адреса."""
+    client = Client()
+    if user is not None:
+        client.force_login(user)
+    for _ in range(warmup):
+        client.get(url)
+    latencies, queries = [], []
+    # Сборщик мусора даёт случайные паузы, которые не относятся к коду.
+    gc.collect()
+    gc.disable()
+    try:
+        for _ in range(requests):
+            latency, count = _request(client, url, cold)
+            latencies.append(latency)
+            queries.append(count)
+    finally:
+        gc.enable()
+    return {'p50_ms': round(percentile(latencies, 0.5), 2),
+            'p95_ms': round(percentile(latencies, 0.95), 2),
+            'max_ms': round(max(latencies), 2),
+            'queries': max(queries)}
+
+
+def _request(client, url, cold):
+    if cold:
+        cache.clear()
+    start = time.perf_counter()
+    response = client.get(url)
+    latency = (time.perf_counter() - start) * 1000
+    if response.status_code != 200:
+        raise RuntimeError(f'{url}: статус {response.status_code}')
+    match = QUERIES_RE.search(response.get('Server-Timing', ''))
+    return latency, int(match.group(1)) if match else 0
+
+
+def run(requests=50, warmup=3, cold=False):
+    """Замер всех представлений из targets.
+
+    Реплики на время замера отключены: временная база создаётся только
+    для default, а чтения read_replica ушли бы в настоящие файлы реплик.
+    """
+    with override_settings(DATABASE_REPLICAS=[]):
+        return {name: measure(url, user, requests, warmup, cold)
+                for name, (url, user) in targets().items()}
+
+
+def compare(results, baseline, tolerance=0.2, min_delta_ms=5):
+    """Строки о регрессиях относительно сохранённого замера.
+
+    Задержка сравнивается по p95: рост должен превысить и долю
+    tolerance, и min_delta_ms, чтобы шум на быстрых страницах
+    не считался регрессией. Число запросов сравнивается строго.
+    """
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        growth = result['p95_ms'] - base['p95_ms']
+        if (growth > base['p95_ms'] * tolerance
+                and growth > min_delta_ms):
+            regressions.append(
+                f'{name}: p95 {result["p95_ms"]} ms, '
+                f'было {base["p95_ms"]} ms')
+        if result['queries'] > base['queries']:
+            regressions.append(
+                f'{name}: запросов {result["queries"]}, '
+                f'было {base["queries"]}')
+    return regressions
+
+
+def _read(rng, user_ids):
+    list(Post.objects.feed()[:COUNT_PAGE])
+    list(Post.objects.feed().filter(
+        author_id=rng.choice(user_ids))[:COUNT_PAGE])
+
+
+def _write(rng, post_ids, user_ids):
+    # Как add_comment: чтение поста и запись комментария в одной транзакции.
+    with transaction.atomic():
+        post = Post.objects.get(pk=rng.choice(post_ids))
+        Comment.objects.create(post=post, author_id=rng.choice(user_ids),
+                               text='Комментарий под нагрузкой')
+
+
+def _worker(number, operations, write_share, seed, post_ids, user_ids):
+    rng = random.Random(seed + number)
+    latencies = {'read': [], 'write': []}
+    errors = 0
+    try:
+        for _ in range(operations):
+            kind = 'write' if rng.random() < write_share else 'read'
+            # Границы запроса: соединение живёт дольше, только если
+            # это разрешает CONN_MAX_AGE.
+            close_old_connections()
+            start = time.perf_counter()
+            try:
+                if kind == 'write':
+                    _write(rng, post_ids, user_ids)
+                else:
+                    _read(rng, user_ids)
+            except OperationalError:
+                errors += 1
+            else:
+                latencies[kind].append((time.perf_counter() - start) * 1000)
+            finally:
+                close_old_connections()
+    finally:
+        connection.close()
+    return latencies, errors
+
+
+def stress(threads=8, operations=200, write_share=0.2, seed=0):
+    """Читатели и писатели из пула потоков над одной базой.
+
+    Ошибки — операции, упавшие с OperationalError («database is
+    locked»); они не входят ни в пропускную способность, ни в задержки.
+    """
+    post_ids = list(Post.objects.values_list('pk', flat=True))
+    user_ids = list(User.objects.values_list('pk', flat=True))
+    start = time.perf_counter()
+    with ThreadPoolExecutor(threads) as pool:
+        results = list(pool.map(
+            lambda number: _worker(number, operations, write_share, seed,
+                                   post_ids, user_ids), range(threads)))
+    elapsed = time.perf_counter() - start
+    reads = [value for latencies, _ in results for value in latencies['read']]
+    writes = [value for latencies, _ in results
+              for value in latencies['write']]
+    return {
+        'ops_per_s': round((len(reads) + len(writes)) / elapsed, 1),
+        'reads': len(reads),
+        'writes': len(writes),
+        'errors': sum(errors for _, errors in results),
+        'read_p95_ms': round(percentile(reads, 0.95), 2) if reads else None,
+        'write_p95_ms': round(percentile(writes, 0.95), 2) if writes else None,
+    }
@@ -0,0 +1,72 @@
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.template.loader import render_to_string
+
+CARD_TEMPLATE = 'includes/post_item.html'
+VERSION_KEY = 'card:v:{}:{}'
+CARD_KEY = 'card:{}:{}:{}:{}:{}'
+
+
+def _version_key(kind, pk):
+    return VERSION_KEY.format(kind, pk)
+
+
+def bump(kind, pk):
+    """Меняет версию поста, автора или группы: их карточки устаревают.
+
+    Версия — случайная строка, а не счётчик: если ключ версии вытеснят
+    из кэша, новая версия всё равно не совпадёт со старыми карточками.
+    Версия меняется после фиксации транзакции: иначе читатель успел бы
+    закэшировать под новой версией карточку со старыми данными.
+    """
+    transaction.on_commit(lambda: cache.set(
+        _version_key(kind, pk), uuid.uuid4().hex[:12], None))
+
+
+def _versions(posts):
+    keys = set()
+    for post in posts:
+        keys.add(_version_key('post', post.pk))
+        keys.add(_version_key('author', post.author_id))
+        if post.group_id:
+            keys.add(_version_key('group', post.group_id))
+    versions = cache.get_many(keys)
+    missing = {key: uuid.uuid4().hex[:12] for key in keys - versions.keys()}
+    if missing:
+        cache.set_many(missing, None)
+        versions.update(missing)
+    return versions
+
+
+def _role(user, post):
+    if not user.is_authenticated:
+        return 'guest'
+    return 'author' if user.pk == post.author_id else 'user'
+
+
+def render_cards(posts, user):
+    """Собирает ленту из закэшированных карточек постов.
+
+    Ключ карточки — id поста, версии поста, автора и группы и роль
+    зрителя. Перерисовываются только карточки, чьи версии сменились.
+    """
+    posts = list(posts)
+    versions = _versions(posts)
+    keys = [CARD_KEY.format(
+        post.pk,
+        versions[_version_key('post', post.pk)],
+        versions[_version_key('author', post.author_id)],
+        versions.get(_version_key('group', post.group_id), '-'),
+        _role(user, post)) for post in posts]
+    cards = cache.get_many(keys)
+    fresh = {}
+    for key, post in zip(keys, posts):
+        if key not in cards:
+            fresh[key] = cards[key] = render_to_string(
+                CARD_TEMPLATE, {'post': post, 'user': user})
+    if fresh:
+        cache.set_many(fresh, settings.POST_CARD_TIMEOUT)
+    return ''.join(cards[key] for key in keys)
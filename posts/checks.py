@@ -0,0 +1,15 @@
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.checks import Error, Tags, register
+
+
+@register(Tags.caches, deploy=True)
+def shared_cache_check(app_configs, **kwargs):
+    """Версии карточек и метки ETag должны быть видны всем воркерам."""
+    if isinstance(caches['default'], LocMemCache):
+        return [Error(
+            'Кэш default — locmem, свой у каждого процесса: версии '
+            'карточек и метки страниц не дойдут до других воркеров.',
+            hint='Задайте общий кэш: YATUBE_CACHE=file или путь к бэкенду.',
+            id='posts.E001')]
+    return []
@@ -0,0 +1,184 @@
+"""Условный GET для страниц лент и поста.
+
+Валидатор страницы собирается из дешёвых запросов по индексам (свежий
+пост или комментарий, счётчики) и меток изменений в кэше, которые
+сигналы сдвигают при правках. Совпавший ETag даёт 304 без выполнения
+представления.
+"""
+import datetime as dt
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.views.decorators.http import condition
+
+from . import follow_graph
+from .models import Comment, Group, Post, User, UserStats
+
+STAMP_KEY = 'stamp:{}'
+
+
+def touch(*scopes):
+    """Отмечает изменение в областях: их страницы получат новый ETag.
+
+    Метки сдвигаются после фиксации транзакции, по той же причине,
+    что и версии карточек в cards.bump.
+    """
+    def run():
+        now = time.time()
+        cache.set_many({STAMP_KEY.format(scope): now for scope in scopes},
+                       None)
+
+    transaction.on_commit(run)
+
+
+def touch_post(post):
+    """Сдвигает метки всех страниц, где видна карточка поста."""
+    scopes = ['index', 'trending', f'author:{post.author_id}',
+              f'post:{post.pk}']
+    if post.group_id:
+        scopes.append(f'group:{post.group_id}')
+    touch(*scopes)
+
+
+def stamps(scopes):
+    """Метки областей; вытесненная метка считается изменением сейчас."""
+    keys = [STAMP_KEY.format(scope) for scope in scopes]
+    found = cache.get_many(keys)
+    missing = {key: time.time() for key in keys if key not in found}
+    if missing:
+        cache.set_many(missing, None)
+        found.update(missing)
+    return [found[key] for key in keys]
+
+
+def _newest(queryset, field='pub_date'):
+    return queryset.order_by(f'-{field}', '-id').values_list(
+        field, 'id').first()
+
+
+def _memo(request, key, load):
+    memo = request.__dict__.setdefault('page_objects', {})
+    if key not in memo:
+        memo[key] = load()
+    return memo[key]
+
+
+def page_user(request, username):
+    """Владелец страницы: валидатор и представление делят один запрос."""
+    return _memo(request, ('user', username),
+                 lambda: get_object_or_404(User, username=username))
+
+
+def page_group(request, slug):
+    return _memo(request, ('group', slug),
+                 lambda: get_object_or_404(Group, slug=slug))
+
+
+def page_post(request, post_id):
+    return _memo(request, ('post', post_id), lambda: get_object_or_404(
+        Post.objects.select_related('author', 'group'), pk=post_id))
+
+
+def page_stats(request, user):
+    return _memo(request, ('stats', user.pk),
+                 lambda: UserStats.objects.for_user(user))
+
+
+def _counters(stats):
+    return stats.posts, stats.followers, stats.following
+
+
+def index_state(request):
+    return ('site', 'index'), (_newest(Post.objects.all()),)
+
+
+def group_state(request, slug):
+    group = page_group(request, slug)
+    return (('site', f'group:{group.pk}'),
+            (_newest(Post.objects.filter(group_id=group.pk)),))
+
+
+def trending_state(request):
+    # Рейтинг меняет update_trending, он и сдвигает метку trending.
+    return ('site', 'trending'), ()
+
+
+def profile_state(request, username):
+    user = page_user(request, username)
+    parts = (_newest(Post.objects.filter(author_id=user.pk)),
+             _counters(page_stats(request, user)))
+    if request.user.pk == user.pk:
+        # Свой профиль показывает «кого почитать» из графа подписок.
+        parts += (follow_graph.graph().stamp,)
+    return ('site', f'author:{user.pk}'), parts
+
+
+def post_state(request, username, post_id):
+    user = page_user(request, username)
+    post = page_post(request, post_id)
+    return (('site', f'post:{post.pk}'),
+            ((post.pub_date, post.comments_count),
+             _newest(Comment.objects.filter(post_id=post.pk), 'created'),
+             _counters(page_stats(request, user))))
+
+
+def _validators(state, request, *args, **kwargs):
+    """ETag и Last-Modified страницы, один раз на запрос."""
+    if not hasattr(request, 'page_validators'):
+        scopes, parts = state(request, *args, **kwargs)
+        marks = stamps(scopes)
+        user = request.user
+        # Свёрстанная страница зависит от зрителя и его CSRF-токена.
+        viewer = ((user.pk, request.META.get('CSRF_COOKIE'))
+                  if user.is_authenticated else None)
+        etag = hashlib.md5(repr((
+            request.get_full_path(), viewer, parts, marks,
+            settings.PAGE_RELEASE)).encode()).hexdigest()
+        last_modified = None
+        if viewer is None:
+            # Вход на сайт не меняет дат, поэтому Last-Modified,
+            # по которому браузер сверяется без ETag, — только гостям.
+            dates = [value for part in parts if part
+                     for value in part if isinstance(value, dt.datetime)]
+            dates += [dt.datetime.fromtimestamp(mark, timezone.utc)
+                      for mark in marks]
+            last_modified = max(dates)
+        request.page_validators = etag, last_modified
+    return request.page_validators
+
+
+def conditional_page(state):
+    """Декоратор: 304 по валидатору из state и заголовки кэширования.
+
+    Гостям страница отдаётся как public с s-maxage для обратного
+    прокси, вошедшим — как private, с проверкой при каждом показе.
+    """
+    def etag(request, *args, **kwargs):
+        return _validators(state, request, *args, **kwargs)[0]
+
+    def last_modified(request, *args, **kwargs):
+        return _validators(state, request, *args, **kwargs)[1]
+
+    def decorator(view):
+        conditional = condition(etag, last_modified)(view)
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            response = conditional(request, *args, **kwargs)
+            if request.user.is_authenticated:
+                patch_cache_control(response, private=True, no_cache=True)
+            else:
+                patch_cache_control(
+                    response, public=True, max_age=0,
+                    s_maxage=settings.PAGE_PROXY_MAX_AGE)
+            patch_vary_headers(response, ('Cookie',))
+            return response
+        return wrapper
+    return decorator
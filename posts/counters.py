@@ -0,0 +1,68 @@
+from django.contrib.auth import get_user_model
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Comment, Follow, Post, UserStats
+
+User = get_user_model()
+
+USER_FIELDS = ('posts', 'followers', 'following')
+
+
+def _shift(queryset, field, delta):
+    if delta < 0:
+        # Не уходим ниже нуля, даже если счётчик успел разойтись.
+        queryset = queryset.filter(**{f'{field}__gte': -delta})
+    queryset.update(**{field: F(field) + delta})
+
+
+def add_user(user_id, field, delta):
+    """Сдвигает счётчик пользователя, если он уже заведён."""
+    _shift(UserStats.objects.filter(user_id=user_id), field, delta)
+
+
+def add_comments(post_id, delta):
+    """Сдвигает счётчик комментариев поста."""
+    _shift(Post.objects.filter(pk=post_id), 'comments_count', delta)
+
+
+def _count(queryset, field):
+    return Coalesce(Subquery(
+        queryset.filter(**{field: OuterRef('pk')}).order_by().values(
+            field).annotate(total=Count('pk')).values('total'),
+        output_field=IntegerField()), 0)
+
+
+def rebuild(batch_size=1000, dry_run=False):
+    """Пересчитывает все счётчики с нуля.
+
+    Возвращает число пользователей и постов, у которых счётчики
+    расходились с данными. В режиме dry_run ничего не записывает.
+    """
+    users = User.objects.annotate(
+        real_posts=_count(Post.objects, 'author'),
+        real_followers=_count(Follow.objects, 'author'),
+        real_following=_count(Follow.objects, 'user')).order_by('pk')
+    stored = UserStats.objects.in_bulk()
+    drift_users = 0
+    to_create, to_update = [], []
+    for user in users.iterator():
+        stats = stored.get(user.pk)
+        if stats is None:
+            to_create.append(UserStats(user_id=user.pk))
+            stats = to_create[-1]
+        elif any(getattr(stats, field) != getattr(user, f'real_{field}')
+                 for field in USER_FIELDS):
+            drift_users += 1
+            to_update.append(stats)
+        for field in USER_FIELDS:
+            setattr(stats, field, getattr(user, f'real_{field}'))
+
+    real_comments = _count(Comment.objects, 'post')
+    drift_posts = Post.objects.annotate(real=real_comments).exclude(
+        comments_count=F('real')).count()
+    if not dry_run:
+        UserStats.objects.bulk_create(to_create, batch_size)
+        UserStats.objects.bulk_update(to_update, USER_FIELDS, batch_size)
+        Post.objects.update(comments_count=real_comments)
+    return drift_users, drift_posts
@@ -0,0 +1,188 @@
+"""Ленты RSS 2.0, Atom и JSON Feed для главной, групп и авторов.
+
+Документ отдаётся потоком по мере чтения постов из базы, а условный
+GET по ETag/Last-Modified стоит одного запроса даты свежего поста.
+"""
+import hashlib
+import json
+from xml.sax.saxutils import escape, quoteattr
+
+from django.conf import settings
+from django.http import Http404, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.feedgenerator import rfc2822_date, rfc3339_date
+from django.utils.text import Truncator
+from django.views.decorators.http import condition
+
+from .models import Group, Post, User
+
+CONTENT_TYPES = {
+    'rss': 'application/rss+xml; charset=utf-8',
+    'atom': 'application/atom+xml; charset=utf-8',
+    'json': 'application/feed+json; charset=utf-8',
+}
+
+
+class FeedSource:
+    """Посты ленты; заголовок и ссылка читаются, только когда нужно тело.
+
+    Для условного GET достаточно даты свежего поста: это один запрос
+    с LIMIT 1 по индексу (group|author, -pub_date, -id).
+    """
+    FILTERS = {'group': 'group__slug', 'author': 'author__username'}
+
+    def __init__(self, kind, key=None):
+        self.kind = kind
+        self.key = key
+        self.posts = Post.objects.feed().order_by('-pub_date', '-id')
+        if kind in self.FILTERS:
+            self.posts = self.posts.filter(**{self.FILTERS[kind]: key})
+        self.updated = self.posts.values_list('pub_date', flat=True).first()
+        if self.updated is None:
+            # Пустая лента: отличаем пустую группу от несуществующей.
+            self.owner()
+
+    def owner(self):
+        if self.kind == 'group':
+            return get_object_or_404(Group, slug=self.key)
+        if self.kind == 'author':
+            return get_object_or_404(User, username=self.key)
+        return None
+
+    def describe(self):
+        """Заголовок ленты и адрес её страницы на сайте."""
+        owner = self.owner()
+        if self.kind == 'group':
+            return (f'Yatube: {owner.title}',
+                    reverse('posts:group_posts', args=[owner.slug]))
+        if self.kind == 'author':
+            return (f'Yatube: @{owner.username}',
+                    reverse('posts:profile', args=[owner.username]))
+        return 'Yatube', reverse('posts:index')
+
+
+def _source(request, kind, key=None, fmt=None):
+    """Источник ленты, один на запрос: его делят ETag и Last-Modified."""
+    if fmt not in CONTENT_TYPES:
+        raise Http404('Неизвестный формат ленты')
+    if not hasattr(request, 'feed_source'):
+        request.feed_source = FeedSource(kind, key)
+    return request.feed_source
+
+
+def _last_modified(request, kind, key=None, fmt=None):
+    return _source(request, kind, key, fmt).updated
+
+
+def _etag(request, kind, key=None, fmt=None):
+    updated = _source(request, kind, key, fmt).updated
+    stamp = updated.timestamp() if updated else 'empty'
+    return hashlib.md5(
+        f'{kind}:{key}:{fmt}:{stamp}:{settings.FEED_ITEMS}'.encode()
+    ).hexdigest()
+
+
+def _items(request, source):
+    for post in source.posts[:settings.FEED_ITEMS].iterator():
+        yield post, request.build_absolute_uri(reverse(
+            'posts:post', args=[post.author.username, post.pk]))
+
+
+def _title(post):
+    return Truncator(post.text).chars(60)
+
+
+def render_rss(request, source):
+    title, link = source.describe()
+    yield '<?xml version="1.0" encoding="utf-8"?>\n'
+    yield ('<rss version="2.0" xmlns:atom="http://www.w3.org/2005/Atom">'
+           '<channel>')
+    yield (f'<title>{escape(title)}</title>'
+           f'<link>{escape(request.build_absolute_uri(link))}</link>'
+           f'<description>{escape(title)}</description>'
+           f'<atom:link href={quoteattr(request.build_absolute_uri())} '
+           f'rel="self"/>')
+    if source.updated:
+        yield f'<lastBuildDate>{rfc2822_date(source.updated)}</lastBuildDate>'
+    for post, url in _items(request, source):
+        yield (f'<item><title>{escape(_title(post))}</title>'
+               f'<link>{escape(url)}</link>'
+               f'<guid isPermaLink="true">{escape(url)}</guid>'
+               f'<pubDate>{rfc2822_date(post.pub_date)}</pubDate>'
+               f'<description>{escape(post.text)}</description>')
+        if post.group:
+            yield f'<category>{escape(post.group.title)}</category>'
+        yield '</item>'
+    yield '</channel></rss>\n'
+
+
+def render_atom(request, source):
+    title, link = source.describe()
+    yield '<?xml version="1.0" encoding="utf-8"?>\n'
+    yield '<feed xmlns="http://www.w3.org/2005/Atom">'
+    yield (f'<title>{escape(title)}</title>'
+           f'<link href={quoteattr(request.build_absolute_uri(link))} '
+           f'rel="alternate"/>'
+           f'<link href={quoteattr(request.build_absolute_uri())} '
+           f'rel="self"/>'
+           f'<id>{escape(request.build_absolute_uri())}</id>')
+    if source.updated:
+        yield f'<updated>{rfc3339_date(source.updated)}</updated>'
+    for post, url in _items(request, source):
+        yield (f'<entry><title>{escape(_title(post))}</title>'
+               f'<link href={quoteattr(url)} rel="alternate"/>'
+               f'<id>{escape(url)}</id>'
+               f'<updated>{rfc3339_date(post.pub_date)}</updated>'
+               f'<author><name>{escape(post.author.username)}</name>'
+               f'</author>'
+               f'<content type="text">{escape(post.text)}</content>')
+        if post.group:
+            yield f'<category term={quoteattr(post.group.slug)}/>'
+        yield '</entry>'
+    yield '</feed>\n'
+
+
+def render_json(request, source):
+    title, link = source.describe()
+    head = json.dumps({
+        'version': 'https://jsonfeed.org/version/1.1',
+        'title': title,
+        'home_page_url': request.build_absolute_uri(link),
+        'feed_url': request.build_absolute_uri(),
+    }, ensure_ascii=False)
+    yield head[:-1] + ', "items": ['
+    separator = ''
+    for post, url in _items(request, source):
+        item = {'id': url, 'url': url, 'title': _title(post),
+                'content_text': post.text,
+                'date_published': rfc3339_date(post.pub_date),
+                'authors': [{'name': post.author.username}]}
+        if post.group:
+            item['tags'] = [post.group.title]
+        yield separator + json.dumps(item, ensure_ascii=False)
+        separator = ', '
+    yield ']}\n'
+
+
+RENDERERS = {'rss': render_rss, 'atom': render_atom, 'json': render_json}
+
+
+@condition(etag_func=_etag, last_modified_func=_last_modified)
+def feed(request, kind, key=None, fmt=None):
+    """Лента в формате fmt потоком, без сборки документа в памяти."""
+    source = _source(request, kind, key, fmt)
+    return StreamingHttpResponse(RENDERERS[fmt](request, source),
+                                 content_type=CONTENT_TYPES[fmt])
+
+
+def index_feed(request, fmt):
+    return feed(request, 'index', fmt=fmt)
+
+
+def group_feed(request, slug, fmt):
+    return feed(request, 'group', slug, fmt)
+
+
+def author_feed(request, username, fmt):
+    return feed(request, 'author', username, fmt)
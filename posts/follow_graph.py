@@ -0,0 +1,192 @@
+"""Граф подписок в памяти процесса для блока «кого почитать».
+
+Подписки хранятся в CSR из трёх array('i'): users — id подписчиков
+по возрастанию, authors — их авторы подряд, offsets — границы
+подписок каждого подписчика в authors. Это четыре байта на подписку
+против сотни с лишним у словаря множеств, а подписки пользователя
+находятся двоичным поиском без запросов к posts_follow.
+
+Подписки, сделанные в этом процессе после загрузки, копятся в added
+и removed поверх CSR. Граф перечитывается из Follow, когда их больше
+FOLLOW_GRAPH_MAX_DELTA или прошло FOLLOW_GRAPH_TTL секунд: так в него
+попадают и подписки из других процессов. Перечитывает его фоновый
+поток, а запросы тем временем читают прежний граф.
+"""
+import heapq
+import logging
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from itertools import islice
+
+from django.conf import settings
+from django.db import connection
+
+from .models import Follow, User
+
+logger = logging.getLogger(__name__)
+
+_graph = None
+# Защищает _graph, _reload и _replay; правки графа идут под ним же.
+_lock = threading.Lock()
+# Поток, перечитывающий граф, и правки, пришедшие за время чтения.
+_reload = None
+_replay = []
+
+
+class FollowGraph:
+    def __init__(self, pairs):
+        """pairs — (user_id, author_id), упорядоченные по user_id."""
+        self.users = array('i')
+        self.offsets = array('i', [0])
+        self.authors = array('i')
+        for user_id, author_id in pairs:
+            if not self.users or self.users[-1] != user_id:
+                if self.users:
+                    self.offsets.append(len(self.authors))
+                self.users.append(user_id)
+            self.authors.append(author_id)
+        if self.users:
+            self.offsets.append(len(self.authors))
+        self.added = {}
+        self.removed = {}
+        self.delta = 0
+        self.loaded = time.time()
+
+    @property
+    def stamp(self):
+        """Меняется при каждой правке графа и при перезагрузке."""
+        return self.loaded, self.delta
+
+    def stale(self):
+        return (self.delta > settings.FOLLOW_GRAPH_MAX_DELTA
+                or time.time() - self.loaded > settings.FOLLOW_GRAPH_TTL)
+
+    def following(self, user_id):
+        """Авторы, на которых подписан user_id: срез CSR или множество."""
+        index = bisect_left(self.users, user_id)
+        if index < len(self.users) and self.users[index] == user_id:
+            authors = self.authors[
+                self.offsets[index]:self.offsets[index + 1]]
+        else:
+            authors = ()
+        added = self.added.get(user_id)
+        removed = self.removed.get(user_id)
+        if not added and not removed:
+            return authors
+        return (set(authors) | (added or set())) - (removed or set())
+
+    # Множества added и removed не меняются на месте, а заменяются
+    # новыми: поток, который перебирает прежнее, дочитает его целым.
+
+    def follow(self, user_id, author_id):
+        self.removed[user_id] = self.removed.get(
+            user_id, frozenset()) - {author_id}
+        self.added[user_id] = self.added.get(
+            user_id, frozenset()) | {author_id}
+        self.delta += 1
+
+    def unfollow(self, user_id, author_id):
+        self.added[user_id] = self.added.get(
+            user_id, frozenset()) - {author_id}
+        self.removed[user_id] = self.removed.get(
+            user_id, frozenset()) | {author_id}
+        self.delta += 1
+
+    def recommend(self, user_id, limit, friends=None):
+        """Авторы через одно рукопожатие: (id, число общих подписок).
+
+        Вес кандидата — сколько авторов из подписок user_id на него
+        подписаны. Смотрятся не больше friends подписок пользователя.
+        """
+        following = self.following(user_id)
+        scores = Counter()
+        for friend in islice(following, friends):
+            scores.update(self.following(friend))
+        scores.pop(user_id, None)
+        for author in following:
+            scores.pop(author, None)
+        return heapq.nsmallest(limit, scores.items(),
+                               key=lambda item: (-item[1], item[0]))
+
+
+def load():
+    """Читает граф из Follow одним проходом по (user_id, author_id)."""
+    pairs = Follow.objects.order_by('user_id', 'author_id').values_list(
+        'user_id', 'author_id')
+    return FollowGraph(pairs.iterator())
+
+
+def _reload_graph():
+    """Читает граф в фоне и подменяет им прежний."""
+    global _graph, _reload
+    try:
+        fresh = load()
+    except Exception:
+        logger.exception('Не удалось перечитать граф подписок')
+        fresh = None
+    finally:
+        connection.close()
+    with _lock:
+        if fresh is not None:
+            # Подписки, зафиксированные во время чтения, могли в него
+            # не попасть: повторяем их поверх нового графа.
+            for method, user_id, author_id in _replay:
+                getattr(fresh, method)(user_id, author_id)
+            _graph = fresh
+        _replay.clear()
+        _reload = None
+
+
+def graph():
+    """Граф процесса.
+
+    В первый раз граф читается в запросе. Устаревший граф отвечает
+    и дальше, пока новый читается в фоновом потоке.
+    """
+    global _graph, _reload
+    current = _graph
+    if current is None:
+        with _lock:
+            if _graph is None:
+                _graph = load()
+            return _graph
+    if current.stale() and _reload is None:
+        with _lock:
+            if _reload is None:
+                _reload = threading.Thread(target=_reload_graph,
+                                           name='follow-graph', daemon=True)
+                _reload.start()
+    return current
+
+
+def invalidate():
+    """Следующее обращение к графу перечитает его из базы."""
+    global _graph
+    _graph = None
+
+
+def _apply(method, user_id, author_id):
+    with _lock:
+        if _graph is not None:
+            getattr(_graph, method)(user_id, author_id)
+        if _reload is not None:
+            _replay.append((method, user_id, author_id))
+
+
+def followed(user_id, author_id):
+    _apply('follow', user_id, author_id)
+
+
+def unfollowed(user_id, author_id):
+    _apply('unfollow', user_id, author_id)
+
+
+def who_to_follow(user_id):
+    """Пользователи для блока «кого почитать» и число общих подписок."""
+    pairs = graph().recommend(user_id, settings.FOLLOW_RECOMMENDATIONS,
+                              settings.FOLLOW_RECOMMEND_FRIENDS)
+    users = User.objects.in_bulk([pk for pk, _ in pairs])
+    return [(users[pk], score) for pk, score in pairs if pk in users]
@@ -11,6 +11,16 @@ def clean_artist(value):
 
 
 class PostForm(forms.ModelForm):
+    def __init__(self, *args, upload_errors=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Причины, по которым ImageUploadHandler отбросил файлы.
+        self.upload_errors = upload_errors or {}
+
+    def clean_image(self):
+        if 'image' in self.upload_errors:
+            raise forms.ValidationError(self.upload_errors['image'])
+        return self.cleaned_data['image']
+
     class Meta:
         model = Post
         fields = ('group', 'text', 'image')
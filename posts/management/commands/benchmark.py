@@ -0,0 +1,94 @@
+import json
+import os
+import tempfile
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import (override_settings, setup_test_environment,
+                               teardown_test_environment)
+
+from posts import benchmark
+
+BASELINE = os.path.join(settings.BASE_DIR, 'benchmarks', 'baseline.json')
+
+
+class Command(BaseCommand):
+    help = ('Заполняет временную базу синтетическими данными и замеряет '
+            'задержку и число запросов ленты, профиля и поста.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=200)
+        parser.add_argument('--posts', type=int, default=5000)
+        parser.add_argument('--comments', type=int, default=10000)
+        parser.add_argument(
+            '--follows', type=int, default=20,
+            help='Сколько авторов в среднем читает пользователь.')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--requests', type=int, default=50)
+        parser.add_argument(
+            '--cold', action='store_true',
+            help='Очищать кэш перед каждым запросом.')
+        parser.add_argument('--baseline', default=BASELINE)
+        parser.add_argument(
+            '--save-baseline', action='store_true',
+            help='Записать результат как новый эталон.')
+        parser.add_argument(
+            '--tolerance', type=float, default=0.2,
+            help='Допустимый рост p95 относительно эталона.')
+
+    def handle(self, *args, **options):
+        with tempfile.TemporaryDirectory() as location:
+            # Тот же бэкенд кэша, но в своём каталоге: --cold очищает
+            # кэш и не должен задевать кэш работающего сайта.
+            caches = {'default': dict(settings.CACHES['default'],
+                                      LOCATION=location)}
+            with override_settings(CACHES=caches):
+                dataset, results = self.measure(options)
+        dataset['cold'] = options['cold']
+        self.report(results)
+        if options['save_baseline']:
+            os.makedirs(os.path.dirname(options['baseline']), exist_ok=True)
+            with open(options['baseline'], 'w') as baseline:
+                json.dump({'dataset': dataset, 'views': results}, baseline,
+                          indent=2, sort_keys=True)
+            self.stdout.write(self.style.SUCCESS(
+                f'Эталон записан в {options["baseline"]}.'))
+            return
+        self.check_baseline(options, dataset, results)
+
+    def measure(self, options):
+        setup_test_environment(debug=False)
+        database = connection.creation.create_test_db(verbosity=0)
+        try:
+            dataset = benchmark.generate(
+                options['users'], options['posts'], options['comments'],
+                options['follows'], seed=options['seed'])
+            return dataset, benchmark.run(options['requests'],
+                                          cold=options['cold'])
+        finally:
+            connection.creation.destroy_test_db(database, verbosity=0)
+            teardown_test_environment()
+
+    def report(self, results):
+        self.stdout.write(f'{"view":<14}{"p50 ms":>10}{"p95 ms":>10}'
+                          f'{"max ms":>10}{"queries":>9}')
+        for name, result in results.items():
+            self.stdout.write(
+                f'{name:<14}{result["p50_ms"]:>10}{result["p95_ms"]:>10}'
+                f'{result["max_ms"]:>10}{result["queries"]:>9}')
+
+    def check_baseline(self, options, dataset, results):
+        if not os.path.exists(options['baseline']):
+            return
+        with open(options['baseline']) as baseline:
+            baseline = json.load(baseline)
+        if baseline['dataset'] != dataset:
+            self.stdout.write(self.style.WARNING(
+                'Эталон снят на других данных, сравнение пропущено.'))
+            return
+        regressions = benchmark.compare(results, baseline['views'],
+                                        options['tolerance'])
+        if regressions:
+            raise CommandError('Регрессии:\n' + '\n'.join(regressions))
+        self.stdout.write(self.style.SUCCESS('Регрессий нет.'))
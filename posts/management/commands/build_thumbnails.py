@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from posts import thumbnails, variants
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = ('Очищает картинки и строит миниатюры и варианты для постов, '
+            'у которых их нет: например, загруженных до пула миниатюр.')
+
+    def handle(self, *args, **options):
+        posts = Post.objects.exclude(image='').exclude(image=None)
+        pending = {}
+        for post in posts.only('image', 'image_variants').order_by(
+                'pk').iterator():
+            if not variants.thumbnail(post):
+                pending.setdefault(post.image.name, post.pk)
+        failed = 0
+        for name, pk in pending.items():
+            try:
+                thumbnails.render(pk, name)
+            except Exception as error:
+                failed += 1
+                self.stderr.write(f'{name}: {error}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Картинок обработано: {len(pending) - failed}, '
+            f'с ошибкой: {failed}'))
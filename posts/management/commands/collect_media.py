@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from django.template.defaultfilters import filesizeformat
+
+from posts import media_gc
+
+
+class Command(BaseCommand):
+    help = ('Удаляет из MEDIA_ROOT картинки без постов, их варианты, '
+            'миниатюры sorl с записями KV и недописанные *.part.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только посчитать ничьи файлы, ничего не удалять.')
+        parser.add_argument('--workers', type=int, default=4)
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        stats = media_gc.collect(options['dry_run'], options['workers'],
+                                 options['batch_size'])
+        self.stdout.write(
+            f'Просмотрено файлов: {stats["files"]}, '
+            f'ничьих: {stats["orphans"]} '
+            f'({filesizeformat(stats["bytes"])}).')
+        if not options['dry_run']:
+            self.stdout.write(self.style.SUCCESS(
+                f'Освобождено: {filesizeformat(stats["bytes"])}.'))
@@ -0,0 +1,61 @@
+import re
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from posts import timeline
+from posts.models import Comment, Follow, Post, User
+from posts.pagination import CursorPaginator
+from yatube.settings import COUNT_PAGE
+
+# Признаки плана без подходящего индекса: полный проход таблицы
+# или сортировка во временном дереве (SQLite), Seq Scan (PostgreSQL).
+BAD_PLAN_RE = re.compile(r'\bSCAN (?!.*\bUSING\b)|TEMP B-TREE|Seq Scan')
+
+
+def feed_queries(user_id, group_id, author_id, post_id):
+    """Запросы лент в том виде, в каком их выполняют представления."""
+    feed = Post.objects.feed()
+    follows = Follow.objects.filter(user_id=user_id)
+    return {
+        'index': feed[:COUNT_PAGE],
+        'index_cursor': CursorPaginator(feed, COUNT_PAGE)._after(
+            timezone.now(), 0)[:COUNT_PAGE + 1],
+        'group_posts': feed.filter(group_id=group_id)[:COUNT_PAGE],
+        'profile': feed.filter(author_id=author_id)[:COUNT_PAGE],
+        # Без готовых лент посты многих авторов сливаются сортировкой,
+        # и --check честно отмечает follow_index как запрос без индекса.
+        'follow_index': (
+            timeline.timeline_posts(User(pk=user_id))
+            if settings.FOLLOW_TIMELINE else
+            feed.filter(author__in=User.objects.filter(
+                id__in=follows.values_list('author_id'))))[:COUNT_PAGE],
+        'post_comments': Comment.objects.filter(post_id=post_id),
+        'profile_following': follows.filter(author_id=author_id),
+    }
+
+
+class Command(BaseCommand):
+    help = ('Печатает план выполнения каждого запроса лент; с --check '
+            'падает, если запрос читает таблицу без индекса.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, default=1)
+        parser.add_argument('--group', type=int, default=1)
+        parser.add_argument('--author', type=int, default=1)
+        parser.add_argument('--post', type=int, default=1)
+        parser.add_argument('--check', action='store_true')
+
+    def handle(self, *args, **options):
+        queries = feed_queries(options['user'], options['group'],
+                               options['author'], options['post'])
+        bad = []
+        for name, queryset in queries.items():
+            plan = queryset.explain()
+            self.stdout.write(self.style.MIGRATE_HEADING(name))
+            self.stdout.write(plan + '\n')
+            if BAD_PLAN_RE.search(plan):
+                bad.append(name)
+        if bad and options['check']:
+            raise CommandError('Запросы без индекса: ' + ', '.join(bad))
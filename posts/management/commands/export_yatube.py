@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from posts import transfer
+
+
+class Command(BaseCommand):
+    help = ('Выгружает пользователей, группы, посты, комментарии и '
+            'подписки в NDJSON, читая базу пачками.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', help='Файл выгрузки, .gz сжимается; «-» — stdout.')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        if options['path'] == '-':
+            stream = self.stdout
+        else:
+            stream = transfer.open_stream(options['path'], 'w')
+        try:
+            counts = transfer.export(stream, options['batch_size'])
+        finally:
+            if options['path'] != '-':
+                stream.close()
+        self.stderr.write(', '.join(
+            f'{name}: {count}' for name, count in counts.items()))
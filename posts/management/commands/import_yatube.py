@@ -0,0 +1,37 @@
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import transfer
+
+
+class Command(BaseCommand):
+    help = ('Загружает NDJSON из export_yatube пачками через bulk_create, '
+            'переназначая id и внешние ключи.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', help='Файл выгрузки, .gz читается сжатым; «-» — stdin.')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--no-rebuild', action='store_true',
+            help='Не пересчитывать счётчики, ленты и поисковый индекс.')
+
+    def handle(self, *args, **options):
+        importer = transfer.Importer(options['batch_size'])
+        stream = transfer.open_stream(options['path'], 'r')
+        try:
+            created, skipped = importer.load(stream)
+        except ValueError as error:
+            raise CommandError(error)
+        finally:
+            importer.close()
+            if options['path'] != '-':
+                stream.close()
+        for name in transfer.MODELS:
+            self.stdout.write(f'{name}: создано {created[name]}, '
+                              f'пропущено {skipped[name]}')
+        if not options['no_rebuild']:
+            for command in ('rebuild_counters', 'rebuild_timelines',
+                            'rebuild_search_index'):
+                call_command(command, stdout=self.stdout)
+        self.stdout.write(self.style.SUCCESS('Загрузка завершена.'))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from posts import counters
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает счётчики пользователей и комментариев с нуля '
+            'и сообщает, сколько из них разошлись с данными.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только проверить расхождение, ничего не записывать.')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        users, posts = counters.rebuild(options['batch_size'],
+                                        options['dry_run'])
+        self.stdout.write(
+            f'Расхождения: пользователей {users}, постов {posts}.')
+        if not options['dry_run']:
+            self.stdout.write(self.style.SUCCESS('Счётчики пересчитаны.'))
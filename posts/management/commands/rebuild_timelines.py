@@ -0,0 +1,22 @@
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+
+from posts import timeline
+from posts.models import Follow, PopularAuthor, Timeline
+
+
+class Command(BaseCommand):
+    help = ('Заново собирает готовые ленты подписок из Follow и Post '
+            'и заново отмечает популярных авторов.')
+
+    def handle(self, *args, **options):
+        Timeline.objects.all().delete()
+        # Отметки ставятся заново по текущему числу подписчиков.
+        PopularAuthor.objects.all().delete()
+        cache.delete(timeline.POPULAR_CACHE_KEY)
+        follows = Follow.objects.order_by('pk')
+        for follow in follows.iterator():
+            timeline.backfill(follow)
+        self.stdout.write(self.style.SUCCESS(
+            f'Лент пересобрано: {follows.count()}, '
+            f'записей: {Timeline.objects.count()}'))
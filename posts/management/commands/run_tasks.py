@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from posts import queue
+
+
+class Command(BaseCommand):
+    help = ('Выполняет фоновые задачи из posts_task в пуле потоков; '
+            'процессов run_tasks можно запустить несколько.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4)
+        parser.add_argument(
+            '--batch', type=int, default=100,
+            help='Сколько задач забирать за раз, не больше --workers.')
+        parser.add_argument(
+            '--poll', type=float, default=1.0,
+            help='Пауза в секундах, когда очередь пуста.')
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Выполнить готовые задачи и выйти.')
+
+    def handle(self, *args, **options):
+        counts = queue.run(options['workers'], options['batch'],
+                           options['once'], options['poll'])
+        self.stdout.write(
+            f'Выполнено задач: {counts["done"]}, '
+            f'упало: {counts["failed"]}.')
@@ -0,0 +1,96 @@
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import (override_settings, setup_test_environment,
+                               teardown_test_environment)
+
+from posts import benchmark
+
+
+class Command(BaseCommand):
+    help = ('Нагружает временную базу SQLite читателями и писателями из '
+            'пула потоков и сравнивает профили из SQLITE_PROFILES.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--profiles', default='default,production')
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument(
+            '--operations', type=int, default=200,
+            help='Операций на поток.')
+        parser.add_argument(
+            '--write-share', type=float, default=0.2,
+            help='Доля операций записи.')
+        parser.add_argument('--users', type=int, default=50)
+        parser.add_argument('--posts', type=int, default=1000)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        profiles = options['profiles'].split(',')
+        unknown = set(profiles) - set(settings.SQLITE_PROFILES)
+        if unknown:
+            raise CommandError('Неизвестные профили: '
+                               + ', '.join(sorted(unknown)))
+        if connection.vendor != 'sqlite':
+            raise CommandError('Команда нагружает только базу SQLite.')
+        with tempfile.TemporaryDirectory() as directory:
+            caches = {'default': dict(settings.CACHES['default'],
+                                      LOCATION=directory)}
+            with override_settings(CACHES=caches):
+                results = self.run(directory, profiles, options)
+        self.report(results)
+
+    def run(self, directory, profiles, options):
+        setup_test_environment(debug=False)
+        # База в файле: в памяти нет ни WAL, ни настоящих блокировок.
+        template = os.path.join(directory, 'template.sqlite3')
+        connection.settings_dict['TEST']['NAME'] = template
+        with override_settings(SQLITE_PROFILE='default'):
+            database = connection.creation.create_test_db(verbosity=0)
+        results = {}
+        try:
+            with override_settings(SQLITE_PROFILE='default'):
+                benchmark.generate(options['users'], options['posts'],
+                                   comments=options['posts'], follows=5,
+                                   seed=options['seed'])
+                connection.close()
+            for name in profiles:
+                results[name] = self.run_profile(
+                    directory, template, name, options)
+        finally:
+            connection.settings_dict['NAME'] = template
+            connection.creation.destroy_test_db(database, verbosity=0)
+            teardown_test_environment()
+        return results
+
+    def run_profile(self, directory, template, name, options):
+        """Замер профиля на свежей копии базы."""
+        path = os.path.join(directory, f'{name}.sqlite3')
+        shutil.copyfile(template, path)
+        # settings_dict общий для соединений всех потоков.
+        previous = dict(connection.settings_dict)
+        connection.settings_dict.update(
+            NAME=path,
+            CONN_MAX_AGE=settings.SQLITE_PROFILES[name]['conn_max_age'])
+        try:
+            with override_settings(SQLITE_PROFILE=name):
+                return benchmark.stress(
+                    options['threads'], options['operations'],
+                    options['write_share'], options['seed'])
+        finally:
+            connection.close()
+            connection.settings_dict.update(previous)
+
+    def report(self, results):
+        self.stdout.write(f'{"profile":<12}{"ops/s":>9}{"reads":>7}'
+                          f'{"writes":>8}{"errors":>8}{"read p95":>10}'
+                          f'{"write p95":>11}')
+        for name, result in results.items():
+            self.stdout.write(
+                f'{name:<12}{result["ops_per_s"]:>9}{result["reads"]:>7}'
+                f'{result["writes"]:>8}{result["errors"]:>8}'
+                f'{str(result["read_p95_ms"]):>10}'
+                f'{str(result["write_p95_ms"]):>11}')
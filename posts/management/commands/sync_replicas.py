@@ -0,0 +1,42 @@
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+
+def copy_sqlite(source, target):
+    """Копирует базу SQLite целиком через backup API, без остановки записи."""
+    source.ensure_connection()
+    destination = sqlite3.connect(target.settings_dict['NAME'])
+    try:
+        source.connection.backup(destination)
+    finally:
+        destination.close()
+
+
+class Command(BaseCommand):
+    help = ('Копирует основную базу SQLite в реплики из DATABASE_REPLICAS: '
+            'замена настоящей репликации для проверки на одной машине.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=float, default=0,
+            help='Повторять копирование раз в столько секунд.')
+
+    def handle(self, *args, **options):
+        if not settings.DATABASE_REPLICAS:
+            raise CommandError('Реплики не заданы: YATUBE_DB_REPLICAS пуст.')
+        databases = ['default', *settings.DATABASE_REPLICAS]
+        if any(connections[alias].vendor != 'sqlite' for alias in databases):
+            raise CommandError(
+                'Копирование возможно только между базами SQLite; для '
+                'других баз настройте репликацию средствами СУБД.')
+        while True:
+            for alias in settings.DATABASE_REPLICAS:
+                copy_sqlite(connections['default'], connections[alias])
+                self.stdout.write(f'{alias}: скопировано.')
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts import trending
+
+
+class Command(BaseCommand):
+    help = ('Добавляет в рейтинг популярного новые посты и комментарии '
+            'и убирает остывшие записи.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--interval', type=float, default=0,
+            help='Повторять обновление раз в столько секунд.')
+
+    def handle(self, *args, **options):
+        while True:
+            events, removed = trending.update(options['batch_size'])
+            self.stdout.write(
+                f'Учтено событий: {events}, остывших записей: {removed}.')
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
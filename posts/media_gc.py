@@ -0,0 +1,198 @@
+"""Сборщик мусора в MEDIA_ROOT.
+
+thumbnails.release не трогает файлы моложе MEDIA_RELEASE_GRACE, а
+удаления мимо сигналов (queryset.update, правка базы руками, упавший
+процесс) оставляют картинки навсегда. collect обходит хранилище
+по подкаталогам в пуле потоков и удаляет то, на что никто не ссылается:
+исходники без постов, их варианты, миниатюры sorl с записями в KV
+и недописанные *.part. Файлы моложе MEDIA_RELEASE_GRACE не трогает.
+"""
+import json
+import os
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connection
+from sorl.thumbnail import default as sorl
+from sorl.thumbnail.conf import settings as sorl_settings
+from sorl.thumbnail.models import KVStore
+
+from . import variants
+from .models import Post
+from .storage import TEMP_SUFFIX, media_storage
+
+IMAGES = 'posts'
+VARIANTS = 'posts/variants/'
+
+
+def _thumbnail_root():
+    return sorl_settings.THUMBNAIL_PREFIX.rstrip('/')
+
+
+def _kv_key(identity, key):
+    return '||'.join([sorl_settings.THUMBNAIL_KEY_PREFIX, identity, key])
+
+
+def _live_variants():
+    """Имена вариантов, записанных в посты для их текущих картинок."""
+    live = set()
+    posts = Post.objects.exclude(image_variants='').only(
+        'image', 'image_variants')
+    for post in posts.iterator():
+        live.update(variants.files(post))
+    return live
+
+
+def _live_thumbnails(cutoff, batch, dry_run):
+    """Имена миниатюр sorl, исходник которых ещё нужен.
+
+    Записи KV ничьих исходников удаляются по пути (кроме dry_run),
+    тогда их миниатюры станут мусором для обхода каталога sorl.
+    """
+    live = set()
+    records = KVStore.objects.filter(
+        key__startswith=_kv_key('thumbnails', '')).order_by('key')
+    last = ''
+    while True:
+        chunk = dict(records.filter(key__gt=last).values_list(
+            'key', 'value')[:batch])
+        if not chunk:
+            return live
+        last = max(chunk)
+        sources = {key.split('||')[-1]: json.loads(value)
+                   for key, value in chunk.items()}
+        images = {
+            key.split('||')[-1]: json.loads(value)['name']
+            for key, value in KVStore.objects.filter(key__in=[
+                _kv_key('image', key)
+                for key in sources]).values_list('key', 'value')}
+        used = set(Post.objects.filter(
+            image__in=images.values()).values_list('image', flat=True))
+        keep, dead = [], []
+        for source, thumbnails in sources.items():
+            name = images.get(source)
+            if name in used or (name and _newer(name, cutoff)):
+                keep += thumbnails
+            else:
+                dead.append(source)
+        live.update(json.loads(value)['name'] for value in KVStore.objects
+                    .filter(key__in=[_kv_key('image', key) for key in keep])
+                    .values_list('value', flat=True))
+        if dead and not dry_run:
+            _forget(dead, sources)
+
+
+def _forget(dead, sources):
+    """Удаляет из KV записи исходников dead и их миниатюр."""
+    keys = []
+    for source in dead:
+        keys += [_kv_key('image', source), _kv_key('thumbnails', source)]
+        keys += [_kv_key('image', key) for key in sources[source]]
+    sorl.kvstore._delete_raw(*keys)
+
+
+def _newer(name, cutoff):
+    try:
+        return os.path.getmtime(media_storage.path(name)) > cutoff
+    except OSError:
+        return False
+
+
+def _shards():
+    """Каталоги для пула: корни без рекурсии и их подкаталоги целиком."""
+    shards = []
+    for root in (IMAGES, _thumbnail_root()):
+        path = media_storage.path(root)
+        if not os.path.isdir(path):
+            continue
+        shards.append((path, False))
+        with os.scandir(path) as entries:
+            shards += [(entry.path, True) for entry in entries
+                       if entry.is_dir(follow_symlinks=False)]
+    return shards
+
+
+def _walk(path, recursive):
+    """Файлы под path: (имя в хранилище, размер, mtime) по одному."""
+    base = media_storage.path('')
+    stack = [path]
+    while stack:
+        with os.scandir(stack.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if recursive:
+                        stack.append(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    stat = entry.stat(follow_symlinks=False)
+                    name = os.path.relpath(entry.path, base)
+                    yield (name.replace(os.sep, '/'), stat.st_size,
+                           stat.st_mtime)
+
+
+def _orphans(files, live_variants, live_thumbnails):
+    """Файлы пачки, на которые никто не ссылается."""
+    sources = [name for name, _ in files
+               if not name.startswith(VARIANTS)
+               and name.startswith(IMAGES + '/')]
+    used = set(Post.objects.filter(image__in=sources).values_list(
+        'image', flat=True)) if sources else set()
+    orphans = []
+    for name, size in files:
+        if name.endswith(TEMP_SUFFIX):
+            orphans.append((name, size))
+        elif name.startswith(VARIANTS):
+            if name not in live_variants:
+                orphans.append((name, size))
+        elif name.startswith(IMAGES + '/'):
+            if name not in used:
+                orphans.append((name, size))
+        elif name not in live_thumbnails:
+            orphans.append((name, size))
+    return orphans
+
+
+def _sweep(shard, cutoff, batch, dry_run, live_variants, live_thumbnails):
+    stats = Counter()
+    pending = []
+
+    def flush():
+        for name, size in _orphans(pending, live_variants, live_thumbnails):
+            stats['orphans'] += 1
+            stats['bytes'] += size
+            if not dry_run:
+                media_storage.delete(name)
+        pending.clear()
+
+    try:
+        for name, size, mtime in _walk(*shard):
+            stats['files'] += 1
+            if mtime > cutoff:
+                continue
+            pending.append((name, size))
+            if len(pending) >= batch:
+                flush()
+        flush()
+    finally:
+        connection.close()
+    return stats
+
+
+def collect(dry_run=False, workers=4, batch=500):
+    """Удаляет ничьи файлы; с dry_run только считает их.
+
+    Возвращает Counter: files — просмотрено, orphans — ничьих,
+    bytes — их общий размер.
+    """
+    cutoff = time.time() - settings.MEDIA_RELEASE_GRACE
+    live_variants = _live_variants()
+    live_thumbnails = _live_thumbnails(cutoff, batch, dry_run)
+    stats = Counter({'files': 0, 'orphans': 0, 'bytes': 0})
+    with ThreadPoolExecutor(workers, thread_name_prefix='media-gc') as pool:
+        for result in pool.map(
+                lambda shard: _sweep(shard, cutoff, batch, dry_run,
+                                     live_variants, live_thumbnails),
+                _shards()):
+            stats.update(result)
+    return stats
@@ -0,0 +1,48 @@
+# Generated by Django 2.2.6 on 2026-10-18 17:01
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+import django.db.models.deletion
+
+
+def fill_comments_count(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    Comment = apps.get_model('posts', 'Comment')
+    Post.objects.update(comments_count=Coalesce(
+        models.Subquery(
+            Comment.objects.filter(post=models.OuterRef('pk')).order_by()
+            .values('post').annotate(total=models.Count('pk'))
+            .values('total'),
+            output_field=models.IntegerField()), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0011_update_proxy_permissions'),
+        ('posts', '0025_timeline'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='пользователь')),
+                ('posts', models.PositiveIntegerField(default=0, verbose_name='записей')),
+                ('followers', models.PositiveIntegerField(default=0, verbose_name='подписчиков')),
+                ('following', models.PositiveIntegerField(default=0, verbose_name='подписок')),
+            ],
+            options={
+                'verbose_name': 'user stats',
+                'verbose_name_plural': 'Счётчики пользователей',
+                'db_table': 'posts_user_stats',
+            },
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='comments_count',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Счётчик комментариев, ведётся сигналами.', verbose_name='комментариев'),
+        ),
+        migrations.RunPython(fill_comments_count, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 2.2.6 on 2026-10-18 17:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0026_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='image_variants',
+            field=models.TextField(blank=True, default='', editable=False, help_text='JSON с шириной, форматом и файлом каждого варианта.', verbose_name='варианты изображения'),
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 2.2.6 on 2026-10-18 17:09
+
+from django.db import migrations, models, utils
+import django.db.models.deletion
+
+
+def create_fts(apps, schema_editor):
+    # FTS5 есть не в каждой сборке SQLite; без неё работает
+    # обратный индекс posts_search_term.
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    try:
+        schema_editor.execute(
+            'CREATE VIRTUAL TABLE IF NOT EXISTS posts_search_fts '
+            'USING fts5(body, tokenize="unicode61")')
+    except utils.OperationalError:
+        pass
+
+
+def drop_fts(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute('DROP TABLE IF EXISTS posts_search_fts')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0027_post_image_variants'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchTerm',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64, verbose_name='основа слова')),
+                ('count', models.PositiveIntegerField(default=1, verbose_name='вхождений')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='posts.Post', verbose_name='пост')),
+            ],
+            options={
+                'verbose_name': 'search term',
+                'verbose_name_plural': 'Поисковый индекс',
+                'db_table': 'posts_search_term',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='searchterm',
+            constraint=models.UniqueConstraint(fields=('term', 'post'), name='search_term_post'),
+        ),
+        migrations.RunPython(create_fts, drop_fts),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 2.2.6 on 2026-10-18 17:17
+
+from django.db import migrations, models
+
+
+def drop_duplicate_follows(apps, schema_editor):
+    """Оставляет самую раннюю из одинаковых подписок."""
+    Follow = apps.get_model('posts', 'Follow')
+    UserStats = apps.get_model('posts', 'UserStats')
+    duplicates = Follow.objects.values('user', 'author').order_by().annotate(
+        first=models.Min('pk'), total=models.Count('pk')).filter(total__gt=1)
+    users = set()
+    for row in duplicates.iterator():
+        Follow.objects.filter(user=row['user'], author=row['author']).exclude(
+            pk=row['first']).delete()
+        users.update((row['user'], row['author']))
+    # Счётчики этих пользователей пересчитаются при первом чтении.
+    UserStats.objects.filter(user__in=users).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0028_search_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_duplicate_follows,
+                             migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['post', '-created', '-id'], name='comment_post_created'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['group', '-pub_date', '-id'], name='post_group_pub_date'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['author', '-pub_date', '-id'], name='post_author_pub_date'),
+        ),
+        migrations.AddConstraint(
+            model_name='follow',
+            constraint=models.UniqueConstraint(fields=('user', 'author'), name='follow_user_author'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 2.2.6 on 2026-10-18 17:44
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0029_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Task',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, verbose_name='задача')),
+                ('args', models.TextField(help_text='Позиционные аргументы задачи в JSON.', verbose_name='аргументы')),
+                ('status', models.CharField(choices=[('queued', 'в очереди'), ('running', 'выполняется'), ('failed', 'не выполнена')], default='queued', max_length=10, verbose_name='состояние')),
+                ('attempts', models.PositiveIntegerField(default=0, verbose_name='попыток')),
+                ('run_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='запустить не раньше')),
+                ('locked_until', models.DateTimeField(blank=True, help_text='После этого времени задачу может забрать другой обработчик.', null=True, verbose_name='аренда до')),
+                ('worker', models.CharField(blank=True, max_length=64, verbose_name='обработчик')),
+                ('error', models.TextField(blank=True, verbose_name='последняя ошибка')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='создана')),
+            ],
+            options={
+                'verbose_name': 'task',
+                'verbose_name_plural': 'Фоновые задачи',
+                'db_table': 'posts_task',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['status', 'run_at'], name='task_status_run_at'),
+        ),
+    ]
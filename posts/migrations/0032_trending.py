@@ -0,0 +1,58 @@
+# Generated by Django 2.2.6 on 2026-10-18 18:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0031_content_addressed_images'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrendingGroup',
+            fields=[
+                ('group', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='trending', serialize=False, to='posts.Group', verbose_name='группа')),
+                ('score', models.FloatField(help_text='Логарифм суммы весов событий, приведённых к posts.trending.EPOCH.', verbose_name='рейтинг')),
+            ],
+            options={
+                'verbose_name': 'trending group',
+                'verbose_name_plural': 'Популярные группы',
+                'db_table': 'posts_trending_group',
+            },
+        ),
+        migrations.CreateModel(
+            name='TrendingMark',
+            fields=[
+                ('source', models.CharField(max_length=16, primary_key=True, serialize=False, verbose_name='источник')),
+                ('last_id', models.PositiveIntegerField(default=0, verbose_name='последний id')),
+            ],
+            options={
+                'verbose_name': 'trending mark',
+                'verbose_name_plural': 'Отметки рейтинга',
+                'db_table': 'posts_trending_mark',
+            },
+        ),
+        migrations.CreateModel(
+            name='TrendingPost',
+            fields=[
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='trending', serialize=False, to='posts.Post', verbose_name='пост')),
+                ('score', models.FloatField(help_text='Логарифм суммы весов событий, приведённых к posts.trending.EPOCH.', verbose_name='рейтинг')),
+            ],
+            options={
+                'verbose_name': 'trending post',
+                'verbose_name_plural': 'Популярные посты',
+                'db_table': 'posts_trending_post',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='trendingpost',
+            index=models.Index(fields=['-score'], name='trending_post_score'),
+        ),
+        migrations.AddIndex(
+            model_name='trendinggroup',
+            index=models.Index(fields=['-score'], name='trending_group_score'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 2.2.6 on 2026-10-18 19:00
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def fill_timelines(apps, schema_editor):
+    """Раскладывает по лентам посты авторов из уже существующих подписок.
+
+    Как timeline.backfill: авторы с числом подписчиков больше
+    FOLLOW_TIMELINE_FANOUT_LIMIT пропускаются, их посты читаются при
+    запросе. Уже разложенные записи не дублируются.
+    """
+    Follow = apps.get_model('posts', 'Follow')
+    Post = apps.get_model('posts', 'Post')
+    Timeline = apps.get_model('posts', 'Timeline')
+    popular = Follow.objects.values('author').order_by().annotate(
+        followers=models.Count('pk')).filter(
+        followers__gt=settings.FOLLOW_TIMELINE_FANOUT_LIMIT).values('author')
+    follows = Follow.objects.exclude(author__in=popular).order_by(
+        'pk').values_list('user_id', 'author_id')
+    for user_id, author_id in follows.iterator():
+        posts = Post.objects.filter(author_id=author_id).values_list(
+            'pk', 'pub_date')
+        Timeline.objects.bulk_create(
+            (Timeline(user_id=user_id, post_id=post_id, author_id=author_id,
+                      pub_date=pub_date)
+             for post_id, pub_date in posts.iterator()),
+            settings.FOLLOW_TIMELINE_BATCH, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0032_trending'),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_timelines, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,185 @@
+# Generated by Django 2.2.6 on 2026-10-18 19:10
+
+import re
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import migrations
+
+BATCH = 500
+
+# Разбор текста заморожен: копия posts.search.tokenize и posts.stemmer
+# на момент миграции, чтобы их правки не меняли её результат.
+FTS_TABLE = 'posts_search_fts'
+WORD_RE = re.compile(r'\w+')
+CYRILLIC_RE = re.compile('[а-яё]')
+STOP_WORDS = frozenset((
+    'а', 'без', 'бы', 'в', 'во', 'вот', 'все', 'вы', 'да', 'для', 'до',
+    'его', 'ее', 'её', 'если', 'есть', 'же', 'за', 'и', 'из', 'или', 'их',
+    'к', 'как', 'ко', 'ли', 'мы', 'на', 'не', 'нет', 'ни', 'но', 'о', 'об',
+    'он', 'она', 'они', 'от', 'по', 'при', 'с', 'со', 'так', 'то', 'ты',
+    'у', 'уже', 'что', 'это', 'я'))
+
+VOWELS = 'аеиоуыэюя'
+
+PERFECTIVE_GERUND = (
+    (('в', 'вши', 'вшись'), True),
+    (('ив', 'ивши', 'ившись', 'ыв', 'ывши', 'ывшись'), False),
+)
+ADJECTIVE = ((
+    ('ее', 'ие', 'ые', 'ое', 'ими', 'ыми', 'ей', 'ий', 'ый', 'ой', 'ем',
+     'им', 'ым', 'ом', 'его', 'ого', 'ему', 'ому', 'их', 'ых', 'ую', 'юю',
+     'ая', 'яя', 'ою', 'ею'), False),
+)
+PARTICIPLE = (
+    (('ем', 'нн', 'вш', 'ющ', 'щ'), True),
+    (('ивш', 'ывш', 'ующ'), False),
+)
+REFLEXIVE = ((('ся', 'сь'), False),)
+VERB = (
+    (('ла', 'на', 'ете', 'йте', 'ли', 'й', 'л', 'ем', 'н', 'ло', 'но',
+      'ет', 'ют', 'ны', 'ть', 'ешь', 'нно'), True),
+    (('ила', 'ыла', 'ена', 'ейте', 'уйте', 'ите', 'или', 'ыли', 'ей',
+      'уй', 'ил', 'ыл', 'им', 'ым', 'ен', 'ило', 'ыло', 'ено', 'ят', 'ует',
+      'уют', 'ит', 'ыт', 'ены', 'ить', 'ыть', 'ишь', 'ую', 'ю'), False),
+)
+NOUN = ((
+    ('а', 'ев', 'ов', 'ие', 'ье', 'е', 'иями', 'ями', 'ами', 'еи', 'ии',
+     'и', 'ией', 'ей', 'ой', 'ий', 'й', 'иям', 'ям', 'ием', 'ем', 'ам',
+     'ом', 'о', 'у', 'ах', 'иях', 'ях', 'ы', 'ь', 'ию', 'ью', 'ю', 'ия',
+     'ья', 'я'), False),
+)
+DERIVATIONAL = ('ость', 'ост')
+SUPERLATIVE = ('ейше', 'ейш')
+
+
+def _after_vc(word, start):
+    """Позиция после первой пары «гласная + согласная» начиная со start."""
+    for index in range(start + 1, len(word)):
+        if word[index] not in VOWELS and word[index - 1] in VOWELS:
+            return index + 1
+    return len(word)
+
+
+def _strip(word, groups):
+    """Отрезает самое длинное окончание из групп.
+
+    Окончания первой группы считаются только после «а» или «я».
+    """
+    best = ''
+    for endings, after_a in groups:
+        for ending in endings:
+            if (len(ending) > len(best) and word.endswith(ending)
+                    and (not after_a
+                         or word[:-len(ending)].endswith(('а', 'я')))):
+                best = ending
+    if best:
+        return word[:-len(best)], True
+    return word, False
+
+
+def _strip_inflection(tail):
+    """Шаг 1: деепричастие или возвратность, затем части речи."""
+    tail, found = _strip(tail, PERFECTIVE_GERUND)
+    if found:
+        return tail
+    tail, _ = _strip(tail, REFLEXIVE)
+    tail, found = _strip(tail, ADJECTIVE)
+    if found:
+        return _strip(tail, PARTICIPLE)[0]
+    tail, found = _strip(tail, VERB)
+    if found:
+        return tail
+    return _strip(tail, NOUN)[0]
+
+
+def stem(word):
+    """Основа русского слова в нижнем регистре."""
+    word = word.lower().replace('ё', 'е')
+    rv = next((index + 1 for index, char in enumerate(word)
+               if char in VOWELS), len(word))
+    r2 = _after_vc(word, _after_vc(word, 0))
+    head, tail = word[:rv], _strip_inflection(word[rv:])
+
+    if tail.endswith('и'):
+        tail = tail[:-1]
+
+    for ending in DERIVATIONAL:
+        if tail.endswith(ending) and rv + len(tail) - len(ending) >= r2:
+            tail = tail[:-len(ending)]
+            break
+
+    if tail.endswith('нн'):
+        tail = tail[:-1]
+    else:
+        tail, found = _strip(tail, ((SUPERLATIVE, False),))
+        if found:
+            if tail.endswith('нн'):
+                tail = tail[:-1]
+        elif tail.endswith('ь'):
+            tail = tail[:-1]
+    return head + tail
+
+
+def tokenize(text):
+    for word in WORD_RE.findall(text.lower()):
+        if word in STOP_WORDS:
+            continue
+        yield (stem(word) if CYRILLIC_RE.search(word) else word)[:64]
+
+
+def fill_search_index(apps, schema_editor):
+    """Индексирует посты и комментарии, написанные до появления поиска.
+
+    Индекс выбирается так же, как в search.get_index: FTS5, если её
+    таблица есть, иначе posts_search_term.
+    """
+    Post = apps.get_model('posts', 'Post')
+    Comment = apps.get_model('posts', 'Comment')
+    SearchTerm = apps.get_model('posts', 'SearchTerm')
+    connection = schema_editor.connection
+    backend = settings.SEARCH_BACKEND
+    if backend == 'auto':
+        backend = ('fts5' if connection.vendor == 'sqlite' and FTS_TABLE
+                   in connection.introspection.table_names() else 'python')
+
+    def write(batch):
+        comments = defaultdict(list)
+        for post_id, text in Comment.objects.filter(
+                post_id__in=[pk for pk, _ in batch]).values_list(
+                'post_id', 'text'):
+            comments[post_id].append(text)
+        for post_id, text in batch:
+            tokens = list(tokenize(' '.join([text, *comments[post_id]])))
+            if backend == 'fts5':
+                schema_editor.execute(
+                    f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [post_id])
+                if tokens:
+                    schema_editor.execute(
+                        f'INSERT INTO {FTS_TABLE} (rowid, body) '
+                        f'VALUES (%s, %s)', [post_id, ' '.join(tokens)])
+                continue
+            SearchTerm.objects.filter(post_id=post_id).delete()
+            SearchTerm.objects.bulk_create(
+                SearchTerm(term=term, post_id=post_id, count=count)
+                for term, count in Counter(tokens).items())
+
+    batch = []
+    for row in Post.objects.order_by('pk').values_list(
+            'pk', 'text').iterator():
+        batch.append(row)
+        if len(batch) == BATCH:
+            write(batch)
+            batch = []
+    write(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0033_fill_timelines'),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_search_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 2.2.6 on 2026-10-18 18:31
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def mark_popular_authors(apps, schema_editor):
+    """Отмечает авторов, чьи посты не раскладывались по лентам.
+
+    До этой миграции популярность считалась по текущему числу
+    подписчиков, поэтому у авторов, которые успели перестать быть
+    популярными, в лентах пропуски: ленты их подписчиков дозаполняются.
+    """
+    Follow = apps.get_model('posts', 'Follow')
+    Post = apps.get_model('posts', 'Post')
+    Timeline = apps.get_model('posts', 'Timeline')
+    PopularAuthor = apps.get_model('posts', 'PopularAuthor')
+    popular = Follow.objects.values('author').order_by().annotate(
+        followers=models.Count('pk')).filter(
+        followers__gt=settings.FOLLOW_TIMELINE_FANOUT_LIMIT).values_list(
+        'author', flat=True)
+    PopularAuthor.objects.bulk_create(
+        PopularAuthor(author_id=author_id) for author_id in popular)
+    follows = Follow.objects.exclude(author__in=popular).order_by(
+        'pk').values_list('user_id', 'author_id')
+    for user_id, author_id in follows.iterator():
+        posts = Post.objects.filter(author_id=author_id).values_list(
+            'pk', 'pub_date')
+        Timeline.objects.bulk_create(
+            (Timeline(user_id=user_id, post_id=post_id, author_id=author_id,
+                      pub_date=pub_date)
+             for post_id, pub_date in posts.iterator()),
+            settings.FOLLOW_TIMELINE_BATCH, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0011_update_proxy_permissions'),
+        ('posts', '0034_fill_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PopularAuthor',
+            fields=[
+                ('author', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='+', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='автор')),
+                ('since', models.DateTimeField(auto_now_add=True, verbose_name='с какого момента')),
+            ],
+            options={
+                'verbose_name': 'popular author',
+                'verbose_name_plural': 'Авторы без раскладки по лентам',
+                'db_table': 'posts_popular_author',
+            },
+        ),
+        migrations.RunPython(mark_popular_authors,
+                             migrations.RunPython.noop),
+    ]
@@ -2,6 +2,9 @@ import textwrap
 
 from django.contrib.auth import get_user_model
 from django.db import models
+from django.utils import timezone
+
+from .storage import media_storage
 
 User = get_user_model()
 
@@ -32,10 +35,28 @@ class Group(models.Model):
         verbose_name_plural = 'Группа'
 
 
+class PostQuerySet(models.QuerySet):
+    def feed(self):
+        """Посты для ленты: автор и группа приходят в том же запросе.
+
+        Число комментариев уже лежит в Post.comments_count, поэтому
+        карточке не нужны ни отдельные запросы, ни GROUP BY.
+        """
+        return self.select_related('author', 'group')
+
+
 class Post(models.Model):
     """Публикация пользователя."""
 
-    image = models.ImageField(upload_to='posts/', blank=True, null=True)
+    # Имя файла — хеш содержимого, индекс нужен thumbnails.release.
+    image = models.ImageField(upload_to='posts/', storage=media_storage,
+                              blank=True, null=True, db_index=True)
+    image_variants = models.TextField(
+        'варианты изображения',
+        blank=True,
+        default='',
+        editable=False,
+        help_text='JSON с шириной, форматом и файлом каждого варианта.')
 
     text = models.TextField(
         'сообщение',
@@ -60,6 +81,13 @@ class Post(models.Model):
         verbose_name='группа',
         help_text='Группа сообщений.',
         related_name='group_posts')
+    comments_count = models.PositiveIntegerField(
+        'комментариев',
+        default=0,
+        editable=False,
+        help_text='Счётчик комментариев, ведётся сигналами.')
+
+    objects = PostQuerySet.as_manager()
 
     def __str__(self):
         return [f'author: {self.author}, '
@@ -67,11 +95,29 @@ class Post(models.Model):
                 f'pub_date: {self.pub_date}, '
                 f'text: {textwrap.wrap(self.text[:15])}']
 
+    # Поля, которые пишутся только через update(): счётчик — через F(),
+    # варианты — из variants.generate, пока пост может быть открыт
+    # на редактирование. Сохранение поста их не перезаписывает.
+    BACKGROUND_FIELDS = ('comments_count', 'image_variants')
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and not kwargs.get('update_fields'):
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in self.BACKGROUND_FIELDS]
+        super().save(*args, **kwargs)
+
     class Meta:
         db_table = 'posts_post'
         ordering = ('-pub_date',)
         verbose_name = 'post'
         verbose_name_plural = 'Посты'
+        indexes = [
+            models.Index(fields=('group', '-pub_date', '-id'),
+                         name='post_group_pub_date'),
+            models.Index(fields=('author', '-pub_date', '-id'),
+                         name='post_author_pub_date')]
 
 
 class Comment(models.Model):
@@ -107,6 +153,9 @@ class Comment(models.Model):
         verbose_name = 'comment'
         ordering = ('-created',)
         verbose_name_plural = 'Комментарий'
+        indexes = [
+            models.Index(fields=('post', '-created', '-id'),
+                         name='comment_post_created')]
 
 
 class Follow(models.Model):
@@ -132,3 +181,232 @@ class Follow(models.Model):
         verbose_name = 'follow'
         ordering = ('-author',)
         verbose_name_plural = 'Подписки'
+        constraints = [
+            models.UniqueConstraint(fields=('user', 'author'),
+                                    name='follow_user_author')]
+
+
+class Timeline(models.Model):
+    """Запись в готовой ленте подписок пользователя."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        verbose_name='подписчик',
+        help_text='Владелец ленты.',
+        related_name='timeline')
+    post = models.ForeignKey(
+        'Post',
+        on_delete=models.CASCADE,
+        verbose_name='пост',
+        help_text='Сообщение в ленте.',
+        related_name='timeline')
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        verbose_name='автор',
+        help_text='Автор сообщения, нужен для отписки.',
+        related_name='+')
+    pub_date = models.DateTimeField(
+        'дата публикации',
+        help_text='Копия Post.pub_date для сортировки по индексу.')
+
+    def __str__(self):
+        return f'user: {self.user_id}, post: {self.post_id}'
+
+    class Meta:
+        db_table = 'posts_timeline'
+        verbose_name = 'timeline'
+        verbose_name_plural = 'Ленты подписок'
+        constraints = [
+            models.UniqueConstraint(fields=('user', 'post'),
+                                    name='timeline_user_post')]
+        indexes = [
+            models.Index(fields=('user', '-pub_date', '-post'),
+                         name='timeline_user_pub_date'),
+            models.Index(fields=('user', 'author'),
+                         name='timeline_user_author')]
+
+
+class PopularAuthor(models.Model):
+    """Автор, чьи посты читаются при запросе, а не лежат в лентах.
+
+    Отметка ставится, когда подписчиков больше
+    FOLLOW_TIMELINE_FANOUT_LIMIT, и сама не снимается: посты за это
+    время не разложены по лентам. Снимает её rebuild_timelines.
+    """
+    author = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        verbose_name='автор',
+        related_name='+')
+    since = models.DateTimeField('с какого момента', auto_now_add=True)
+
+    def __str__(self):
+        return f'author: {self.author_id}'
+
+    class Meta:
+        db_table = 'posts_popular_author'
+        verbose_name = 'popular author'
+        verbose_name_plural = 'Авторы без раскладки по лентам'
+
+
+class UserStatsManager(models.Manager):
+    def for_user(self, user):
+        """Счётчики пользователя, при первом обращении считаются с нуля."""
+        try:
+            return self.get(user=user)
+        except self.model.DoesNotExist:
+            stats, _ = self.get_or_create(user=user, defaults={
+                'posts': Post.objects.filter(author=user).count(),
+                'followers': Follow.objects.filter(author=user).count(),
+                'following': Follow.objects.filter(user=user).count()})
+            return stats
+
+
+class UserStats(models.Model):
+    """Счётчики для карточки пользователя."""
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        verbose_name='пользователь',
+        related_name='stats')
+    posts = models.PositiveIntegerField('записей', default=0)
+    followers = models.PositiveIntegerField('подписчиков', default=0)
+    following = models.PositiveIntegerField('подписок', default=0)
+
+    objects = UserStatsManager()
+
+    def __str__(self):
+        return (f'user: {self.user_id}, posts: {self.posts}, '
+                f'followers: {self.followers}, following: {self.following}')
+
+    class Meta:
+        db_table = 'posts_user_stats'
+        verbose_name = 'user stats'
+        verbose_name_plural = 'Счётчики пользователей'
+
+
+class SearchTerm(models.Model):
+    """Постинг обратного индекса поиска: основа слова в посте."""
+    term = models.CharField('основа слова', max_length=64)
+    post = models.ForeignKey(
+        'Post',
+        on_delete=models.CASCADE,
+        verbose_name='пост',
+        related_name='+')
+    count = models.PositiveIntegerField('вхождений', default=1)
+
+    def __str__(self):
+        return f'term: {self.term}, post: {self.post_id}'
+
+    class Meta:
+        db_table = 'posts_search_term'
+        verbose_name = 'search term'
+        verbose_name_plural = 'Поисковый индекс'
+        constraints = [
+            models.UniqueConstraint(fields=('term', 'post'),
+                                    name='search_term_post')]
+
+
+class Task(models.Model):
+    """Фоновая задача: побочный эффект записи для run_tasks."""
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    FAILED = 'failed'
+    STATUSES = (
+        (QUEUED, 'в очереди'),
+        (RUNNING, 'выполняется'),
+        (FAILED, 'не выполнена'),
+    )
+    name = models.CharField('задача', max_length=100)
+    args = models.TextField(
+        'аргументы',
+        help_text='Позиционные аргументы задачи в JSON.')
+    status = models.CharField(
+        'состояние', max_length=10, choices=STATUSES, default=QUEUED)
+    attempts = models.PositiveIntegerField('попыток', default=0)
+    run_at = models.DateTimeField('запустить не раньше', default=timezone.now)
+    locked_until = models.DateTimeField(
+        'аренда до',
+        null=True,
+        blank=True,
+        help_text='После этого времени задачу может забрать '
+                  'другой обработчик.')
+    worker = models.CharField('обработчик', max_length=64, blank=True)
+    error = models.TextField('последняя ошибка', blank=True)
+    created = models.DateTimeField('создана', auto_now_add=True)
+
+    def __str__(self):
+        return f'{self.name} #{self.pk}: {self.status}'
+
+    class Meta:
+        db_table = 'posts_task'
+        verbose_name = 'task'
+        verbose_name_plural = 'Фоновые задачи'
+        indexes = [
+            models.Index(fields=('status', 'run_at'),
+                         name='task_status_run_at')]
+
+
+class TrendingPost(models.Model):
+    """Рейтинг поста для ленты популярного, ведёт posts.trending."""
+    post = models.OneToOneField(
+        'Post',
+        on_delete=models.CASCADE,
+        primary_key=True,
+        verbose_name='пост',
+        related_name='trending')
+    score = models.FloatField(
+        'рейтинг',
+        help_text='Логарифм суммы весов событий, приведённых к '
+                  'posts.trending.EPOCH.')
+
+    def __str__(self):
+        return f'post: {self.post_id}, score: {self.score:.3f}'
+
+    class Meta:
+        db_table = 'posts_trending_post'
+        verbose_name = 'trending post'
+        verbose_name_plural = 'Популярные посты'
+        indexes = [
+            models.Index(fields=('-score',), name='trending_post_score')]
+
+
+class TrendingGroup(models.Model):
+    """Рейтинг группы по активности в её постах."""
+    group = models.OneToOneField(
+        'Group',
+        on_delete=models.CASCADE,
+        primary_key=True,
+        verbose_name='группа',
+        related_name='trending')
+    score = models.FloatField(
+        'рейтинг',
+        help_text='Логарифм суммы весов событий, приведённых к '
+                  'posts.trending.EPOCH.')
+
+    def __str__(self):
+        return f'group: {self.group_id}, score: {self.score:.3f}'
+
+    class Meta:
+        db_table = 'posts_trending_group'
+        verbose_name = 'trending group'
+        verbose_name_plural = 'Популярные группы'
+        indexes = [
+            models.Index(fields=('-score',), name='trending_group_score')]
+
+
+class TrendingMark(models.Model):
+    """До какого id события источника уже учтены в рейтинге."""
+    source = models.CharField('источник', max_length=16, primary_key=True)
+    last_id = models.PositiveIntegerField('последний id', default=0)
+
+    def __str__(self):
+        return f'{self.source}: {self.last_id}'
+
+    class Meta:
+        db_table = 'posts_trending_mark'
+        verbose_name = 'trending mark'
+        verbose_name_plural = 'Отметки рейтинга'
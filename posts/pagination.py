@@ -0,0 +1,134 @@
+import base64
+import binascii
+import json
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+
+def pack(*values):
+    """Упаковывает значения ключа в непрозрачную строку для URL."""
+    raw = json.dumps(values)
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def unpack(cursor):
+    """Распаковывает строку из pack, для испорченной возвращает None."""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded))
+    except (binascii.Error, ValueError, TypeError):
+        return None
+    return values if isinstance(values, list) else None
+
+
+def encode_cursor(value, pk, reverse=False):
+    """Упаковывает ключ записи (дата, id) в непрозрачную строку."""
+    return pack(value.isoformat(), pk, int(reverse))
+
+
+def decode_cursor(cursor):
+    """Распаковывает курсор, для испорченного курсора возвращает None."""
+    try:
+        value, pk, reverse = unpack(cursor)
+        value = parse_datetime(value)
+    except (ValueError, TypeError):
+        return None
+    if value is None or not isinstance(pk, int):
+        return None
+    return value, pk, bool(reverse)
+
+
+class CursorPage:
+    """Страница курсорной пагинации.
+
+    Повторяет интерфейс django.core.paginator.Page, который нужен
+    шаблонам, но не знает ни номера страницы, ни общего числа записей.
+    """
+    is_cursor = True
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return f'<CursorPage of {len(self)} objects>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class CursorPaginator:
+    """Пагинация по ключу (field, id) в порядке убывания.
+
+    Каждая страница — один запрос с LIMIT per_page + 1 по индексу
+    на field, без COUNT(*) и OFFSET, поэтому стоимость страницы
+    не зависит от её глубины.
+    """
+
+    def __init__(self, object_list, per_page, field='pub_date'):
+        self.object_list = object_list
+        self.per_page = int(per_page)
+        self.field = field
+
+    def _after(self, value, pk):
+        """Записи, которые идут в ленте после ключа."""
+        return self.object_list.filter(
+            **{f'{self.field}__lte': value}).filter(
+            Q(**{f'{self.field}__lt': value}) | Q(id__lt=pk)).order_by(
+            f'-{self.field}', '-id')
+
+    def _before(self, value, pk):
+        """Записи, которые идут в ленте перед ключом (в обратном порядке)."""
+        return self.object_list.filter(
+            **{f'{self.field}__gte': value}).filter(
+            Q(**{f'{self.field}__gt': value}) | Q(id__gt=pk)).order_by(
+            self.field, 'id')
+
+    def _cursor(self, obj, reverse=False):
+        return encode_cursor(getattr(obj, self.field), obj.pk, reverse)
+
+    def get_page(self, cursor=None):
+        """Возвращает страницу по курсору, испорченный курсор — первая."""
+        key = decode_cursor(cursor)
+        if key is not None and key[2]:
+            items = list(self._before(*key[:2])[:self.per_page + 1])
+            if items:
+                has_previous = len(items) > self.per_page
+                items = items[:self.per_page][::-1]
+                return CursorPage(
+                    items,
+                    next_cursor=self._cursor(items[-1]),
+                    previous_cursor=(self._cursor(items[0], reverse=True)
+                                     if has_previous else None))
+            key = None
+        if key is None:
+            queryset = self.object_list.order_by(f'-{self.field}', '-id')
+        else:
+            queryset = self._after(*key[:2])
+        items = list(queryset[:self.per_page + 1])
+        has_next = len(items) > self.per_page
+        items = items[:self.per_page]
+        return CursorPage(
+            items,
+            next_cursor=self._cursor(items[-1]) if has_next else None,
+            previous_cursor=(self._cursor(items[0], reverse=True)
+                             if key is not None and items else None))
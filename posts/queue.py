@@ -0,0 +1,148 @@
+"""Очередь фоновых задач в таблице posts_task.
+
+Задача ставится в той же транзакции, что и запись, которая её
+породила: откат убирает и задачу. run_tasks забирает задачи по числу
+свободных потоков с арендой на TASKS_LEASE секунд, и задачу упавшего
+обработчика после конца аренды забирает другой. Поэтому задача может
+выполниться дважды и должна быть идемпотентной. Неудачная попытка
+повторяется с удваивающейся паузой, пока не кончатся попытки.
+
+При TASKS_EAGER задача выполняется в процессе после фиксации
+транзакции, без повторов; её ошибка только пишется в лог.
+"""
+import datetime as dt
+import json
+import logging
+import os
+import socket
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+REGISTRY = {}
+
+
+def task(name, max_attempts=None):
+    """Декоратор: регистрирует функцию как задачу с именем name."""
+    def decorator(func):
+        REGISTRY[name] = (func, max_attempts)
+        return func
+    return decorator
+
+
+def _run_eager(name, args):
+    try:
+        REGISTRY[name][0](*args)
+    except Exception:
+        logger.exception('Задача %s упала', name)
+
+
+def enqueue(name, *args):
+    """Ставит задачу name(*args); аргументы должны укладываться в JSON."""
+    if name not in REGISTRY:
+        raise LookupError(f'Неизвестная задача: {name}')
+    if settings.TASKS_EAGER:
+        transaction.on_commit(lambda: _run_eager(name, args))
+        return None
+    return Task.objects.create(name=name, args=json.dumps(args))
+
+
+def _ready(now):
+    return (Q(status=Task.QUEUED, run_at__lte=now)
+            | Q(status=Task.RUNNING, locked_until__lt=now))
+
+
+def _lease(now):
+    return now + dt.timedelta(seconds=settings.TASKS_LEASE)
+
+
+def claim(worker, limit):
+    """Забирает до limit готовых задач под аренду обработчика worker."""
+    now = timezone.now()
+    ids = list(Task.objects.filter(_ready(now)).order_by(
+        'run_at', 'pk').values_list('pk', flat=True)[:limit])
+    # Условие повторяется в UPDATE: задачу, которую успел забрать
+    # другой обработчик, этот уже не перезапишет.
+    Task.objects.filter(_ready(now), pk__in=ids).update(
+        status=Task.RUNNING, worker=worker, attempts=F('attempts') + 1,
+        locked_until=_lease(now))
+    return list(Task.objects.filter(pk__in=ids, worker=worker,
+                                    status=Task.RUNNING).order_by('pk'))
+
+
+def execute(job):
+    """Выполняет задачу; True, если она удалась и убрана из очереди.
+
+    Аренда продлевается в начале выполнения. Если задачу уже забрал
+    другой обработчик, она не выполняется и возвращается None.
+    """
+    close_old_connections()
+    mine = Task.objects.filter(pk=job.pk, worker=job.worker)
+    if not mine.filter(status=Task.RUNNING).update(
+            locked_until=_lease(timezone.now())):
+        return None
+    try:
+        func, max_attempts = REGISTRY[job.name]
+        # Задача и её удаление из очереди фиксируются вместе.
+        with transaction.atomic():
+            func(*json.loads(job.args))
+            mine.delete()
+        return True
+    except Exception as exc:
+        logger.exception('Задача %s #%s упала', job.name, job.pk)
+        if job.name in REGISTRY and job.attempts < (
+                max_attempts or settings.TASKS_MAX_ATTEMPTS):
+            delay = settings.TASKS_RETRY_DELAY * 2 ** (job.attempts - 1)
+            mine.update(status=Task.QUEUED, locked_until=None,
+                        error=repr(exc),
+                        run_at=timezone.now() + dt.timedelta(
+                            seconds=delay))
+        else:
+            mine.update(status=Task.FAILED, locked_until=None,
+                        error=repr(exc))
+        return False
+    finally:
+        close_old_connections()
+
+
+def run(workers=4, batch=100, once=False, poll=1.0):
+    """Цикл обработчика: выполняет задачи в пуле из workers потоков.
+
+    Задач забирается не больше, чем свободных потоков (и не больше
+    batch): забранная задача сразу уходит в работу, и её аренда
+    не истекает, пока задача ждёт очереди в пуле. С once выходит,
+    когда готовых задач не осталось; возвращает число удавшихся
+    и упавших задач.
+    """
+    worker = (f'{socket.gethostname()[:40]}:{os.getpid()}:'
+              f'{uuid.uuid4().hex[:8]}')
+    counts = {'done': 0, 'failed': 0}
+    limit = max(min(workers, batch), 1)
+    active = set()
+    with ThreadPoolExecutor(workers, thread_name_prefix='task') as pool:
+        while True:
+            if len(active) < limit:
+                active.update(pool.submit(execute, job) for job in
+                              claim(worker, limit - len(active)))
+            if not active:
+                if once:
+                    return counts
+                time.sleep(poll)
+                continue
+            # Пока есть свободные потоки, очередь проверяется раз в poll.
+            done, active = wait(
+                active, None if len(active) >= limit else poll,
+                FIRST_COMPLETED)
+            for future in done:
+                ok = future.result()
+                if ok is not None:
+                    counts['done' if ok else 'failed'] += 1
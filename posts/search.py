@@ -0,0 +1,200 @@
+import heapq
+import math
+import re
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import connection
+
+from .models import Comment, Post, SearchTerm
+from .pagination import CursorPage, pack, unpack
+from .stemmer import stem
+
+FTS_TABLE = 'posts_search_fts'
+WORD_RE = re.compile(r'\w+')
+CYRILLIC_RE = re.compile('[а-яё]')
+STOP_WORDS = frozenset((
+    'а', 'без', 'бы', 'в', 'во', 'вот', 'все', 'вы', 'да', 'для', 'до',
+    'его', 'ее', 'её', 'если', 'есть', 'же', 'за', 'и', 'из', 'или', 'их',
+    'к', 'как', 'ко', 'ли', 'мы', 'на', 'не', 'нет', 'ни', 'но', 'о', 'об',
+    'он', 'она', 'они', 'от', 'по', 'при', 'с', 'со', 'так', 'то', 'ты',
+    'у', 'уже', 'что', 'это', 'я'))
+
+
+def tokenize(text):
+    """Слова текста, приведённые к основам; стоп-слова отброшены."""
+    for word in WORD_RE.findall(text.lower()):
+        if word in STOP_WORDS:
+            continue
+        yield (stem(word) if CYRILLIC_RE.search(word) else word)[:64]
+
+
+class FTS5Index:
+    """Индекс на виртуальной таблице SQLite FTS5.
+
+    В таблицу пишутся уже выделенные основы слов, поэтому FTS5
+    с токенайзером unicode61 ищет с учётом русской морфологии.
+    """
+    _tables = {}
+
+    @classmethod
+    def available(cls):
+        if connection.vendor != 'sqlite':
+            return False
+        name = connection.settings_dict['NAME']
+        if name not in cls._tables:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    'SELECT 1 FROM sqlite_master WHERE name = %s',
+                    [FTS_TABLE])
+                cls._tables[name] = cursor.fetchone() is not None
+        return cls._tables[name]
+
+    def update(self, post_id, tokens):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s',
+                           [post_id])
+            if tokens:
+                cursor.execute(
+                    f'INSERT INTO {FTS_TABLE} (rowid, body) VALUES (%s, %s)',
+                    [post_id, ' '.join(tokens)])
+
+    def delete(self, post_id):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s',
+                           [post_id])
+
+    def clear(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE}')
+
+    def search(self, terms, after, limit):
+        """Пары (score, id) по возрастанию bm25: меньше — точнее."""
+        match = ' '.join('"{}"'.format(term.replace('"', '""'))
+                         for term in terms)
+        sql = (f'SELECT score, id FROM (SELECT bm25({FTS_TABLE}) AS score, '
+               f'rowid AS id FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s)')
+        params = [match]
+        if after is not None:
+            sql += ' WHERE score > %s OR (score = %s AND id > %s)'
+            params += [after[0], after[0], after[1]]
+        sql += ' ORDER BY score, id LIMIT %s'
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params + [limit])
+            return [tuple(row) for row in cursor.fetchall()]
+
+
+class PythonIndex:
+    """Обратный индекс в таблице posts_search_term, ранжирование TF-IDF.
+
+    Работает на любой базе; счёт отрицательный, чтобы порядок
+    совпадал с bm25 из FTS5.
+    """
+
+    def update(self, post_id, tokens):
+        SearchTerm.objects.filter(post_id=post_id).delete()
+        SearchTerm.objects.bulk_create(
+            SearchTerm(term=term, post_id=post_id, count=count)
+            for term, count in Counter(tokens).items())
+
+    def delete(self, post_id):
+        SearchTerm.objects.filter(post_id=post_id).delete()
+
+    def clear(self):
+        SearchTerm.objects.all().delete()
+
+    def search(self, terms, after, limit):
+        postings = SearchTerm.objects.filter(term__in=terms).values_list(
+            'term', 'post_id', 'count')
+        frequency = Counter()
+        documents = defaultdict(dict)
+        for term, post_id, count in postings.iterator():
+            frequency[term] += 1
+            documents[post_id][term] = count
+        total = max(Post.objects.count(), 1)
+        hits = []
+        for post_id, counts in documents.items():
+            if len(counts) < len(terms):
+                continue
+            score = -sum(count / (count + 1.2)
+                         * math.log(1 + total / frequency[term])
+                         for term, count in counts.items())
+            if after is None or (score, post_id) > tuple(after):
+                hits.append((score, post_id))
+        return heapq.nsmallest(limit, hits)
+
+
+def get_index():
+    backend = settings.SEARCH_BACKEND
+    if backend == 'auto':
+        backend = 'fts5' if FTS5Index.available() else 'python'
+    return FTS5Index() if backend == 'fts5' else PythonIndex()
+
+
+def _post_tokens(text, comments):
+    return list(tokenize(' '.join([text, *comments])))
+
+
+def index_post(post_id):
+    """Переиндексирует пост вместе с комментариями."""
+    text = Post.objects.filter(pk=post_id).values_list(
+        'text', flat=True).first()
+    if text is None:
+        get_index().delete(post_id)
+        return
+    comments = Comment.objects.filter(post_id=post_id).values_list(
+        'text', flat=True)
+    get_index().update(post_id, _post_tokens(text, comments))
+
+
+def remove_post(post_id):
+    get_index().delete(post_id)
+
+
+def rebuild(batch_size=500):
+    """Строит индекс заново, возвращает число проиндексированных постов."""
+    index = get_index()
+    index.clear()
+    posts = Post.objects.order_by('pk').values_list('pk', 'text')
+    total = 0
+    batch = []
+    for row in posts.iterator():
+        batch.append(row)
+        if len(batch) == batch_size:
+            total += _index_batch(index, batch)
+            batch = []
+    return total + _index_batch(index, batch)
+
+
+def _index_batch(index, batch):
+    comments = defaultdict(list)
+    for post_id, text in Comment.objects.filter(
+            post_id__in=[pk for pk, _ in batch]).values_list('post_id',
+                                                             'text'):
+        comments[post_id].append(text)
+    for post_id, text in batch:
+        index.update(post_id, _post_tokens(text, comments[post_id]))
+    return len(batch)
+
+
+def _after(cursor):
+    values = unpack(cursor)
+    if (values and len(values) == 2
+            and isinstance(values[0], (int, float))
+            and isinstance(values[1], int)):
+        return values
+    return None
+
+
+def search_posts(query, cursor=None, per_page=settings.COUNT_PAGE):
+    """Страница результатов поиска по релевантности с курсором."""
+    terms = sorted(set(tokenize(query)))
+    if not terms:
+        return CursorPage([])
+    hits = get_index().search(terms, _after(cursor), per_page + 1)
+    has_next = len(hits) > per_page
+    hits = hits[:per_page]
+    posts = Post.objects.feed().in_bulk([post_id for _, post_id in hits])
+    return CursorPage(
+        [posts[post_id] for _, post_id in hits if post_id in posts],
+        next_cursor=pack(*hits[-1]) if has_next else None)
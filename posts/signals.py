@@ -0,0 +1,95 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import (cards, conditional, counters, follow_graph, queue, search,
+               thumbnails, timeline, variants)
+from .models import Comment, Follow, Group, Post, User
+
+
+def _touch_comment(comment):
+    try:
+        conditional.touch_post(comment.post)
+    except Post.DoesNotExist:
+        # Комментарий удаляется вместе с постом: метки сдвинет пост.
+        pass
+
+
+@receiver(post_save, sender=Post)
+def post_created(sender, instance, created, **kwargs):
+    cards.bump('post', instance.pk)
+    queue.enqueue('search.index_post', instance.pk)
+    if not created:
+        # Пост могли перенести в другую группу, старая неизвестна.
+        conditional.touch('site', f'post:{instance.pk}')
+        return
+    conditional.touch_post(instance)
+    counters.add_user(instance.author_id, 'posts', 1)
+    if settings.FOLLOW_TIMELINE:
+        queue.enqueue('timeline.fan_out', instance.pk)
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    cards.bump('post', instance.pk)
+    conditional.touch_post(instance)
+    counters.add_user(instance.author_id, 'posts', -1)
+    search.remove_post(instance.pk)
+    thumbnails.release_on_commit(instance.image.name, variants.files(instance))
+
+
+@receiver(post_save, sender=Comment)
+def comment_created(sender, instance, created, **kwargs):
+    cards.bump('post', instance.post_id)
+    _touch_comment(instance)
+    if created:
+        counters.add_comments(instance.post_id, 1)
+    # Пост индексируется целиком: повтор задачи или гонка с другой
+    # задачей того же поста не исказят индекс.
+    queue.enqueue('search.index_post', instance.post_id)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    cards.bump('post', instance.post_id)
+    counters.add_comments(instance.post_id, -1)
+    _touch_comment(instance)
+    queue.enqueue('search.index_post', instance.post_id)
+
+
+@receiver(post_save, sender=Follow)
+def follow_created(sender, instance, created, **kwargs):
+    if not created:
+        return
+    counters.add_user(instance.author_id, 'followers', 1)
+    counters.add_user(instance.user_id, 'following', 1)
+    transaction.on_commit(lambda: follow_graph.followed(
+        instance.user_id, instance.author_id))
+    if settings.FOLLOW_TIMELINE:
+        queue.enqueue('timeline.backfill', instance.user_id,
+                      instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    counters.add_user(instance.author_id, 'followers', -1)
+    counters.add_user(instance.user_id, 'following', -1)
+    transaction.on_commit(lambda: follow_graph.unfollowed(
+        instance.user_id, instance.author_id))
+    timeline.drop(instance)
+
+
+@receiver(post_save, sender=User)
+def author_changed(sender, instance, update_fields=None, **kwargs):
+    # Вход на сайт обновляет только last_login, карточки он не меняет.
+    if update_fields and set(update_fields) == {'last_login'}:
+        return
+    cards.bump('author', instance.pk)
+    conditional.touch('site')
+
+
+@receiver(post_save, sender=Group)
+def group_changed(sender, instance, **kwargs):
+    cards.bump('group', instance.pk)
+    conditional.touch('site')
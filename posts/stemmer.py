@@ -0,0 +1,101 @@
+"""Стеммер Портера (Snowball) для русского языка."""
+
+VOWELS = 'аеиоуыэюя'
+
+PERFECTIVE_GERUND = (
+    (('в', 'вши', 'вшись'), True),
+    (('ив', 'ивши', 'ившись', 'ыв', 'ывши', 'ывшись'), False),
+)
+ADJECTIVE = ((
+    ('ее', 'ие', 'ые', 'ое', 'ими', 'ыми', 'ей', 'ий', 'ый', 'ой', 'ем',
+     'им', 'ым', 'ом', 'его', 'ого', 'ему', 'ому', 'их', 'ых', 'ую', 'юю',
+     'ая', 'яя', 'ою', 'ею'), False),
+)
+PARTICIPLE = (
+    (('ем', 'нн', 'вш', 'ющ', 'щ'), True),
+    (('ивш', 'ывш', 'ующ'), False),
+)
+REFLEXIVE = ((('ся', 'сь'), False),)
+VERB = (
+    (('ла', 'на', 'ете', 'йте', 'ли', 'й', 'л', 'ем', 'н', 'ло', 'но',
+      'ет', 'ют', 'ны', 'ть', 'ешь', 'нно'), True),
+    (('ила', 'ыла', 'ена', 'ейте', 'уйте', 'ите', 'или', 'ыли', 'ей',
+      'уй', 'ил', 'ыл', 'им', 'ым', 'ен', 'ило', 'ыло', 'ено', 'ят', 'ует',
+      'уют', 'ит', 'ыт', 'ены', 'ить', 'ыть', 'ишь', 'ую', 'ю'), False),
+)
+NOUN = ((
+    ('а', 'ев', 'ов', 'ие', 'ье', 'е', 'иями', 'ями', 'ами', 'еи', 'ии',
+     'и', 'ией', 'ей', 'ой', 'ий', 'й', 'иям', 'ям', 'ием', 'ем', 'ам',
+     'ом', 'о', 'у', 'ах', 'иях', 'ях', 'ы', 'ь', 'ию', 'ью', 'ю', 'ия',
+     'ья', 'я'), False),
+)
+DERIVATIONAL = ('ость', 'ост')
+SUPERLATIVE = ('ейше', 'ейш')
+
+
+def _after_vc(word, start):
+    """Позиция после первой пары «гласная + согласная» начиная со start."""
+    for index in range(start + 1, len(word)):
+        if word[index] not in VOWELS and word[index - 1] in VOWELS:
+            return index + 1
+    return len(word)
+
+
+def _strip(word, groups):
+    """Отрезает самое длинное окончание из групп.
+
+    Окончания первой группы считаются только после «а» или «я».
+    """
+    best = ''
+    for endings, after_a in groups:
+        for ending in endings:
+            if (len(ending) > len(best) and word.endswith(ending)
+                    and (not after_a
+                         or word[:-len(ending)].endswith(('а', 'я')))):
+                best = ending
+    if best:
+        return word[:-len(best)], True
+    return word, False
+
+
+def _strip_inflection(tail):
+    """Шаг 1: деепричастие или возвратность, затем части речи."""
+    tail, found = _strip(tail, PERFECTIVE_GERUND)
+    if found:
+        return tail
+    tail, _ = _strip(tail, REFLEXIVE)
+    tail, found = _strip(tail, ADJECTIVE)
+    if found:
+        return _strip(tail, PARTICIPLE)[0]
+    tail, found = _strip(tail, VERB)
+    if found:
+        return tail
+    return _strip(tail, NOUN)[0]
+
+
+def stem(word):
+    """Основа русского слова в нижнем регистре."""
+    word = word.lower().replace('ё', 'е')
+    rv = next((index + 1 for index, char in enumerate(word)
+               if char in VOWELS), len(word))
+    r2 = _after_vc(word, _after_vc(word, 0))
+    head, tail = word[:rv], _strip_inflection(word[rv:])
+
+    if tail.endswith('и'):
+        tail = tail[:-1]
+
+    for ending in DERIVATIONAL:
+        if tail.endswith(ending) and rv + len(tail) - len(ending) >= r2:
+            tail = tail[:-len(ending)]
+            break
+
+    if tail.endswith('нн'):
+        tail = tail[:-1]
+    else:
+        tail, found = _strip(tail, ((SUPERLATIVE, False),))
+        if found:
+            if tail.endswith('нн'):
+                tail = tail[:-1]
+        elif tail.endswith('ь'):
+            tail = tail[:-1]
+    return head + tail
@@ -0,0 +1,109 @@
+"""Хранилище картинок постов с именами по содержимому.
+
+Файл сохраняется как posts/<2 знака>/<sha256><расширение>: одинаковые
+загрузки разных постов делят один физический файл, а вместе с ним
+миниатюру sorl и адаптивные варианты, ведь они ключуются по имени.
+Содержимое по такому имени никогда не меняется, поэтому его можно
+отдавать с Cache-Control immutable.
+"""
+import hashlib
+import os
+import re
+import tempfile
+
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+# Пути под MEDIA_ROOT, чьё содержимое не меняется: исходники по хешу,
+# их варианты и миниатюры sorl, имя которых — хеш исходника и геометрии.
+IMMUTABLE = re.compile(
+    r'^(posts/[0-9a-f]{2}/[0-9a-f]{64}'
+    r'|posts/variants/[0-9a-f]{64}-\d+'
+    r'|cache/[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{32})\.\w+$')
+TEMP_SUFFIX = '.part'
+
+
+def content_name(directory, digest, name):
+    """Имя файла по хешу содержимого с расширением исходного имени."""
+    ext = os.path.splitext(name)[1].lower()
+    return f'{directory}/{digest[:2]}/{digest}{ext}'
+
+
+def save_fixed(storage, name, content):
+    """Сохраняет content в FileSystemStorage ровно под именем name.
+
+    Для файлов, чьё имя выводится из хеша исходника (варианты):
+    суффиксы get_available_name сломали бы «один набор на хеш».
+    Готовый файл не переписывается, новый пишется через *.part
+    и os.replace, так что параллельная запись того же файла безопасна.
+    """
+    path = storage.path(name)
+    if os.path.exists(path):
+        return name
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, temp = tempfile.mkstemp(suffix=TEMP_SUFFIX, dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as output:
+            for chunk in content.chunks():
+                output.write(chunk)
+        os.chmod(temp, storage.file_permissions_mode or 0o644)
+        os.replace(temp, path)
+    except BaseException:
+        if os.path.exists(temp):
+            os.remove(temp)
+        raise
+    return name
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """FileSystemStorage, который игнорирует имя и берёт хеш содержимого.
+
+    Файл пишется во временный *.part рядом и переименовывается на место
+    атомарно: читатель не увидит недописанный файл. Если файл с таким
+    хешем уже есть, копия не пишется, а у старого обновляется mtime —
+    по нему thumbnails.release не трогает только что повторённый файл.
+    Каталог всегда root, а не каталог переданного имени: иначе повторное
+    сохранение файла по хешу (uploads.sanitize) вложило бы его глубже.
+    """
+
+    root = 'posts'
+
+    def hashed_name(self, name, content):
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        return content_name(self.root, digest.hexdigest(), name)
+
+    def get_available_name(self, name, max_length=None):
+        # Имя всё равно заменит хеш, а одинаковое содержимое — один файл.
+        return name
+
+    def _save(self, name, content):
+        directory = self.path(self.root)
+        os.makedirs(directory, exist_ok=True)
+        fd, temp = tempfile.mkstemp(suffix=TEMP_SUFFIX, dir=directory)
+        try:
+            digest = hashlib.sha256()
+            with os.fdopen(fd, 'wb') as output:
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    output.write(chunk)
+            final = content_name(self.root, digest.hexdigest(), name)
+            path = self.path(final)
+            if os.path.exists(path):
+                os.utime(path)
+                os.remove(temp)
+                return final
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.chmod(temp, self.file_permissions_mode or 0o644)
+            os.replace(temp, path)
+        except BaseException:
+            if os.path.exists(temp):
+                os.remove(temp)
+            raise
+        return final
+
+
+media_storage = ContentAddressedStorage()
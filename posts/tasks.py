@@ -0,0 +1,44 @@
+"""Фоновые задачи сайта; имена задач хранятся в posts_task."""
+from django.core.mail import send_mail
+
+from . import search, thumbnails, timeline
+from .models import Follow, Post
+from .queue import task
+
+
+@task('timeline.fan_out')
+def fan_out(post_id):
+    post = Post.objects.filter(pk=post_id).first()
+    if post is not None:
+        timeline.fan_out(post)
+
+
+@task('timeline.backfill')
+def backfill(user_id, author_id):
+    # Пока задача ждала, читатель мог отписаться.
+    follow = Follow.objects.filter(user_id=user_id,
+                                   author_id=author_id).first()
+    if follow is not None:
+        timeline.backfill(follow)
+
+
+@task('search.index_post')
+def index_post(post_id):
+    search.index_post(post_id)
+
+
+# Прежние имена задач комментариев: они могли остаться в очереди.
+@task('search.add_comment')
+@task('search.remove_comment')
+def reindex_comment_post(post_id, text):
+    search.index_post(post_id)
+
+
+@task('thumbnails.build')
+def build_thumbnail(post_id, name):
+    thumbnails.render(post_id, name)
+
+
+@task('mail.send')
+def send_email(subject, message, recipients):
+    send_mail(subject, message, None, recipients)
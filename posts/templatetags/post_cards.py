@@ -0,0 +1,28 @@
+from django import template
+from django.utils.safestring import mark_safe
+
+from posts import thumbnails, variants
+from posts.cards import render_cards
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def post_cards(context, posts):
+    return mark_safe(render_cards(posts, context['user']))
+
+
+@register.filter
+def card_image(post):
+    """Готовая миниатюра, а пока её нет — исходное изображение.
+
+    Шаблон никогда не строит миниатюру сам: это делает пул
+    posts.thumbnails после сохранения поста.
+    """
+    return thumbnails.ready_url(post) or post.image.url
+
+
+@register.filter
+def image_sources(post):
+    """Наборы srcset готовых вариантов картинки поста по форматам."""
+    return variants.sources(post)
@@ -1,3 +1,4 @@
+import hashlib
 import os
 import tempfile
 
@@ -25,6 +26,7 @@ FOLLOWING_URL = reverse('posts:profile_follow', kwargs={'username': AUTHOR})
 UN_FOLLOWING_URL = reverse('posts:profile_unfollow',
                            kwargs={'username': AUTHOR})
 FOLLOW_URL = reverse('posts:follow_index')
+SEARCH_URL = reverse('posts:search')
 INDEX_TPL = 'index.html'
 GROUP_TPL = 'group.html'
 ABOUT_TECH_TPL = 'about/tech.html'
@@ -40,5 +42,8 @@ GIF_IMG = (
     b'\x02\x00\x01\x00\x00\x02\x02\x0C'
     b'\x0A\x00\x3B'
 )
-MEDIA_TEMP = settings.MEDIA_ROOT = tempfile.mkdtemp(
-    dir=os.path.join(settings.BASE_DIR, 'media'))
+# Картинки лежат под хешем содержимого (posts.storage).
+GIF_DIGEST = hashlib.sha256(GIF_IMG).hexdigest()
+GIF_NAME = f'posts/{GIF_DIGEST[:2]}/{GIF_DIGEST}.gif'
+os.makedirs(settings.MEDIA_ROOT, exist_ok=True)
+MEDIA_TEMP = settings.MEDIA_ROOT = tempfile.mkdtemp(dir=settings.MEDIA_ROOT)
@@ -0,0 +1,14 @@
+from django.db import connection
+
+
+def run_on_commit():
+    """Выполняет отложенные transaction.on_commit.
+
+    TestCase не фиксирует транзакцию, а задачи при TASKS_EAGER, версии
+    карточек и штампы ждут фиксации.
+    """
+    while connection.run_on_commit:
+        callbacks = connection.run_on_commit
+        connection.run_on_commit = []
+        for _, func in callbacks:
+            func()
@@ -0,0 +1,20 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+# Сколько запросов может стоить страница ленты целиком,
+# независимо от числа постов на ней.
+FEED_QUERY_BUDGET = 8
+
+
+class QueryBudgetMixin:
+    """Проверка, что страница укладывается в бюджет SQL-запросов."""
+
+    def assertQueryBudget(self, client, url, budget=FEED_QUERY_BUDGET):
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url)
+        self.assertEqual(response.status_code, 200)
+        if len(queries) > budget:
+            sql = '\n'.join(query['sql'] for query in queries.captured_queries)
+            self.fail(f'{url}: {len(queries)} запросов при бюджете '
+                      f'{budget}:\n{sql}')
+        return response
@@ -0,0 +1,83 @@
+import asyncio
+import threading
+
+from django.core.wsgi import get_wsgi_application
+from django.test import SimpleTestCase
+
+from yatube.asgi import WsgiToAsgi
+from . import advanced_value as av
+
+
+def echo(environ, start_response):
+    """WSGI-приложение: отвечает методом, путём, запросом и телом."""
+    body = environ['wsgi.input'].read()
+    thread = threading.current_thread().name
+    start_response('201 Created', [('Content-Type', 'text/plain'),
+                                   ('X-Thread', thread)])
+    return [environ['REQUEST_METHOD'].encode(), b' ',
+            environ['PATH_INFO'].encode('latin-1'), b'?',
+            environ['QUERY_STRING'].encode(), b' ',
+            environ.get('HTTP_COOKIE', '').encode(), b' ', body]
+
+
+def chunks(environ, start_response):
+    start_response('200 OK', [])
+    yield b'first'
+    yield b'second'
+
+
+def call(app, method='GET', path='/', query=b'', headers=(), body=(b'',)):
+    """Запрос к ASGI-приложению: статус, заголовки и тело по сообщениям."""
+    scope = {'type': 'http', 'method': method, 'path': path,
+             'query_string': query, 'headers': list(headers),
+             'http_version': '1.1'}
+    incoming = [{'type': 'http.request', 'body': part,
+                 'more_body': index < len(body) - 1}
+                for index, part in enumerate(body)]
+    sent = []
+
+    async def receive():
+        return incoming.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(app(scope, receive, send))
+    start, *bodies = sent
+    return (start['status'], dict(start['headers']),
+            [message['body'] for message in bodies])
+
+
+class AsgiTests(SimpleTestCase):
+    def setUp(self):
+        self.app = WsgiToAsgi(echo, 2)
+        self.addCleanup(self.app.executor.shutdown)
+
+    def test_request_to_environ(self):
+        """Метод, путь UTF-8, запрос, куки и тело по частям доходят до WSGI."""
+        status, headers, bodies = call(
+            self.app, 'POST', '/группа/', b'page=2',
+            [(b'cookie', b'a=1'), (b'cookie', b'b=2')], (b'te', b'xt'))
+        self.assertEqual(status, 201)
+        self.assertTrue(headers[b'x-thread'].startswith(b'asgi'))
+        self.assertEqual(bodies[0].decode(),
+                         'POST /группа/?page=2 a=1; b=2 text')
+
+    def test_head_without_body(self):
+        """На HEAD тело не отправляется."""
+        self.assertEqual(call(self.app, 'HEAD')[2], [b''])
+
+    def test_streaming(self):
+        """Потоковый ответ уходит частями."""
+        app = WsgiToAsgi(chunks, 1)
+        self.addCleanup(app.executor.shutdown)
+        self.assertEqual(call(app)[2], [b'first', b'second', b''])
+
+    def test_django(self):
+        """Страница Django отдаётся через пул потоков."""
+        app = WsgiToAsgi(get_wsgi_application(), 1)
+        self.addCleanup(app.executor.shutdown)
+        status, headers, bodies = call(app, path=av.ABOUT_AUTHOR)
+        self.assertEqual(status, 200)
+        self.assertIn(b'text/html', headers[b'content-type'])
+        self.assertIn(b'</html>', b''.join(bodies))
@@ -0,0 +1,42 @@
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from posts import benchmark
+from posts.models import Comment, Follow, Post, Timeline
+
+
+class BenchmarkTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_generate_dataset(self):
+        """Генератор создаёт данные заданного размера с готовыми лентами."""
+        benchmark.generate(users=10, posts=50, comments=30, follows=3)
+        self.assertEqual(Post.objects.count(), 50)
+        self.assertEqual(Comment.objects.count(), 30)
+        self.assertTrue(Follow.objects.exists())
+        self.assertTrue(Timeline.objects.exists())
+
+    def test_run_reports_every_view(self):
+        """Замер возвращает задержку и число запросов каждого представления."""
+        benchmark.generate(users=5, posts=20, comments=10, follows=2)
+        results = benchmark.run(requests=2, warmup=0)
+        self.assertEqual(set(results), {'index', 'group_posts', 'profile',
+                                        'post_view', 'follow_index'})
+        for result in results.values():
+            self.assertGreater(result['queries'], 0)
+            self.assertLessEqual(result['p50_ms'], result['max_ms'])
+
+    @override_settings(DATABASE_REPLICAS=['replica1'])
+    def test_run_ignores_replicas(self):
+        """Замер читает временную базу, а не реплики из настроек."""
+        benchmark.generate(users=5, posts=20, comments=10, follows=2)
+        self.assertEqual(len(benchmark.run(requests=1, warmup=0)), 5)
+
+    def test_compare_flags_regressions(self):
+        """Регрессией считается рост p95 сверх допуска и рост запросов."""
+        baseline = {'index': {'p95_ms': 10, 'queries': 3}}
+        self.assertEqual(benchmark.compare(
+            {'index': {'p95_ms': 14, 'queries': 3}}, baseline), [])
+        self.assertEqual(len(benchmark.compare(
+            {'index': {'p95_ms': 30, 'queries': 4}}, baseline)), 2)
@@ -0,0 +1,64 @@
+import shutil
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+
+from yatube.cache import FileStatsCache, LocMemStatsCache
+from . import advanced_value as av
+
+User = get_user_model()
+
+
+class SharedCacheTests(TestCase):
+    def setUp(self):
+        self.location = tempfile.mkdtemp()
+        params = {'OPTIONS': {'MAX_ENTRIES': 4, 'CULL_FREQUENCY': 2}}
+        # Два экземпляра на один каталог — как два воркера gunicorn.
+        self.worker1 = FileStatsCache(self.location, params)
+        self.worker2 = FileStatsCache(self.location, params)
+
+    def tearDown(self):
+        shutil.rmtree(self.location, ignore_errors=True)
+
+    def test_file_cache_shared_between_workers(self):
+        """Запись и сброс в одном воркере видны в другом."""
+        self.worker1.set('card:1', 'карточка')
+        self.assertEqual(self.worker2.get('card:1'), 'карточка')
+        self.worker2.delete('card:1')
+        self.assertIsNone(self.worker1.get('card:1'))
+
+    def test_stats_by_namespace(self):
+        """Статистика ведётся по пространствам имён ключей."""
+        self.worker1.set('card:1', 'карточка')
+        self.worker1.get('card:1')
+        self.worker1.get('card:2')
+        self.worker1.get('sorl-thumbnail||image||abc')
+        for ind in range(5):
+            self.worker1.set(f'card:{ind}', ind)
+        stats = self.worker1.stats()
+        self.assertEqual(stats['feed']['hits'], 1)
+        self.assertEqual(stats['feed']['misses'], 1)
+        self.assertEqual(stats['thumbnail']['misses'], 1)
+        self.assertGreater(stats['feed']['evictions'], 0)
+        self.assertEqual(set(stats), {'feed', 'thumbnail'})
+
+    def test_locmem_counts_evictions(self):
+        """Вытеснение в кэше в памяти тоже учитывается."""
+        cache = LocMemStatsCache(
+            'evictions', {'OPTIONS': {'MAX_ENTRIES': 2}})
+        for ind in range(4):
+            cache.set(f'card:{ind}', ind)
+        self.assertGreater(cache.stats()['feed']['evictions'], 0)
+
+    def test_stats_view_for_staff_only(self):
+        """Статистику видит только персонал."""
+        user = User.objects.create_user(username=av.AUTHOR,
+                                        password=av.PASSWORD)
+        client = Client()
+        client.force_login(user)
+        self.assertEqual(client.get('/admin/cache-stats/').status_code, 302)
+        user.is_staff = True
+        user.save()
+        response = client.get('/admin/cache-stats/')
+        self.assertIn('feed', response.json()['caches']['default'])
@@ -0,0 +1,63 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import (Client, SimpleTestCase, TransactionTestCase,
+                         override_settings)
+
+from posts.checks import shared_cache_check
+from posts.models import Comment, Post
+from . import advanced_value as av
+
+User = get_user_model()
+
+
+class SharedCacheCheckTests(SimpleTestCase):
+    def test_locmem_rejected(self):
+        """check --deploy не пропускает кэш, свой у каждого процесса."""
+        self.assertEqual([error.id for error in shared_cache_check(None)],
+                         ['posts.E001'])
+
+
+@override_settings(THUMBNAIL_WORKERS=0)
+class PostCardCacheTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username=av.AUTHOR,
+                                               password=av.PASSWORD)
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+        self.guest_client = Client()
+        self.post = Post.objects.create(text='Первый текст',
+                                        author=self.author)
+
+    def test_card_served_from_cache_until_version_bump(self):
+        """Карточка берётся из кэша, пока не сменится версия поста."""
+        self.guest_client.get(av.INDEX_URL)
+        Post.objects.filter(pk=self.post.pk).update(text='Без сигнала')
+        response = self.guest_client.get(av.INDEX_URL)
+        self.assertContains(response, 'Первый текст')
+        self.post.text = 'Второй текст'
+        self.post.save()
+        response = self.guest_client.get(av.INDEX_URL)
+        self.assertContains(response, 'Второй текст')
+
+    def test_comment_bumps_card(self):
+        """Новый комментарий перерисовывает карточку поста."""
+        self.guest_client.get(av.INDEX_URL)
+        Comment.objects.create(post=self.post, author=self.author)
+        response = self.guest_client.get(av.INDEX_URL)
+        self.assertContains(response, 'Комментариев: 1')
+
+    def test_author_change_bumps_card(self):
+        """Смена имени автора перерисовывает его карточки."""
+        self.guest_client.get(av.INDEX_URL)
+        self.author.username = av.AUTHOR2
+        self.author.save()
+        response = self.guest_client.get(av.INDEX_URL)
+        self.assertContains(response, f'@{av.AUTHOR2}')
+
+    def test_card_depends_on_viewer_role(self):
+        """Гость и автор получают разные карточки одного поста."""
+        response = self.author_client.get(av.INDEX_URL)
+        self.assertContains(response, 'Редактировать')
+        response = self.guest_client.get(av.INDEX_URL)
+        self.assertNotContains(response, 'Редактировать')
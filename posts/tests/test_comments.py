@@ -0,0 +1,60 @@
+import datetime as dt
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.models import Comment, Post
+from . import advanced_value as av
+
+User = get_user_model()
+
+
+@override_settings(COMMENTS_PAGE=2)
+class CommentPagesTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username=av.AUTHOR,
+                                               password=av.PASSWORD)
+        self.post = Post.objects.create(text=av.POST_TEXT, author=self.author)
+        now = timezone.now()
+        for index in range(5):
+            comment = Comment.objects.create(post=self.post,
+                                             author=self.author,
+                                             text=f'Комментарий {index}')
+            Comment.objects.filter(pk=comment.pk).update(
+                created=now - dt.timedelta(minutes=index))
+        self.post_url = reverse('posts:post', kwargs={
+            'username': av.AUTHOR, 'post_id': self.post.pk})
+        self.client = Client()
+
+    def test_post_shows_newest_comments(self):
+        """Страница поста выводит только свежие комментарии и их число."""
+        response = self.client.get(self.post_url)
+        self.assertEqual([comment.text for comment
+                          in response.context['comment_list']],
+                         ['Комментарий 0', 'Комментарий 1'])
+        self.assertContains(response, 'Комментарии: 5')
+        self.assertNotContains(response, 'Комментарий 2')
+        self.assertIsNotNone(response.context['comments_next_url'])
+
+    def test_load_all_pages(self):
+        """Подгрузка по курсору проходит все комментарии по порядку."""
+        url = self.client.get(self.post_url).context['comments_next_url']
+        texts = []
+        while url:
+            data = self.client.get(url + '&format=json').json()
+            texts += [comment['text'] for comment in data['comments']]
+            url = data['next']
+        self.assertEqual(texts, [f'Комментарий {index}'
+                                 for index in range(2, 5)])
+
+    def test_fragment(self):
+        """Без format=json подгрузка отдаёт HTML-фрагмент."""
+        url = self.client.get(self.post_url).context['comments_next_url']
+        response = self.client.get(url)
+        self.assertTemplateUsed(response, 'includes/comment_list.html')
+        self.assertContains(response, 'Комментарий 2')
+        self.assertContains(response, 'js-more-comments')
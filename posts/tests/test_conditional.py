@@ -0,0 +1,80 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Post
+from . import advanced_value as av
+
+User = get_user_model()
+
+
+@override_settings(THUMBNAIL_WORKERS=0)
+class ConditionalGetTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username=av.AUTHOR,
+                                               password=av.PASSWORD)
+        self.reader = User.objects.create_user(username=av.AUTHOR2,
+                                               password=av.PASSWORD)
+        self.post = Post.objects.create(text=av.POST_TEXT, author=self.author)
+        self.post_url = reverse('posts:post', kwargs={
+            'username': av.AUTHOR, 'post_id': self.post.pk})
+        self.profile_url = reverse('posts:profile',
+                                   kwargs={'username': av.AUTHOR})
+        self.guest = Client()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def revalidate(self, client, url, response):
+        return client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+
+    def test_guest_gets_304(self):
+        """Гость получает 304 и заголовки для обратного прокси."""
+        response = self.guest.get(av.INDEX_URL)
+        self.assertIn('Last-Modified', response)
+        self.assertIn('public', response['Cache-Control'])
+        self.assertIn('s-maxage', response['Cache-Control'])
+        again = self.revalidate(self.guest, av.INDEX_URL, response)
+        self.assertEqual(again.status_code, 304)
+        self.assertIn('public', again['Cache-Control'])
+
+    def test_changes_invalidate(self):
+        """Новый пост, правка и комментарий меняют ETag страниц."""
+        changes = (
+            (av.INDEX_URL, lambda: Post.objects.create(
+                text='Новый пост', author=self.author)),
+            (self.post_url, lambda: Comment.objects.create(
+                post=self.post, author=self.reader, text='Комментарий')),
+            (self.post_url, lambda: Post.objects.filter(
+                pk=self.post.pk).first().save()),
+            (self.profile_url, lambda: Follow.objects.create(
+                user=self.reader, author=self.author)),
+        )
+        for url, change in changes:
+            with self.subTest(url=url):
+                response = self.guest.get(url)
+                self.assertEqual(
+                    self.revalidate(self.guest, url, response).status_code,
+                    304)
+                change()
+                self.assertEqual(
+                    self.revalidate(self.guest, url, response).status_code,
+                    200)
+
+    def test_logged_in_private(self):
+        """Вошедшему пользователю страница отдаётся как private."""
+        response = self.reader_client.get(self.post_url)
+        self.assertIn('private', response['Cache-Control'])
+        self.assertNotIn('Last-Modified', response)
+        self.assertNotEqual(response['ETag'],
+                            self.guest.get(self.post_url)['ETag'])
+        self.assertEqual(self.revalidate(
+            self.reader_client, self.post_url, response).status_code, 304)
+
+    def test_missing_objects(self):
+        """Несуществующие автор и пост по-прежнему дают 404."""
+        self.assertEqual(self.guest.get('/nobody/').status_code, 404)
+        missing = reverse('posts:post', kwargs={
+            'username': av.AUTHOR, 'post_id': self.post.pk + 100})
+        self.assertEqual(self.guest.get(missing).status_code, 404)
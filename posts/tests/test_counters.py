@@ -0,0 +1,93 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase
+
+from posts.models import Comment, Follow, Post, UserStats
+from . import advanced_value as av
+
+User = get_user_model()
+
+
+class CountersTests(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username=av.AUTHOR,
+                                               password=av.PASSWORD)
+        self.reader = User.objects.create_user(username=av.AUTHOR2,
+                                               password=av.PASSWORD)
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+        self.post = Post.objects.create(text=av.POST_TEXT,
+                                        author=self.author)
+        self.profile_url = f'/{self.author.username}/'
+
+    def stats(self, user):
+        return UserStats.objects.for_user(user)
+
+    def test_profile_reads_stored_counters(self):
+        """Карточка профиля берёт счётчики одной строкой."""
+        self.reader_client.get(av.FOLLOWING_URL)
+        response = self.reader_client.get(self.profile_url)
+        self.assertEqual(response.context['count_posts'], 1)
+        self.assertEqual(response.context['user_following'], 1)
+        self.assertEqual(self.stats(self.reader).following, 1)
+
+    def test_counters_follow_writes_and_deletes(self):
+        """Счётчики меняются вместе с постами, подписками и комментариями."""
+        UserStats.objects.for_user(self.author)
+        UserStats.objects.for_user(self.reader)
+        self.reader_client.get(av.FOLLOWING_URL)
+        self.reader_client.post(av.ADD_COMMENT_URL.replace(
+            '/1/', f'/{self.post.id}/'), {'text': 'Комментарий'})
+        Post.objects.create(text=av.POST_TEXT, author=self.author)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 1)
+        self.assertEqual(self.stats(self.author).posts, 2)
+        self.assertEqual(self.stats(self.author).followers, 1)
+
+        self.reader_client.get(av.UN_FOLLOWING_URL)
+        self.post.delete()
+        self.assertEqual(self.stats(self.author).posts, 1)
+        self.assertEqual(self.stats(self.author).followers, 0)
+        self.assertEqual(self.stats(self.reader).following, 0)
+
+    def test_cascade_delete_updates_counters(self):
+        """Удаление пользователя уменьшает счётчики остальных."""
+        UserStats.objects.for_user(self.author)
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.reader.delete()
+        self.assertEqual(self.stats(self.author).followers, 0)
+
+    def test_post_save_keeps_comments_count(self):
+        """Сохранение поста не затирает счётчик комментариев."""
+        stale = Post.objects.get(pk=self.post.pk)
+        Comment.objects.create(post=self.post, author=self.reader)
+        stale.text = 'Новый текст'
+        stale.save()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 1)
+
+    def test_post_save_keeps_image_variants(self):
+        """Сохранение поста не затирает варианты, записанные в фоне."""
+        stale = Post.objects.get(pk=self.post.pk)
+        Post.objects.filter(pk=self.post.pk).update(image_variants='{}')
+        stale.text = 'Новый текст'
+        stale.save()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.image_variants, '{}')
+
+    def test_rebuild_counters_fixes_drift(self):
+        """Команда находит и исправляет расхождения."""
+        UserStats.objects.for_user(self.author)
+        UserStats.objects.filter(user=self.author).update(posts=7)
+        Post.objects.filter(pk=self.post.pk).update(comments_count=3)
+        out = StringIO()
+        call_command('rebuild_counters', '--dry-run', stdout=out)
+        self.assertIn('пользователей 1, постов 1', out.getvalue())
+        self.assertEqual(self.stats(self.author).posts, 7)
+        call_command('rebuild_counters', stdout=out)
+        self.assertEqual(self.stats(self.author).posts, 1)
+        self.assertEqual(self.stats(self.reader).posts, 0)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 0)
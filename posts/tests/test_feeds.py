@@ -0,0 +1,76 @@
+import json
+from xml.etree import ElementTree
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Group, Post
+from . import advanced_value as av
+
+User = get_user_model()
+ATOM = '{http://www.w3.org/2005/Atom}'
+
+
+class FeedTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username=av.AUTHOR,
+                                               password=av.PASSWORD)
+        self.group = Group.objects.create(title=av.GROUP_TITLE,
+                                          slug=av.GROUP_SLUG,
+                                          description=av.GROUP_DESCRIPTION)
+        self.post = Post.objects.create(text='Пост <с разметкой> & знаками',
+                                        author=self.author, group=self.group)
+        self.client = Client()
+
+    def get(self, name, fmt, *args, **headers):
+        response = self.client.get(
+            reverse(name, args=[*args, fmt]), **headers)
+        content = b''.join(getattr(response, 'streaming_content', []))
+        return response, content
+
+    def test_rss(self):
+        """RSS главной отдаётся потоком и содержит пост."""
+        response, content = self.get('posts:index_feed', 'rss')
+        self.assertTrue(response.streaming)
+        channel = ElementTree.fromstring(content).find('channel')
+        self.assertEqual(channel.find('item/description').text,
+                         self.post.text)
+
+    def test_atom_and_json(self):
+        """Ленты группы и автора в Atom и JSON Feed."""
+        _, content = self.get('posts:group_feed', 'atom', av.GROUP_SLUG)
+        entry = ElementTree.fromstring(content).find(f'{ATOM}entry')
+        self.assertEqual(entry.find(f'{ATOM}content').text, self.post.text)
+        _, content = self.get('posts:author_feed', 'json', av.AUTHOR)
+        items = json.loads(content)['items']
+        self.assertEqual(items[0]['content_text'], self.post.text)
+
+    def test_conditional_get(self):
+        """Повторный запрос с ETag стоит одного запроса и даёт 304."""
+        response, _ = self.get('posts:group_feed', 'rss', av.GROUP_SLUG)
+        self.assertIn('Last-Modified', response)
+        with self.assertNumQueries(1):
+            response, _ = self.get('posts:group_feed', 'rss', av.GROUP_SLUG,
+                                   HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_new_post_changes_etag(self):
+        """Новый пост меняет ETag ленты."""
+        response, _ = self.get('posts:index_feed', 'rss')
+        Post.objects.create(text='Новый пост', author=self.author)
+        fresh, _ = self.get('posts:index_feed', 'rss',
+                            HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(fresh.status_code, 200)
+
+    def test_unknown_feeds(self):
+        """Несуществующая группа и формат дают 404, пустая группа — 200."""
+        response, _ = self.get('posts:group_feed', 'rss', 'missing')
+        self.assertEqual(response.status_code, 404)
+        response, _ = self.get('posts:index_feed', 'xml')
+        self.assertEqual(response.status_code, 404)
+        Group.objects.create(title='Пустая', slug='empty', description='-')
+        response, _ = self.get('posts:group_feed', 'rss', 'empty')
+        self.assertEqual(response.status_code, 200)
@@ -0,0 +1,90 @@
+from django.contrib.auth import get_user_model
+from django.test import (Client, SimpleTestCase, TransactionTestCase,
+                         override_settings)
+from django.urls import reverse
+
+from posts import follow_graph
+from posts.follow_graph import FollowGraph
+from posts.models import Follow
+
+User = get_user_model()
+
+
+class FollowGraphTests(SimpleTestCase):
+    def setUp(self):
+        # 1 читает 2 и 3; 2 читает 4 и 5; 3 читает 4 и 1.
+        self.graph = FollowGraph([(1, 2), (1, 3), (2, 4), (2, 5),
+                                  (3, 1), (3, 4)])
+
+    def test_csr_layout(self):
+        """Подписки лежат подряд, границы — в offsets."""
+        self.assertEqual(list(self.graph.users), [1, 2, 3])
+        self.assertEqual(list(self.graph.offsets), [0, 2, 4, 6])
+        self.assertEqual(list(self.graph.following(3)), [1, 4])
+        self.assertEqual(list(self.graph.following(4)), [])
+
+    def test_recommend_by_overlap(self):
+        """Кандидат выше, если на него подписано больше друзей."""
+        self.assertEqual(self.graph.recommend(1, 10), [(4, 2), (5, 1)])
+        self.assertEqual(self.graph.recommend(1, 1), [(4, 2)])
+
+    def test_incremental_updates(self):
+        """Подписки после загрузки учитываются без перестройки CSR."""
+        self.graph.follow(1, 4)
+        self.graph.unfollow(1, 3)
+        self.assertEqual(self.graph.following(1), {2, 4})
+        self.assertEqual(self.graph.recommend(1, 10), [(5, 1)])
+        self.graph.follow(1, 3)
+        self.assertEqual(self.graph.following(1), {2, 3, 4})
+
+
+@override_settings(THUMBNAIL_WORKERS=0)
+class WhoToFollowTests(TransactionTestCase):
+    def setUp(self):
+        follow_graph.invalidate()
+        self.addCleanup(follow_graph.invalidate)
+        self.reader, self.friend, self.author = (
+            User.objects.create_user(username=name)
+            for name in ('reader', 'friend', 'author'))
+        Follow.objects.create(user=self.reader, author=self.friend)
+        Follow.objects.create(user=self.friend, author=self.author)
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def profile(self, user):
+        return self.client.get(reverse('posts:profile', args=[user]))
+
+    def test_own_profile_shows_recommendations(self):
+        """Свой профиль предлагает авторов, которых читают подписки."""
+        response = self.profile(self.reader)
+        self.assertEqual(response.context['recommended'], [(self.author, 1)])
+        self.assertContains(response, 'Кого почитать')
+        self.assertEqual(self.profile(self.friend).context['recommended'],
+                         [])
+
+    def test_follow_updates_graph_in_place(self):
+        """Подписка через сайт правит загруженный граф без перечитывания."""
+        graph = follow_graph.graph()
+        self.client.get(reverse('posts:profile_follow', args=[self.author]))
+        self.assertIs(follow_graph.graph(), graph)
+        self.assertEqual(self.profile(self.reader).context['recommended'],
+                         [])
+        self.client.get(reverse('posts:profile_unfollow',
+                                args=[self.author]))
+        self.assertEqual(self.profile(self.reader).context['recommended'],
+                         [(self.author, 1)])
+
+    def test_stale_graph_reloaded_in_background(self):
+        """Устаревший граф отвечает, пока новый читается в фоне."""
+        graph = follow_graph.graph()
+        # Подписка мимо сигналов видна только после перечитывания.
+        Follow.objects.bulk_create([Follow(user=self.reader,
+                                           author=self.author)])
+        with override_settings(FOLLOW_GRAPH_TTL=-1):
+            self.assertIs(follow_graph.graph(), graph)
+            reload = follow_graph._reload
+        if reload is not None:
+            reload.join()
+        self.assertIsNot(follow_graph.graph(), graph)
+        self.assertEqual(self.profile(self.reader).context['recommended'],
+                         [])
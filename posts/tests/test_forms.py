@@ -68,7 +68,7 @@ class PostFormTests(TestCase):
         self.assertTrue(
             Post.objects.filter(
                 text=av.POST_TEXT,
-                image='posts/small.gif'
+                image=av.GIF_NAME
             ).exists()
         )
         self.assertRedirects(response, av.INDEX_URL)
@@ -0,0 +1,47 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import IntegrityError
+from django.test import Client, TestCase
+
+from posts.models import Follow, UserStats
+from . import advanced_value as av
+
+User = get_user_model()
+
+
+class FollowUniqueTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username=av.AUTHOR,
+                                               password=av.PASSWORD)
+        self.reader = User.objects.create_user(username=av.AUTHOR2,
+                                               password=av.PASSWORD)
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def test_duplicate_follow_rejected(self):
+        """База не даёт подписаться на автора дважды."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        with self.assertRaises(IntegrityError):
+            Follow.objects.create(user=self.reader, author=self.author)
+
+    def test_repeated_follow_is_idempotent(self):
+        """Повторная подписка через страницу ничего не меняет."""
+        for _ in range(2):
+            response = self.client.get(av.FOLLOWING_URL)
+            self.assertRedirects(response, av.FOLLOW_URL)
+        self.assertEqual(Follow.objects.count(), 1)
+        self.assertEqual(
+            UserStats.objects.for_user(self.author).followers, 1)
+
+
+class ExplainFeedsTests(TestCase):
+    def test_feeds_use_indexes(self):
+        """Запросы лент читают таблицы по индексам."""
+        out = StringIO()
+        call_command('explain_feeds', '--check', stdout=out)
+        self.assertIn('post_group_pub_date', out.getvalue())
+        self.assertIn('comment_post_created', out.getvalue())
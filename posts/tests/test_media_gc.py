@@ -0,0 +1,75 @@
+import shutil
+from io import BytesIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TransactionTestCase, override_settings
+from PIL import Image
+from sorl.thumbnail.models import KVStore
+
+from posts import media_gc, thumbnails, variants
+from posts.models import Post
+from posts.storage import media_storage
+from . import advanced_value as av
+
+User = get_user_model()
+
+
+def png(color):
+    buffer = BytesIO()
+    Image.new('RGB', (400, 200), color).save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+@override_settings(MEDIA_RELEASE_GRACE=0, THUMBNAIL_WORKERS=0)
+class MediaCollectorTests(TransactionTestCase):
+    def setUp(self):
+        shutil.rmtree(av.MEDIA_TEMP, ignore_errors=True)
+        cache.clear()
+        self.user = User.objects.create_user(username=av.AUTHOR)
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(av.MEDIA_TEMP, ignore_errors=True)
+        super().tearDownClass()
+
+    def new_post(self, content):
+        self.client.post(av.POST_NEW, {
+            'text': av.POST_TEXT,
+            'image': SimpleUploadedFile('image.png', content)})
+        post = Post.objects.latest('pk')
+        url = thumbnails.ready_url(post)
+        thumbnail = url[len(media_storage.base_url):]
+        return post, [post.image.name, thumbnail, *variants.files(post)]
+
+    def test_orphans_collected(self):
+        """Ничьи файлы и записи KV удаляются, нужные остаются."""
+        live, live_files = self.new_post(png('red'))
+        dropped, orphans = self.new_post(png('blue'))
+        # Удаление мимо сигналов: файлы поста остаются без ссылок.
+        Post.objects.filter(pk=dropped.pk).update(image='')
+        orphans.append(media_storage.save(
+            'posts/stray.png', ContentFile(png('green'))))
+        with open(media_storage.path('posts/upload.part'), 'wb') as part:
+            part.write(b'\0' * 10)
+        orphans.append('posts/upload.part')
+        records = KVStore.objects.count()
+        size = sum(media_storage.size(name) for name in orphans)
+
+        dry = media_gc.collect(dry_run=True, workers=2)
+        self.assertEqual((dry['orphans'], dry['bytes']), (len(orphans), size))
+        self.assertTrue(all(media_storage.exists(name) for name in orphans))
+        self.assertEqual(KVStore.objects.count(), records)
+
+        self.assertEqual(media_gc.collect(workers=2), dry)
+        for name in orphans:
+            self.assertFalse(media_storage.exists(name), name)
+        for name in live_files:
+            self.assertTrue(media_storage.exists(name), name)
+        # Исходник, его миниатюра и список миниатюр исходника.
+        self.assertEqual(KVStore.objects.count(), records - 3)
+        self.assertEqual(media_gc.collect()['orphans'], 0)
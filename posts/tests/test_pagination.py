@@ -0,0 +1,67 @@
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase, override_settings
+
+from yatube.settings import COUNT_PAGE
+from posts.models import Post
+from posts.pagination import CursorPage, CursorPaginator, decode_cursor
+from . import advanced_value as av
+
+User = get_user_model()
+
+
+class CursorPaginatorTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=av.AUTHOR,
+                                            password=av.PASSWORD)
+        Post.objects.bulk_create(
+            Post(text=f'{av.POST_TEXT} {ind}', author=cls.user)
+            for ind in range(av.COUNT_OBJECTS))
+        # Половина записей с одинаковой датой: порядок держит id.
+        ids = Post.objects.values_list('pk', flat=True)
+        Post.objects.filter(pk__in=list(ids)[:av.COUNT_OBJECTS // 2]).update(
+            pub_date=av.POST_DATE)
+
+    def setUp(self):
+        self.guest_client = Client()
+        self.expected = list(Post.objects.order_by('-pub_date', '-id'))
+
+    def test_walk_forward_and_back(self):
+        """Проход по курсорам вперёд и назад повторяет ленту."""
+        paginator = CursorPaginator(Post.objects.all(), COUNT_PAGE)
+        first = paginator.get_page()
+        self.assertIsInstance(first, CursorPage)
+        self.assertFalse(first.has_previous())
+        second = paginator.get_page(first.next_cursor)
+        self.assertFalse(second.has_next())
+        self.assertEqual(list(first) + list(second), self.expected)
+        back = paginator.get_page(second.previous_cursor)
+        self.assertEqual(list(back), list(first))
+        self.assertFalse(back.has_previous())
+
+    def test_page_costs_one_query(self):
+        """Страница на любой глубине — один запрос без COUNT."""
+        paginator = CursorPaginator(Post.objects.all(), 2)
+        page = paginator.get_page()
+        while page.has_next():
+            with self.assertNumQueries(1):
+                page = paginator.get_page(page.next_cursor)
+
+    def test_broken_cursor_returns_first_page(self):
+        """Испорченный курсор отдаёт первую страницу."""
+        self.assertIsNone(decode_cursor('не-курсор'))
+        page = CursorPaginator(Post.objects.all(), COUNT_PAGE).get_page('%%')
+        self.assertEqual(list(page), self.expected[:COUNT_PAGE])
+
+    @override_settings(PAGINATION_CURSOR=True)
+    def test_index_uses_cursor_mode(self):
+        """При PAGINATION_CURSOR главная отдаёт курсорную страницу."""
+        response = self.guest_client.get(av.INDEX_URL)
+        page = response.context['page']
+        self.assertIsInstance(page, CursorPage)
+        self.assertContains(response, f'?cursor={page.next_cursor}')
+        response = self.guest_client.get(
+            av.INDEX_URL, {'cursor': page.next_cursor})
+        self.assertEqual(len(response.context['page']),
+                         av.COUNT_OBJECTS - COUNT_PAGE)
@@ -0,0 +1,47 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+
+from yatube.settings import COUNT_PAGE
+from posts.models import Comment, Follow, Group, Post, UserStats
+from . import advanced_value as av
+from .on_commit import run_on_commit
+from .query_budget import QueryBudgetMixin
+
+User = get_user_model()
+
+
+class FeedQueriesTests(QueryBudgetMixin, TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=av.AUTHOR,
+                                            password=av.PASSWORD)
+        cls.reader = User.objects.create_user(username=av.AUTHOR2,
+                                              password=av.PASSWORD)
+        cls.group = Group.objects.create(
+            title=av.GROUP_TITLE,
+            slug=av.GROUP_SLUG,
+            description=av.GROUP_DESCRIPTION)
+        Follow.objects.create(user=cls.reader, author=cls.user)
+        for ind in range(COUNT_PAGE):
+            post = Post.objects.create(text=f'{av.POST_TEXT} {ind}',
+                                       author=cls.user, group=cls.group)
+            Comment.objects.create(post=post, author=cls.reader)
+        run_on_commit()
+        # Счётчики профиля считаются один раз при первом чтении.
+        UserStats.objects.for_user(cls.user)
+
+    def setUp(self):
+        cache.clear()
+        self.reader_client = Client()
+        self.reader_client.force_login(FeedQueriesTests.reader)
+
+    def test_feed_pages_fit_query_budget(self):
+        """Страница ленты не делает запросов на каждую карточку."""
+        urls = [av.INDEX_URL, av.GROUP_URL, f'/{av.AUTHOR}/', av.FOLLOW_URL]
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.assertQueryBudget(self.reader_client, url)
+                self.assertEqual(len(response.context['page']), COUNT_PAGE)
+                self.assertContains(response, 'Комментариев: 1', COUNT_PAGE)
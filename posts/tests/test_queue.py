@@ -0,0 +1,115 @@
+import datetime as dt
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.cache import cache
+from django.test import Client, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from posts import queue
+from posts.models import Follow, Post, Task, Timeline
+from posts.search import search_posts
+from . import advanced_value as av
+
+User = get_user_model()
+
+
+def broken():
+    raise RuntimeError('сломано')
+
+
+@override_settings(TASKS_EAGER=False, THUMBNAIL_WORKERS=0)
+class TaskQueueTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username=av.AUTHOR)
+        self.reader = User.objects.create_user(username=av.AUTHOR2)
+
+    def test_side_effects_run_by_worker(self):
+        """Лента подписки и поиск обновляются обработчиком очереди."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        post = Post.objects.create(text='Пушистые собачки',
+                                   author=self.author)
+        self.assertFalse(Timeline.objects.filter(post=post).exists())
+        self.assertEqual(
+            sorted(Task.objects.values_list('name', flat=True)),
+            ['search.index_post', 'timeline.backfill', 'timeline.fan_out'])
+        # Потоки общей базы в памяти не ждут блокировок друг друга,
+        # поэтому в тестах обработчик с одним потоком.
+        self.assertEqual(queue.run(workers=1, once=True),
+                         {'done': 3, 'failed': 0})
+        self.assertTrue(Timeline.objects.filter(
+            user=self.reader, post=post).exists())
+        self.assertEqual([found.pk for found in search_posts('собачки')],
+                         [post.pk])
+        self.assertFalse(Task.objects.exists())
+
+    def test_retry_then_fail(self):
+        """Упавшая задача повторяется с паузой, затем помечается failed."""
+        queue.task('test.broken', max_attempts=2)(broken)
+        self.addCleanup(queue.REGISTRY.pop, 'test.broken')
+        job = queue.enqueue('test.broken')
+        self.assertEqual(queue.run(workers=1, once=True),
+                         {'done': 0, 'failed': 1})
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Task.QUEUED, 1))
+        self.assertGreater(job.run_at, timezone.now())
+        Task.objects.update(run_at=timezone.now())
+        queue.run(workers=1, once=True)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Task.FAILED, 2))
+        self.assertIn('сломано', job.error)
+
+    def test_expired_lease_reclaimed(self):
+        """Задачу упавшего обработчика забирают после конца аренды."""
+        Task.objects.create(
+            name='search.index_post', args='[1]', status=Task.RUNNING,
+            worker='gone', attempts=1,
+            locked_until=timezone.now() - dt.timedelta(seconds=1))
+        self.assertEqual(len(queue.claim('alive', 10)), 1)
+        self.assertEqual(queue.claim('other', 10), [])
+
+    def test_claim_by_free_workers(self):
+        """Задачи забираются по одной на свободный поток, а не пачкой."""
+        for post_id in range(3):
+            queue.enqueue('search.index_post', post_id)
+        with mock.patch.object(queue, 'claim', wraps=queue.claim) as claim:
+            self.assertEqual(queue.run(workers=1, batch=100, once=True),
+                             {'done': 3, 'failed': 0})
+        self.assertEqual({call.args[1] for call in claim.call_args_list},
+                         {1})
+
+    def test_reclaimed_task_skipped(self):
+        """Задачу, перехваченную после конца аренды, прежний не выполняет."""
+        queue.enqueue('search.index_post', 1)
+        job, = queue.claim('slow', 1)
+        Task.objects.update(locked_until=timezone.now()
+                            - dt.timedelta(seconds=1))
+        self.assertEqual(len(queue.claim('fast', 1)), 1)
+        self.assertIsNone(queue.execute(job))
+        self.assertEqual(Task.objects.get().worker, 'fast')
+
+    def test_signup_email_queued(self):
+        """Письмо о регистрации уходит из обработчика, а не из запроса."""
+        Client().post(reverse('signup'), {
+            'username': 'newbie', 'email': 'newbie@example.com',
+            'password1': 'Sup3r-secret!', 'password2': 'Sup3r-secret!'})
+        self.assertEqual(mail.outbox, [])
+        queue.run(workers=1, once=True)
+        self.assertEqual(mail.outbox[0].to, ['newbie@example.com'])
+
+
+@override_settings(THUMBNAIL_WORKERS=0)
+class EagerTaskTests(TransactionTestCase):
+    @override_settings(TASKS_EAGER=True)
+    def test_eager_task_error_logged(self):
+        """Упавшая сразу задача пишется в лог, а регистрация проходит."""
+        with mock.patch('posts.tasks.send_mail', side_effect=broken), \
+                self.assertLogs('posts.queue', 'ERROR'):
+            response = Client().post(reverse('signup'), {
+                'username': 'newbie', 'email': 'newbie@example.com',
+                'password1': 'Sup3r-secret!', 'password2': 'Sup3r-secret!'})
+        self.assertRedirects(response, reverse('signup'))
+        self.assertTrue(User.objects.filter(username='newbie').exists())
@@ -0,0 +1,91 @@
+from unittest import skipUnless
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connections, router
+from django.http import HttpResponse
+from django.test import (Client, RequestFactory, TestCase,
+                         TransactionTestCase, override_settings)
+from django.test.utils import CaptureQueriesContext
+
+from posts.models import Post
+from yatube.db_router import (PrimaryStickyMiddleware, STICKY_COOKIE,
+                              read_replica)
+from . import advanced_value as av
+
+User = get_user_model()
+
+
+@read_replica
+def read_alias(request):
+    """Представление-зонд: куда роутер отправил бы чтение поста."""
+    before = router.db_for_read(Post)
+    if request.GET.get('write'):
+        router.db_for_write(Post)
+    return HttpResponse(f'{before} {router.db_for_read(Post)}')
+
+
+@override_settings(DATABASE_REPLICAS=['replica1'])
+class ReplicaRouterTests(TestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.view = PrimaryStickyMiddleware(read_alias)
+
+    def test_reads_go_to_replica(self):
+        """Чтения представления с read_replica идут в реплику."""
+        response = self.view(self.factory.get('/'))
+        self.assertEqual(response.content.decode(), 'replica1 replica1')
+        self.assertEqual(router.db_for_read(Post), 'default')
+
+    def test_primary_after_write(self):
+        """После записи и для POST чтения идут в default."""
+        response = self.view(self.factory.get('/', {'write': 1}))
+        self.assertEqual(response.content.decode(), 'replica1 default')
+        response = self.view(self.factory.post('/'))
+        self.assertEqual(response.content.decode(), 'default default')
+
+    def test_sticky_cookie(self):
+        """Клиент с cookie недавней записи читает из default."""
+        request = self.factory.get('/')
+        request.COOKIES[STICKY_COOKIE] = '1'
+        self.assertEqual(self.view(request).content.decode(),
+                         'default default')
+
+    def test_write_sets_cookie(self):
+        """Запрос с записью ставит cookie, чтение — нет."""
+        User.objects.create_user(username=av.AUTHOR)
+        reader = User.objects.create_user(username=av.AUTHOR2)
+        client = Client()
+        client.force_login(reader)
+        self.assertNotIn(STICKY_COOKIE, client.get(av.ABOUT_AUTHOR).cookies)
+        response = client.get(av.FOLLOWING_URL)
+        self.assertEqual(response.cookies[STICKY_COOKIE]['max-age'],
+                         settings.DATABASE_REPLICA_STICKY_SECONDS)
+
+
+@skipUnless(settings.DATABASE_REPLICAS, 'YATUBE_DB_REPLICAS не задан')
+@override_settings(THUMBNAIL_WORKERS=0)
+class ReplicaDatabaseTests(TransactionTestCase):
+    """Проверка на настоящих алиасах: реплики — зеркала тестовой базы.
+
+    TransactionTestCase: зеркало открывает своё соединение и не видит
+    незафиксированную транзакцию TestCase.
+    """
+    databases = '__all__'
+
+    def test_feed_reads_replica(self):
+        """Главная читает посты из реплики, новый пост — из default."""
+        cache.clear()
+        author = User.objects.create_user(username=av.AUTHOR)
+        client = Client()
+        client.force_login(author)
+        replica = connections[settings.DATABASE_REPLICAS[0]]
+        with override_settings(DATABASE_REPLICAS=[replica.alias]):
+            with CaptureQueriesContext(replica) as queries:
+                client.get(av.INDEX_URL)
+            self.assertTrue(queries.captured_queries)
+            client.post(av.POST_NEW, {'text': av.POST_TEXT})
+            with CaptureQueriesContext(replica) as queries:
+                client.get(av.INDEX_URL)
+            self.assertFalse(queries.captured_queries)
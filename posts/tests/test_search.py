@@ -0,0 +1,113 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+
+from posts.models import Comment, Post
+from posts.search import index_post, search_posts
+from posts.stemmer import stem
+from . import advanced_value as av
+from .on_commit import run_on_commit
+
+User = get_user_model()
+
+
+class StemmerTests(TestCase):
+    def test_word_forms_share_stem(self):
+        """Формы одного слова сводятся к одной основе."""
+        for forms in (('собака', 'собаки', 'собакой', 'собаках'),
+                      ('бежать', 'бежал', 'бежала'),
+                      ('красивый', 'красивая', 'красивыми')):
+            with self.subTest(forms=forms):
+                self.assertEqual(len({stem(form) for form in forms}), 1)
+
+
+class SearchTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username=av.AUTHOR,
+                                               password=av.PASSWORD)
+        self.dog = Post.objects.create(text='Гуляли с собакой по парку',
+                                       author=self.author)
+        self.cat = Post.objects.create(text='Кошка спит на диване',
+                                       author=self.author)
+        run_on_commit()
+
+    def search(self, query, cursor=None, per_page=10):
+        return list(search_posts(query, cursor, per_page))
+
+    def test_morphology(self):
+        """Запрос находит пост по другой форме слова."""
+        for backend in ('fts5', 'python'):
+            with self.subTest(backend=backend), \
+                    override_settings(SEARCH_BACKEND=backend):
+                call_command('rebuild_search_index', stdout=StringIO())
+                self.assertEqual(self.search('собаки'), [self.dog])
+                self.assertEqual(self.search('КОШКИ'), [self.cat])
+                self.assertEqual(self.search('собака кошка'), [])
+                self.assertEqual(self.search('и'), [])
+
+    def test_incremental_updates(self):
+        """Изменения постов и комментариев сразу попадают в индекс."""
+        for backend in ('fts5', 'python'):
+            with self.subTest(backend=backend), \
+                    override_settings(SEARCH_BACKEND=backend):
+                call_command('rebuild_search_index', stdout=StringIO())
+                comment = Comment.objects.create(
+                    post=self.cat, author=self.author, text='Рыжий котёнок')
+                run_on_commit()
+                self.assertEqual(self.search('рыжая'), [self.cat])
+                comment.delete()
+                run_on_commit()
+                self.assertEqual(self.search('рыжая'), [])
+                self.dog.text = 'Собаки ушли'
+                self.dog.save()
+                run_on_commit()
+                self.assertEqual(self.search('парк'), [])
+                dog_id = self.dog.pk
+                self.dog.delete()
+                run_on_commit()
+                self.assertEqual(self.search('собаки'), [])
+                self.dog = Post.objects.create(
+                    pk=dog_id, text='Гуляли с собакой по парку',
+                    author=self.author)
+
+    def test_comment_reindex_idempotent(self):
+        """Повтор задачи индексации комментария не искажает индекс."""
+        for backend in ('fts5', 'python'):
+            with self.subTest(backend=backend), \
+                    override_settings(SEARCH_BACKEND=backend):
+                call_command('rebuild_search_index', stdout=StringIO())
+                kitten = Comment.objects.create(
+                    post=self.cat, author=self.author, text='Рыжий котёнок')
+                index_post(self.cat.pk)
+                kitten.delete()
+                index_post(self.cat.pk)
+                self.assertEqual(self.search('рыжая'), [])
+                self.assertEqual(self.search('кошки'), [self.cat])
+
+    def test_cursor_pages(self):
+        """Курсор проходит все результаты без повторов."""
+        Post.objects.bulk_create(
+            Post(text='собака ' * i, author=self.author)
+            for i in range(1, 8))
+        for backend in ('fts5', 'python'):
+            with self.subTest(backend=backend), \
+                    override_settings(SEARCH_BACKEND=backend):
+                call_command('rebuild_search_index', stdout=StringIO())
+                seen = []
+                page = search_posts('собака', per_page=3)
+                seen += list(page)
+                while page.has_next():
+                    page = search_posts('собака', page.next_cursor, 3)
+                    seen += list(page)
+                self.assertEqual(len(seen), 8)
+                self.assertEqual(len(set(seen)), 8)
+
+    def test_search_view(self):
+        """Страница поиска выводит найденные посты."""
+        response = Client().get(av.SEARCH_URL, {'q': 'собаками'})
+        self.assertEqual(list(response.context['page']), [self.dog])
+        self.assertContains(response, 'парку')
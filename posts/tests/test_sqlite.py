@@ -0,0 +1,50 @@
+import os
+import sqlite3
+import tempfile
+
+from django.db import connection
+from django.db.backends.sqlite3.base import DatabaseWrapper
+from django.test import SimpleTestCase, override_settings
+
+
+class SqliteProfileTests(SimpleTestCase):
+    # Тесты открывают свои соединения SQLite, а обработчик
+    # connection_created вызывается для всех баз.
+    databases = '__all__'
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'db.sqlite3')
+
+    def connect(self):
+        wrapper = DatabaseWrapper(dict(connection.settings_dict,
+                                       NAME=self.path), 'profile')
+        wrapper.ensure_connection()
+        self.addCleanup(wrapper.close)
+        return wrapper
+
+    def pragma(self, wrapper, name):
+        return wrapper.connection.execute(f'PRAGMA {name}').fetchone()[0]
+
+    @override_settings(SQLITE_PROFILE='default')
+    def test_default_profile(self):
+        """Профиль default не меняет настроек SQLite."""
+        wrapper = self.connect()
+        self.assertEqual(self.pragma(wrapper, 'journal_mode'), 'delete')
+
+    @override_settings(SQLITE_PROFILE='production')
+    def test_production_profile(self):
+        """production: WAL, NORMAL, mmap, busy_timeout и BEGIN IMMEDIATE."""
+        wrapper = self.connect()
+        self.assertEqual(self.pragma(wrapper, 'journal_mode'), 'wal')
+        self.assertEqual(self.pragma(wrapper, 'synchronous'), 1)
+        self.assertEqual(self.pragma(wrapper, 'busy_timeout'), 5000)
+        self.assertGreater(self.pragma(wrapper, 'mmap_size'), 0)
+        wrapper._start_transaction_under_autocommit()
+        self.addCleanup(wrapper.connection.rollback)
+        # Блокировка записи взята уже в начале транзакции.
+        other = sqlite3.connect(self.path, timeout=0)
+        self.addCleanup(other.close)
+        with self.assertRaisesMessage(sqlite3.OperationalError, 'locked'):
+            other.execute('BEGIN IMMEDIATE')
@@ -0,0 +1,98 @@
+import os
+import shutil
+from io import BytesIO
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import (Client, RequestFactory, TransactionTestCase,
+                         override_settings)
+from django.urls import reverse
+from PIL import Image
+
+from posts.models import Post
+from posts.storage import IMMUTABLE, TEMP_SUFFIX, media_storage
+from yatube import media
+from . import advanced_value as av
+
+User = get_user_model()
+
+
+@override_settings(THUMBNAIL_WORKERS=0)
+class ContentAddressedStorageTests(TransactionTestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username=av.AUTHOR)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(av.MEDIA_TEMP, ignore_errors=True)
+        super().tearDownClass()
+
+    def new_post(self, name):
+        return Post.objects.create(
+            text=av.POST_TEXT, author=self.user,
+            image=SimpleUploadedFile(name=name, content=av.GIF_IMG,
+                                     content_type='image/gif'))
+
+    def test_same_content_shares_file(self):
+        """Одинаковые загрузки под разными именами — один файл."""
+        first, second = self.new_post('one.GIF'), self.new_post('two.gif')
+        self.assertEqual(first.image.name, av.GIF_NAME)
+        self.assertEqual(second.image.name, av.GIF_NAME)
+        directory = os.path.dirname(media_storage.path(av.GIF_NAME))
+        self.assertEqual(os.listdir(directory),
+                         [os.path.basename(av.GIF_NAME)])
+        self.assertFalse(any(name.endswith(TEMP_SUFFIX) for name in
+                             os.listdir(os.path.dirname(directory))))
+
+    def test_resave_keeps_root(self):
+        """Повторное сохранение под именем по хешу не вкладывает каталоги."""
+        self.new_post('one.gif')
+        buffer = BytesIO()
+        Image.new('RGB', (8, 8), 'red').save(buffer, 'GIF')
+        name = media_storage.save(av.GIF_NAME, ContentFile(buffer.getvalue()))
+        self.assertEqual(name.count('/'), av.GIF_NAME.count('/'))
+        self.assertTrue(IMMUTABLE.match(name), name)
+
+    @override_settings(MEDIA_RELEASE_GRACE=0)
+    def test_file_deleted_with_last_post(self):
+        """Файл удаляется, только когда на него не ссылается ни один пост."""
+        first, second = self.new_post('one.gif'), self.new_post('two.gif')
+        first.delete()
+        self.assertTrue(media_storage.exists(av.GIF_NAME))
+        second.delete()
+        self.assertFalse(media_storage.exists(av.GIF_NAME))
+
+    @override_settings(MEDIA_RELEASE_GRACE=0)
+    def test_replaced_image_released(self):
+        """Картинка, заменённая при редактировании, удаляется."""
+        post = self.new_post('one.gif')
+        client = Client()
+        client.force_login(self.user)
+        buffer = BytesIO()
+        Image.new('RGB', (8, 8), 'red').save(buffer, 'PNG')
+        client.post(reverse('posts:post_edit', kwargs={
+            'username': self.user.username, 'post_id': post.pk}), {
+            'text': av.POST_TEXT,
+            'image': SimpleUploadedFile('new.png', buffer.getvalue())})
+        post.refresh_from_db()
+        self.assertTrue(post.image.name.endswith('.png'))
+        self.assertTrue(media_storage.exists(post.image.name))
+        self.assertFalse(media_storage.exists(av.GIF_NAME))
+
+    def test_fresh_file_kept(self):
+        """Только что загруженный файл переживает удаление поста."""
+        self.new_post('one.gif').delete()
+        self.assertTrue(media_storage.exists(av.GIF_NAME))
+
+    def test_immutable_cache_headers(self):
+        """Файл с именем по хешу отдаётся с долгим кэшем, прочие — нет."""
+        self.new_post('one.gif')
+        os.makedirs(media_storage.path('legacy'), exist_ok=True)
+        with open(media_storage.path('legacy/plain.gif'), 'wb') as legacy:
+            legacy.write(av.GIF_IMG)
+        request = RequestFactory().get('/')
+        self.assertEqual(media.serve(request, av.GIF_NAME)['Cache-Control'],
+                         media.IMMUTABLE_CACHE_CONTROL)
+        self.assertNotIn('Cache-Control',
+                         media.serve(request, 'legacy/plain.gif'))
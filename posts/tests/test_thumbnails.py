@@ -0,0 +1,153 @@
+import json
+import shutil
+from io import BytesIO, StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client, TransactionTestCase, override_settings
+from PIL import Image
+
+from posts import conditional, thumbnails, variants
+from posts.models import Post
+from posts.storage import IMMUTABLE, media_storage
+from . import advanced_value as av
+
+User = get_user_model()
+
+
+@override_settings(THUMBNAIL_WORKERS=0)
+class ThumbnailPipelineTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username=av.AUTHOR,
+                                             password=av.PASSWORD)
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(av.MEDIA_TEMP, ignore_errors=True)
+        super().tearDownClass()
+
+    def new_post(self, name, content=av.GIF_IMG):
+        self.client.post(av.POST_NEW, {
+            'text': av.POST_TEXT,
+            'image': SimpleUploadedFile(name=name, content=content)})
+        return Post.objects.latest('pk')
+
+    def test_card_shows_original_until_thumbnail_ready(self):
+        """Пока миниатюры нет, карточка показывает исходник."""
+        post = Post.objects.create(
+            text=av.POST_TEXT, author=self.user,
+            image=SimpleUploadedFile(name='plain.gif', content=av.GIF_IMG,
+                                     content_type='image/gif'))
+        response = self.client.get(av.INDEX_URL)
+        self.assertContains(response, post.image.url)
+        self.assertIsNone(thumbnails.ready_url(post))
+
+    def test_backfill_command(self):
+        """Команда строит миниатюры картинок, загруженных без пула."""
+        post = Post.objects.create(
+            text=av.POST_TEXT, author=self.user,
+            image=SimpleUploadedFile(name='old.gif', content=av.GIF_IMG))
+        call_command('build_thumbnails', stdout=StringIO())
+        post.refresh_from_db()
+        self.assertIsNotNone(thumbnails.ready_url(post))
+
+    def test_thumbnail_built_after_post_new(self):
+        """После сохранения поста миниатюра готова и попала в карточку."""
+        post = self.new_post('inline.gif')
+        url = thumbnails.ready_url(post)
+        self.assertIsNotNone(url)
+        self.assertContains(self.client.get(av.INDEX_URL), url)
+
+    @override_settings(THUMBNAIL_WORKERS=1)
+    def test_thumbnail_built_in_pool(self):
+        """Миниатюра строится в пуле потоков, а не в запросе."""
+        post = self.new_post('pool.gif')
+        # Пул из одного потока: пустая задача ждёт, пока отработает наша.
+        thumbnails._get_executor().submit(lambda: None).result()
+        # Очистка картинки с метаданными меняет имя файла на новый хеш.
+        post.refresh_from_db()
+        self.assertIsNotNone(thumbnails.ready_url(post))
+
+    def test_responsive_variants_in_srcset(self):
+        """Для картинки строятся варианты ширин и попадают в srcset."""
+        buffer = BytesIO()
+        Image.new('RGB', (1000, 400), 'red').save(buffer, 'PNG')
+        post = self.new_post('wide.png', buffer.getvalue())
+        data = json.loads(post.image_variants)
+        formats = [mime for _, mime, _ in variants.supported_formats()]
+        self.assertEqual(data['source'], post.image.name)
+        self.assertEqual(
+            sorted({variant['width'] for variant in data['variants']}),
+            [320, 640, 960])
+        self.assertEqual(len(data['variants']), 3 * len(formats))
+        response = self.client.get(av.INDEX_URL)
+        for mime in formats:
+            self.assertContains(response, f'type="{mime}"')
+        self.assertContains(response, '-320.jpg 320w')
+
+    @override_settings(MEDIA_RELEASE_GRACE=0)
+    def test_exif_original_released(self):
+        """Исходник с EXIF отпускается, а страницы поста обновляются."""
+        exif = Image.Exif()
+        exif[0x0112] = 6
+        buffer = BytesIO()
+        Image.new('RGB', (20, 10), 'red').save(buffer, 'JPEG',
+                                               exif=exif.tobytes())
+        post = Post.objects.create(
+            text=av.POST_TEXT, author=self.user,
+            image=SimpleUploadedFile(name='gps.jpg',
+                                     content=buffer.getvalue()))
+        original = post.image.name
+        scope = f'post:{post.pk}'
+        stamp = conditional.stamps([scope])
+        thumbnails.render(post.pk, original)
+        post.refresh_from_db()
+        self.assertNotEqual(post.image.name, original)
+        self.assertFalse(media_storage.exists(original))
+        self.assertTrue(media_storage.exists(post.image.name))
+        self.assertNotEqual(conditional.stamps([scope]), stamp)
+
+    def test_malformed_record_means_no_variants(self):
+        """Битая запись о вариантах читается как их отсутствие."""
+        post = self.new_post('broken.gif')
+        for raw in ('{}', '[]', 'не json', '{"source": 1}'):
+            with self.subTest(raw=raw):
+                Post.objects.filter(pk=post.pk).update(image_variants=raw)
+                post.refresh_from_db()
+                self.assertEqual(variants.files(post), [])
+                self.assertEqual(variants.sources(post), [])
+                self.assertIsNone(thumbnails.ready_url(post))
+                self.assertEqual(
+                    self.client.get(av.INDEX_URL).status_code, 200)
+        variants.generate(post.image.name, 'thumb.jpg')
+        post.refresh_from_db()
+        self.assertEqual(variants.thumbnail(post), 'thumb.jpg')
+
+    def test_variants_built_once_per_hash(self):
+        """Повторная сборка вариантов не плодит копии с суффиксами."""
+        buffer = BytesIO()
+        Image.new('RGB', (1000, 400), 'blue').save(buffer, 'PNG')
+        post = self.new_post('twice.png', buffer.getvalue())
+        first = variants.build_variants(post.image.name)
+        second = variants.build_variants(post.image.name)
+        self.assertEqual(first, second)
+        for variant in first:
+            self.assertRegex(variant['name'], IMMUTABLE)
+        stem = first[0]['name'].rsplit('-', 1)[0].rsplit('/', 1)[1]
+        _, names = media_storage.listdir('posts/variants')
+        self.assertEqual(
+            len([name for name in names if name.startswith(stem)]),
+            len(first))
+
+    def test_build_lock_waits_for_owner(self):
+        """Пока файл собирает один воркер, второй не получает замок."""
+        with thumbnails.build_lock('posts/aa/same.png'):
+            self.assertFalse(cache.add(
+                thumbnails.BUILD_LOCK_KEY.format('posts/aa/same.png'), True))
+        self.assertTrue(cache.add(
+            thumbnails.BUILD_LOCK_KEY.format('posts/aa/same.png'), True))
@@ -0,0 +1,88 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+
+from posts.models import Follow, PopularAuthor, Post, Timeline
+from posts.timeline import timeline_posts
+from . import advanced_value as av
+from .on_commit import run_on_commit
+
+User = get_user_model()
+
+
+class TimelineTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username=av.AUTHOR,
+                                               password=av.PASSWORD)
+        self.reader = User.objects.create_user(username=av.AUTHOR2,
+                                               password=av.PASSWORD)
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+        self.old_post = Post.objects.create(text=av.POST_TEXT,
+                                            author=self.author)
+        run_on_commit()
+
+    def test_follow_backfills_timeline(self):
+        """Подписка переносит старые посты автора в ленту."""
+        self.reader_client.get(av.FOLLOWING_URL)
+        run_on_commit()
+        self.assertTrue(Timeline.objects.filter(
+            user=self.reader, post=self.old_post).exists())
+
+    def test_new_post_fans_out(self):
+        """Новый пост попадает в ленты подписчиков."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        post = Post.objects.create(text='Новый пост', author=self.author)
+        run_on_commit()
+        response = self.reader_client.get(av.FOLLOW_URL)
+        self.assertEqual(response.context['page'][0], post)
+        self.assertEqual(len(response.context['page']), 2)
+
+    def test_unfollow_drops_timeline(self):
+        """Отписка очищает ленту от постов автора."""
+        self.reader_client.get(av.FOLLOWING_URL)
+        run_on_commit()
+        self.reader_client.get(av.UN_FOLLOWING_URL)
+        run_on_commit()
+        self.assertFalse(Timeline.objects.filter(user=self.reader).exists())
+        response = self.reader_client.get(av.FOLLOW_URL)
+        self.assertEqual(len(response.context['page']), 0)
+
+    @override_settings(FOLLOW_TIMELINE_FANOUT_LIMIT=0)
+    def test_popular_author_read_on_request(self):
+        """Посты популярного автора читаются без раскладки по лентам."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        cache.clear()
+        post = Post.objects.create(text='Новый пост', author=self.author)
+        run_on_commit()
+        self.assertFalse(Timeline.objects.filter(post=post).exists())
+        self.assertIn(post, timeline_posts(self.reader))
+
+    @override_settings(FOLLOW_TIMELINE_FANOUT_LIMIT=1)
+    def test_former_popular_author_kept(self):
+        """Посты времён популярности не пропадают, когда подписчиков меньше."""
+        other = User.objects.create_user(username='other')
+        Follow.objects.create(user=self.reader, author=self.author)
+        Follow.objects.create(user=other, author=self.author)
+        post = Post.objects.create(text='Новый пост', author=self.author)
+        run_on_commit()
+        self.assertFalse(Timeline.objects.filter(post=post).exists())
+        Follow.objects.filter(user=other).delete()
+        cache.clear()
+        self.assertIn(post, timeline_posts(self.reader))
+        # Пересборка снимает отметку и раскладывает посты по лентам.
+        call_command('rebuild_timelines', stdout=StringIO())
+        self.assertFalse(PopularAuthor.objects.exists())
+        self.assertTrue(Timeline.objects.filter(
+            user=self.reader, post=post).exists())
+
+    def test_rebuild_timelines(self):
+        """Команда пересобирает ленты с нуля."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        Timeline.objects.all().delete()
+        call_command('rebuild_timelines', stdout=StringIO())
+        self.assertEqual(list(timeline_posts(self.reader)), [self.old_post])
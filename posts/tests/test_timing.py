@@ -0,0 +1,67 @@
+from itertools import count
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.template import engines
+from django.test import Client, SimpleTestCase, TestCase
+
+from posts.models import Post
+from yatube import timing
+from . import advanced_value as av
+
+User = get_user_model()
+
+
+class NestedRenderTests(SimpleTestCase):
+    def test_nested_render_counted_once(self):
+        """Шаблон внутри шаблона не прибавляет своё время второй раз."""
+        engine = engines.all()[0]
+        inner = engine.from_string('карточка')
+        outer = engine.from_string('{{ card }}')
+        measured = timing._local.timing = timing.RequestTiming()
+        self.addCleanup(setattr, timing._local, 'timing', None)
+        # Часы идут на секунду за чтение: внешний шаблон читает 0 и 2,
+        # вложенный — 1 и своего времени не прибавляет.
+        with mock.patch('yatube.timing.time.perf_counter',
+                        side_effect=count()):
+            outer.render({'card': lambda: inner.render()})
+        self.assertEqual(measured.render, 2)
+
+
+class TimingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        timing.reset()
+        self.user = User.objects.create_user(username=av.AUTHOR,
+                                             password=av.PASSWORD)
+        Post.objects.create(text=av.POST_TEXT, author=self.user)
+        self.client = Client()
+
+    def test_server_timing_header(self):
+        """Ответ несёт время SQL, отрисовки и всего запроса."""
+        header = self.client.get(av.INDEX_URL)['Server-Timing']
+        for metric in ('db;', 'render;', 'total;'):
+            self.assertIn(metric, header)
+        self.assertNotIn('SQL, 0 queries', header)
+
+    def test_stats_by_view(self):
+        """Сводка считает запросы по представлениям."""
+        self.client.get(av.INDEX_URL)
+        self.client.get(av.INDEX_URL)
+        stats = timing.stats()['posts.views.index']
+        self.assertEqual(stats['requests'], 2)
+        self.assertGreater(stats['avg_queries'], 0)
+        self.assertGreater(stats['avg_render_ms'], 0)
+        self.assertEqual(sum(stats['histogram_ms'].values()), 2)
+
+    def test_stats_view_for_staff_only(self):
+        """Сводку видит только персонал."""
+        self.client.force_login(self.user)
+        self.assertEqual(
+            self.client.get('/admin/timing-stats/').status_code, 302)
+        self.user.is_staff = True
+        self.user.save()
+        self.client.get(av.INDEX_URL)
+        response = self.client.get('/admin/timing-stats/')
+        self.assertIn('posts.views.index', response.json()['views'])
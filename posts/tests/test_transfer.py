@@ -0,0 +1,85 @@
+import datetime as dt
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from posts.models import Comment, Follow, Group, Post, UserStats
+from . import advanced_value as av
+
+User = get_user_model()
+
+
+class TransferTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username=av.AUTHOR,
+                                               password=av.PASSWORD)
+        self.reader = User.objects.create_user(username=av.AUTHOR2,
+                                               password=av.PASSWORD)
+        self.group = Group.objects.create(title=av.GROUP_TITLE,
+                                          slug=av.GROUP_SLUG,
+                                          description=av.GROUP_DESCRIPTION)
+        self.post = Post.objects.create(text=av.POST_TEXT, author=self.author,
+                                        group=self.group)
+        self.pub_date = timezone.now() - dt.timedelta(days=30)
+        Post.objects.filter(pk=self.post.pk).update(pub_date=self.pub_date)
+        Comment.objects.create(post=self.post, author=self.reader,
+                               text='Комментарий')
+        Follow.objects.create(user=self.reader, author=self.author)
+        handle, self.path = tempfile.mkstemp(suffix='.ndjson.gz')
+        os.close(handle)
+        self.addCleanup(os.remove, self.path)
+
+    def export(self):
+        call_command('export_yatube', self.path, '--batch-size', '1',
+                     stderr=StringIO())
+
+    def test_export_lines(self):
+        """Выгрузка пишет по строке на запись, связи — по ключам."""
+        out = StringIO()
+        call_command('export_yatube', '-', stdout=out, stderr=StringIO())
+        records = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual([record['model'] for record in records],
+                         ['user', 'user', 'group', 'post', 'comment',
+                          'follow'])
+        post = records[3]
+        self.assertEqual(post['author'], av.AUTHOR)
+        self.assertEqual(post['group'], av.GROUP_SLUG)
+
+    def test_round_trip_remaps_keys(self):
+        """Загрузка сохраняет даты и переназначает id и связи."""
+        self.export()
+        Post.objects.all().delete()
+        Group.objects.all().delete()
+        self.reader.delete()
+        # Занимаем id, чтобы загруженные посты получили новые.
+        blocker = Post.objects.create(text='Чужой пост', author=self.author)
+        call_command('import_yatube', self.path, '--batch-size', '1',
+                     stdout=StringIO())
+        post = Post.objects.exclude(pk=blocker.pk).get()
+        self.assertNotEqual(post.pk, self.post.pk)
+        self.assertEqual(post.pub_date, self.pub_date)
+        self.assertEqual(post.group.slug, av.GROUP_SLUG)
+        self.assertEqual(post.author, self.author)
+        comment = Comment.objects.get()
+        self.assertEqual(comment.post, post)
+        self.assertEqual(comment.author.username, av.AUTHOR2)
+        self.assertEqual(Post.objects.get(pk=post.pk).comments_count, 1)
+        self.assertEqual(UserStats.objects.for_user(self.author).followers, 1)
+
+    def test_import_skips_existing(self):
+        """Повторная загрузка не дублирует группы и подписки."""
+        self.export()
+        call_command('import_yatube', self.path, '--no-rebuild',
+                     stdout=StringIO())
+        self.assertEqual(Group.objects.count(), 1)
+        self.assertEqual(Follow.objects.count(), 1)
+        self.assertEqual(User.objects.count(), 2)
+        self.assertEqual(Post.objects.count(), 2)
@@ -0,0 +1,94 @@
+import datetime as dt
+import math
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, SimpleTestCase, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from posts import trending
+from posts.models import Comment, Group, Post, TrendingPost
+from . import advanced_value as av
+from .query_budget import QueryBudgetMixin
+
+User = get_user_model()
+
+
+class LogSpaceTests(SimpleTestCase):
+    def test_logaddexp(self):
+        """Сумма в логарифме совпадает с обычной и не переполняется."""
+        self.assertAlmostEqual(trending.logaddexp(math.log(2), math.log(3)),
+                               math.log(5))
+        self.assertAlmostEqual(trending.logaddexp(None, 1.5), 1.5)
+        self.assertAlmostEqual(trending.logaddexp(5000.0, 5000.0),
+                               5000.0 + math.log(2))
+
+    def test_half_life(self):
+        """Событие на период полураспада старше весит вдвое меньше."""
+        now = timezone.now()
+        older = now - dt.timedelta(seconds=settings.TRENDING_HALF_LIFE)
+        self.assertAlmostEqual(
+            trending.log_weight(1, now) - trending.log_weight(1, older),
+            math.log(2))
+
+
+class TrendingTests(QueryBudgetMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username=av.AUTHOR)
+        self.quiet, self.busy = (
+            Group.objects.create(title=slug, slug=slug, description=slug)
+            for slug in ('quiet', 'busy'))
+
+    def post(self, group, comments=0, age=0):
+        post = Post.objects.create(text=av.POST_TEXT, author=self.user,
+                                   group=group)
+        for _ in range(comments):
+            Comment.objects.create(post=post, author=self.user, text='+')
+        moment = timezone.now() - dt.timedelta(hours=age)
+        Post.objects.filter(pk=post.pk).update(pub_date=moment)
+        Comment.objects.filter(post=post).update(created=moment)
+        return post
+
+    def test_ranking_decays_with_age(self):
+        """Свежая активность весит больше старой."""
+        # Два периода полураспада: (1 + 2·2) / 4 > 1, а (1 + 2) / 4 < 1.
+        old_busy = self.post(self.busy, comments=2, age=12)
+        old_quiet = self.post(self.quiet, comments=1, age=12)
+        fresh = self.post(None)
+        self.assertEqual(trending.update(), (6, 0))
+        self.assertEqual(list(trending.posts()),
+                         [old_busy, fresh, old_quiet])
+        self.assertEqual(list(trending.groups()), [self.busy, self.quiet])
+
+    def test_update_is_incremental(self):
+        """Повторный запуск учитывает только новые события."""
+        first = self.post(self.quiet)
+        second = self.post(self.busy)
+        trending.update()
+        self.assertEqual(trending.update(), (0, 0))
+        Comment.objects.create(post=first, author=self.user, text='+')
+        self.assertEqual(trending.update(batch=1), (1, 0))
+        self.assertEqual(list(trending.posts()), [first, second])
+        self.assertEqual(list(trending.groups()), [self.quiet, self.busy])
+
+    def test_cold_entries_removed(self):
+        """Остывшие записи убираются из таблиц."""
+        self.post(self.quiet, comments=1)
+        trending.update()
+        later = timezone.now() + dt.timedelta(days=7)
+        self.assertEqual(trending.update(now=later), (0, 2))
+        self.assertFalse(TrendingPost.objects.exists())
+
+    def test_trending_page(self):
+        """Страница популярного читает готовый рейтинг."""
+        busy = self.post(self.busy, comments=3)
+        self.post(self.quiet)
+        trending.update()
+        response = self.assertQueryBudget(Client(), reverse('posts:trending'))
+        self.assertEqual(response.context['page'][0], busy)
+        self.assertEqual(list(response.context['groups']),
+                         [self.busy, self.quiet])
+        self.assertContains(response, 'Популярные группы')
@@ -0,0 +1,98 @@
+import shutil
+import struct
+import zlib
+from io import BytesIO
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from PIL import Image
+
+from posts import uploads
+from posts.models import Post
+from . import advanced_value as av
+
+User = get_user_model()
+
+
+def png_header(width, height):
+    """Сигнатура, IHDR и начало IDAT: самих пикселей в файле нет."""
+    ihdr = b'IHDR' + struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)
+    return (b'\x89PNG\r\n\x1a\n' + struct.pack('>I', 13) + ihdr
+            + struct.pack('>I', zlib.crc32(ihdr))
+            + struct.pack('>I', 1 << 20) + b'IDAT')
+
+
+class ImageUploadTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(av.MEDIA_TEMP, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.user = User.objects.create_user(username=av.AUTHOR)
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def upload(self, content, name='upload.png'):
+        return self.client.post(av.POST_NEW, {
+            'text': av.POST_TEXT,
+            'image': SimpleUploadedFile(name, content)})
+
+    def test_small_image_accepted(self):
+        """Маленькая картинка проходит проверку при загрузке."""
+        self.assertRedirects(self.upload(av.GIF_IMG, 'small.gif'),
+                             av.INDEX_URL)
+        self.assertTrue(Post.objects.filter(image=av.GIF_NAME).exists())
+
+    @override_settings(IMAGE_UPLOAD_MAX_BYTES=1024)
+    def test_too_large_file(self):
+        """Файл больше лимита отклоняется с ошибкой формы."""
+        response = self.upload(png_header(10, 10) + b'\0' * 4096)
+        self.assertFormError(response, 'form', 'image',
+                             'Файл больше 1,0\xa0КБ.')
+        self.assertFalse(Post.objects.exists())
+
+    def test_too_many_pixels(self):
+        """Размеры читаются из заголовка: пиксели не декодируются."""
+        # Второй размер Pillow сам считает бомбой декомпрессии.
+        for side in (10000, 100000):
+            with self.subTest(side=side):
+                response = self.upload(png_header(side, side))
+                self.assertFormError(response, 'form', 'image',
+                                     'В изображении больше 40 Мпикс.')
+
+    def test_unsupported_format(self):
+        """Картинка в формате не из списка отклоняется."""
+        buffer = BytesIO()
+        Image.new('RGB', (4, 4)).save(buffer, 'BMP')
+        response = self.upload(buffer.getvalue(), 'image.bmp')
+        self.assertFormError(response, 'form', 'image',
+                             'Формат BMP не поддерживается.')
+
+    def test_sanitize_strips_exif(self):
+        """Перекодирование убирает EXIF и применяет поворот из него."""
+        exif = Image.Exif()
+        exif[0x0112] = 6
+        exif[0x010F] = 'Камера'
+        buffer = BytesIO()
+        Image.new('RGB', (20, 10), 'red').save(buffer, 'JPEG',
+                                               exif=exif.tobytes())
+        name = default_storage.save('posts/exif.jpg',
+                                    ContentFile(buffer.getvalue()))
+        clean = uploads.sanitize(name)
+        self.assertNotEqual(clean, name)
+        with default_storage.open(clean) as stored:
+            image = Image.open(stored)
+            self.assertEqual(image.size, (10, 20))
+            self.assertNotIn('exif', image.info)
+
+    def test_sanitize_keeps_clean_image(self):
+        """Картинка без метаданных не перекодируется."""
+        buffer = BytesIO()
+        Image.new('RGB', (20, 10), 'red').save(buffer, 'JPEG')
+        name = default_storage.save('posts/clean.jpg',
+                                    ContentFile(buffer.getvalue()))
+        self.assertEqual(uploads.sanitize(name), name)
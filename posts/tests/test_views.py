@@ -11,6 +11,7 @@ from django.core.files.uploadedfile import SimpleUploadedFile
 from yatube.settings import COUNT_PAGE
 from posts.models import Post, Group
 from . import advanced_value as av
+from .on_commit import run_on_commit
 
 User = get_user_model()
 
@@ -241,6 +242,7 @@ class PostPagesTests(TestCase):
         response = self.authorized_client2.get(
             reverse('posts:profile_follow', kwargs={'username': av.AUTHOR}))
         self.assertRedirects(response, av.FOLLOW_URL)
+        run_on_commit()
         response = self.authorized_client2.get(av.FOLLOW_URL)
         self.assertEqual(post.text,
                          response.context.get('page').object_list[0].text)
@@ -0,0 +1,156 @@
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from sorl.thumbnail import delete as delete_thumbnails, get_thumbnail
+
+from . import cards, conditional, queue, uploads, variants
+from .models import Post
+from .storage import media_storage
+
+logger = logging.getLogger(__name__)
+
+GEOMETRY = '960x339'
+OPTIONS = {'crop': 'center', 'upscale': True}
+# Замок сборки миниатюры и вариантов одного файла и сколько его ждать.
+BUILD_LOCK_KEY = 'media:build:{}'
+BUILD_LOCK_TIMEOUT = 120
+
+_executor = None
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            settings.THUMBNAIL_WORKERS, thread_name_prefix='thumbnail')
+    return _executor
+
+
+def ready_url(post):
+    """Адрес готовой миниатюры картинки поста или None, если её нет.
+
+    Признак готовности — имя миниатюры в записи о вариантах поста:
+    он переживает перезапуск и не зависит от кэша процесса.
+    """
+    name = variants.thumbnail(post)
+    return default_storage.url(name) if name else None
+
+
+@contextmanager
+def build_lock(name):
+    """Пускает сборку для файла name только одному воркеру за раз.
+
+    Второй ждёт, пока первый закончит, и берёт готовое: миниатюру из
+    хранилища sorl, варианты — из записи, которую нашёл generate.
+    Замок в общем кэше и истекает сам, если воркер упал посреди сборки.
+    """
+    key = BUILD_LOCK_KEY.format(name)
+    deadline = time.monotonic() + BUILD_LOCK_TIMEOUT
+    acquired = cache.add(key, True, BUILD_LOCK_TIMEOUT)
+    while not acquired and time.monotonic() < deadline:
+        time.sleep(0.05)
+        acquired = cache.add(key, True, BUILD_LOCK_TIMEOUT)
+    try:
+        yield
+    finally:
+        if acquired:
+            cache.delete(key)
+
+
+def render(post_id, name):
+    """Очищает картинку, строит миниатюру и варианты, сбрасывает карточки.
+
+    Очищенный файл ложится под новым хешем: его получают все посты
+    с исходным файлом, а исходник отпускается. Он остаётся на выдержку
+    MEDIA_RELEASE_GRACE: такую же загрузку мог только что повторить
+    пост, ещё не записанный в базу; потом его уберёт collect_media.
+    Страницы постов получают новый ETag: update не шлёт сигналов.
+    """
+    if not Post.objects.filter(pk=post_id, image=name).exists():
+        # Картинку сменили или её уже очистила задача другого поста
+        # с тем же файлом.
+        return
+    clean = uploads.sanitize(name)
+    if clean != name:
+        Post.objects.filter(image=name).update(image=clean)
+        release(name)
+    with build_lock(clean):
+        thumbnail = get_thumbnail(clean, GEOMETRY, **OPTIONS)
+        variants.generate(clean, thumbnail.name)
+    for post in Post.objects.filter(image=clean).only('author', 'group'):
+        cards.bump('post', post.pk)
+        conditional.touch_post(post)
+
+
+def release(name, files=()):
+    """Удаляет файл, его миниатюры и варианты files, если он ничей.
+
+    Ссылки считаются запросом к индексу Post.image, а не счётчиком.
+    Файл моложе MEDIA_RELEASE_GRACE секунд остаётся: его могла только
+    что повторить загрузка, чей пост ещё не записан. Такие файлы потом
+    убирает сборщик мусора. Возвращает True, если файл удалён.
+    """
+    if not name or Post.objects.filter(image=name).exists():
+        return False
+    try:
+        age = time.time() - os.path.getmtime(media_storage.path(name))
+    except OSError:
+        return False
+    if age < settings.MEDIA_RELEASE_GRACE:
+        return False
+    delete_thumbnails(name, delete_file=False)
+    media_storage.delete(name)
+    for variant in files:
+        default_storage.delete(variant)
+    return True
+
+
+def release_on_commit(name, files=()):
+    """release после фиксации транзакции, которая отпустила файл."""
+    def run():
+        try:
+            release(name, files)
+        except Exception:
+            logger.exception('Не удалось удалить картинку %s', name)
+
+    if name:
+        transaction.on_commit(run)
+
+
+def build(post_id, name):
+    """render для пула потоков: ошибка пишется в лог."""
+    try:
+        render(post_id, name)
+    except Exception:
+        logger.exception('Не удалось построить миниатюру %s', name)
+    finally:
+        if settings.THUMBNAIL_WORKERS:
+            # Соединение потока пула не переживает задачу.
+            connection.close()
+
+
+def schedule(post):
+    """Ставит миниатюру поста в очередь задач.
+
+    При TASKS_EAGER она строится в пуле потоков после фиксации транзакции.
+    """
+    if not post.image:
+        return
+    if not settings.TASKS_EAGER:
+        queue.enqueue('thumbnails.build', post.pk, post.image.name)
+        return
+
+    def submit():
+        if settings.THUMBNAIL_WORKERS:
+            _get_executor().submit(build, post.pk, post.image.name)
+        else:
+            build(post.pk, post.image.name)
+
+    transaction.on_commit(submit)
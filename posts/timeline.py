@@ -0,0 +1,96 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, Q
+
+from .models import Follow, PopularAuthor, Post, Timeline
+
+POPULAR_CACHE_KEY = 'timeline:popular'
+
+
+def popular_author_ids():
+    """Авторы с отметкой PopularAuthor.
+
+    Их посты не раскладываются по лентам, а читаются при запросе.
+    Множество берётся из таблицы отметок, а не из текущего числа
+    подписчиков: иначе посты, не разложенные, пока автор был
+    популярен, пропали бы из лент, когда подписчиков станет меньше.
+    """
+    authors = cache.get(POPULAR_CACHE_KEY)
+    if authors is None:
+        authors = frozenset(PopularAuthor.objects.values_list(
+            'author_id', flat=True))
+        cache.set(POPULAR_CACHE_KEY, authors,
+                  settings.FOLLOW_TIMELINE_POPULAR_TTL)
+    return authors
+
+
+def is_popular(author_id):
+    """True, если посты автора читаются при запросе.
+
+    Автор, у которого подписчиков стало больше
+    FOLLOW_TIMELINE_FANOUT_LIMIT, получает отметку PopularAuthor.
+    """
+    if author_id in popular_author_ids():
+        return True
+    followers = Follow.objects.filter(author_id=author_id).count()
+    if followers <= settings.FOLLOW_TIMELINE_FANOUT_LIMIT:
+        return False
+    PopularAuthor.objects.get_or_create(author_id=author_id)
+    transaction.on_commit(lambda: cache.delete(POPULAR_CACHE_KEY))
+    return True
+
+
+def _bulk_insert(entries):
+    Timeline.objects.bulk_create(
+        entries, settings.FOLLOW_TIMELINE_BATCH, ignore_conflicts=True)
+
+
+def fan_out(post):
+    """Кладёт новый пост в ленты всех подписчиков автора."""
+    if is_popular(post.author_id):
+        return
+    followers = Follow.objects.filter(
+        author_id=post.author_id).values_list('user_id', flat=True)
+    _bulk_insert(
+        Timeline(user_id=user_id, post_id=post.id,
+                 author_id=post.author_id, pub_date=post.pub_date)
+        for user_id in followers.iterator())
+
+
+def backfill(follow):
+    """Переносит посты автора в ленту нового подписчика."""
+    if is_popular(follow.author_id):
+        return
+    posts = Post.objects.filter(author_id=follow.author_id).values_list(
+        'id', 'pub_date')
+    _bulk_insert(
+        Timeline(user_id=follow.user_id, post_id=post_id,
+                 author_id=follow.author_id, pub_date=pub_date)
+        for post_id, pub_date in posts.iterator())
+
+
+def drop(follow):
+    """Убирает посты автора из ленты отписавшегося."""
+    Timeline.objects.filter(
+        user_id=follow.user_id, author_id=follow.author_id).delete()
+
+
+def timeline_posts(user):
+    """Посты авторов, на которых подписан пользователь.
+
+    Обычно это один проход по индексу (user, pub_date) ленты.
+    Посты популярных авторов подмешиваются чтением при запросе.
+    """
+    popular = popular_author_ids()
+    if popular:
+        popular = list(Follow.objects.filter(
+            user_id=user.id, author_id__in=popular).values_list(
+            'author_id', flat=True))
+    if popular:
+        return Post.objects.feed().filter(
+            Q(id__in=Timeline.objects.filter(
+                user_id=user.id).values('post_id'))
+            | Q(author_id__in=popular))
+    return Post.objects.feed().filter(timeline__user_id=user.id).order_by(
+        '-timeline__pub_date', F('timeline__post_id').desc())
@@ -0,0 +1,279 @@
+"""Потоковая выгрузка и загрузка данных в NDJSON.
+
+Каждая строка — одна запись {"model": ..., ...}. Связи с пользователями
+и группами пишутся по username и slug, с постами — по старому id.
+Порядок моделей в файле: user, group, post, comment, follow.
+"""
+import gzip
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+from contextlib import contextmanager
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils.dateparse import parse_datetime
+
+from .models import Comment, Follow, Group, Post, User
+
+MODELS = ('user', 'group', 'post', 'comment', 'follow')
+EXPORT_FIELDS = {
+    'user': (User, ('username', 'first_name', 'last_name', 'email')),
+    'group': (Group, ('slug', 'title', 'description')),
+    'post': (Post, ('text', 'pub_date', 'author__username', 'group__slug',
+                    'image')),
+    'comment': (Comment, ('post_id', 'author__username', 'text', 'created')),
+    'follow': (Follow, ('user__username', 'author__username')),
+}
+
+
+def open_stream(path, mode):
+    """Файл, сжатый gzip при расширении .gz, или stdin для '-'."""
+    if path == '-' and mode == 'r':
+        return sys.stdin
+    if path.endswith('.gz'):
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+
+def _json_value(value):
+    return value.isoformat() if hasattr(value, 'isoformat') else value
+
+
+def export_rows(batch_size=1000):
+    """Записи всех моделей по порядку, страницами по id."""
+    for name in MODELS:
+        model, fields = EXPORT_FIELDS[name]
+        last_id = 0
+        while True:
+            rows = list(model.objects.filter(pk__gt=last_id).order_by(
+                'pk').values_list('pk', *fields)[:batch_size])
+            for pk, *values in rows:
+                record = {'model': name, 'id': pk}
+                for field, value in zip(fields, values):
+                    record[field.split('__')[0]] = _json_value(value)
+                yield record
+            if len(rows) < batch_size:
+                break
+            last_id = rows[-1][0]
+
+
+def export(stream, batch_size=1000):
+    """Пишет все записи в поток, возвращает число записей по моделям."""
+    counts = dict.fromkeys(MODELS, 0)
+    for record in export_rows(batch_size):
+        stream.write(json.dumps(record, ensure_ascii=False) + '\n')
+        counts[record['model']] += 1
+    return counts
+
+
+class IdMap:
+    """Соответствие старых ключей новым id во временной базе SQLite.
+
+    Словарь на десятки миллионов постов не поместился бы в память,
+    а таблица на диске читается пачками под каждую вставку.
+    """
+
+    def __init__(self):
+        handle, self.path = tempfile.mkstemp(suffix='.sqlite3')
+        os.close(handle)
+        self.db = sqlite3.connect(self.path)
+        self.db.execute('CREATE TABLE ids (kind TEXT, old TEXT, new INTEGER, '
+                        'PRIMARY KEY (kind, old)) WITHOUT ROWID')
+
+    def put_many(self, kind, pairs):
+        self.db.executemany(
+            'INSERT OR REPLACE INTO ids VALUES (?, ?, ?)',
+            ((kind, str(old), new) for old, new in pairs))
+
+    def get_many(self, kind, keys):
+        keys = list({str(key) for key in keys if key is not None})
+        result = {}
+        # Ограничение SQLite на число параметров в запросе.
+        for start in range(0, len(keys), 900):
+            chunk = keys[start:start + 900]
+            result.update(self.db.execute(
+                'SELECT old, new FROM ids WHERE kind = ? AND old IN ({})'
+                .format(', '.join('?' * len(chunk))), [kind, *chunk]))
+        return result
+
+    def close(self):
+        self.db.close()
+        os.remove(self.path)
+
+
+@contextmanager
+def keep_dates():
+    """Отключает auto_now_add, чтобы bulk_create сохранил даты из файла."""
+    fields = [Post._meta.get_field('pub_date'),
+              Comment._meta.get_field('created')]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+class Importer:
+    """Загружает записи пачками через bulk_create.
+
+    Id постов и комментариев выделяются от текущего максимума, поэтому
+    загрузка не пересекается с уже лежащими в базе записями.
+    """
+
+    def __init__(self, batch_size=1000):
+        self.batch_size = batch_size
+        self.ids = IdMap()
+        self.next_id = {}
+        self.created = dict.fromkeys(MODELS, 0)
+        self.skipped = dict.fromkeys(MODELS, 0)
+
+    def _allocate(self, model, count):
+        if model not in self.next_id:
+            self.next_id[model] = (
+                model.objects.aggregate(top=Max('pk'))['top'] or 0) + 1
+        start = self.next_id[model]
+        self.next_id[model] += count
+        return range(start, start + count)
+
+    def _users(self, names):
+        found = self.ids.get_many('user', names)
+        missing = set(names) - set(found)
+        if missing:
+            existing = dict(User.objects.filter(
+                username__in=missing).values_list('username', 'pk'))
+            self.ids.put_many('user', existing.items())
+            found.update(existing)
+        return found
+
+    def load_user(self, records):
+        names = [record['username'] for record in records]
+        known = self._users(names)
+        fresh = [record for record in records
+                 if record['username'] not in known]
+        password = make_password(None)
+        User.objects.bulk_create(
+            (User(username=record['username'], password=password,
+                  first_name=record.get('first_name', ''),
+                  last_name=record.get('last_name', ''),
+                  email=record.get('email', ''))
+             for record in fresh), batch_size=self.batch_size)
+        self.ids.put_many('user', User.objects.filter(
+            username__in=[record['username'] for record in fresh]
+        ).values_list('username', 'pk'))
+        self.created['user'] += len(fresh)
+        self.skipped['user'] += len(records) - len(fresh)
+
+    def load_group(self, records):
+        existing = dict(Group.objects.filter(
+            slug__in=[record['slug'] for record in records]
+        ).values_list('slug', 'pk'))
+        fresh = [record for record in records
+                 if record['slug'] not in existing]
+        Group.objects.bulk_create(
+            (Group(slug=record['slug'], title=record['title'],
+                   description=record['description']) for record in fresh),
+            batch_size=self.batch_size)
+        self.ids.put_many('group', Group.objects.filter(
+            slug__in=[record['slug'] for record in records]
+        ).values_list('slug', 'pk'))
+        self.created['group'] += len(fresh)
+        self.skipped['group'] += len(records) - len(fresh)
+
+    def load_post(self, records):
+        users = self._users([record['author'] for record in records])
+        groups = self.ids.get_many('group', [record.get('group')
+                                             for record in records])
+        total = len(records)
+        records = [record for record in records if record['author'] in users]
+        new_ids = self._allocate(Post, len(records))
+        Post.objects.bulk_create(
+            (Post(pk=pk, text=record['text'],
+                  pub_date=parse_datetime(record['pub_date']),
+                  author_id=users[record['author']],
+                  group_id=groups.get(record.get('group')),
+                  image=record.get('image') or None)
+             for pk, record in zip(new_ids, records)),
+            batch_size=self.batch_size)
+        self.ids.put_many('post', ((record['id'], pk) for pk, record
+                                   in zip(new_ids, records)))
+        self._count('post', total, len(records))
+
+    def load_comment(self, records):
+        users = self._users([record['author'] for record in records])
+        posts = self.ids.get_many('post', [record['post_id']
+                                           for record in records])
+        total = len(records)
+        records = [record for record in records
+                   if record['author'] in users
+                   and str(record['post_id']) in posts]
+        new_ids = self._allocate(Comment, len(records))
+        Comment.objects.bulk_create(
+            (Comment(pk=pk, text=record['text'],
+                     created=parse_datetime(record['created']),
+                     author_id=users[record['author']],
+                     post_id=posts[str(record['post_id'])])
+             for pk, record in zip(new_ids, records)),
+            batch_size=self.batch_size)
+        self._count('comment', total, len(records))
+
+    def load_follow(self, records):
+        users = self._users([name for record in records
+                             for name in (record['user'], record['author'])])
+        pairs = {(users[record['user']], users[record['author']])
+                 for record in records
+                 if record['user'] in users and record['author'] in users
+                 and record['user'] != record['author']}
+        existing = set(Follow.objects.filter(
+            user_id__in={user for user, _ in pairs},
+            author_id__in={author for _, author in pairs}
+        ).values_list('user_id', 'author_id'))
+        fresh = pairs - existing
+        Follow.objects.bulk_create(
+            (Follow(user_id=user, author_id=author)
+             for user, author in fresh), batch_size=self.batch_size)
+        self._count('follow', len(records), len(fresh))
+
+    def _count(self, name, total, created):
+        self.created[name] += created
+        self.skipped[name] += total - created
+
+    def flush(self, name, records):
+        if records:
+            with transaction.atomic():
+                getattr(self, f'load_{name}')(records)
+
+    def load(self, stream):
+        """Читает поток построчно, копит пачки по модели и сбрасывает их."""
+        name, batch = None, []
+        with keep_dates():
+            for line in stream:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                if record.get('model') not in MODELS:
+                    raise ValueError(f'Неизвестная модель: {line.strip()}')
+                if record['model'] != name or len(batch) >= self.batch_size:
+                    self.flush(name, batch)
+                    name, batch = record['model'], []
+                batch.append(record)
+            self.flush(name, batch)
+        self.reset_sequences()
+        return self.created, self.skipped
+
+    def reset_sequences(self):
+        """Сдвигает последовательности id за явно выданные значения."""
+        statements = connection.ops.sequence_reset_sql(
+            no_style(), [User, Group, Post, Comment, Follow])
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
+
+    def close(self):
+        self.ids.close()
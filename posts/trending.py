@@ -0,0 +1,129 @@
+"""Популярные посты и группы с экспоненциальным затуханием.
+
+Событие с весом w в момент t (публикация поста или комментарий к нему)
+к моменту T стоит w·exp(-λ(T - t)), λ = ln 2 / TRENDING_HALF_LIFE.
+Множитель exp(-λT) у всех записей общий, поэтому хранится только
+log Σ w·exp(λ(t - EPOCH)). Такой рейтинг не пересчитывается со
+временем: новое событие прибавляется через logaddexp, а порядок по
+нему совпадает с порядком по затухшей сумме. Логарифм нужен потому,
+что сама экспонента от даты переполнила бы float уже через полгода.
+
+update забирает события после последнего учтённого id каждого
+источника (TrendingMark) и убирает записи, остывшие ниже
+TRENDING_MIN_SCORE. Лента и боковая панель читают готовые таблицы
+по индексу рейтинга.
+"""
+import datetime as dt
+import math
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from . import conditional
+from .models import (Comment, Group, Post, TrendingGroup, TrendingMark,
+                     TrendingPost)
+
+EPOCH = dt.datetime(2020, 1, 1, tzinfo=dt.timezone.utc)
+
+
+def _sources():
+    """Источник: (события (id, пост, группа, момент), вес события)."""
+    return {
+        'post': (Post.objects.values_list('pk', 'pk', 'group_id',
+                                          'pub_date'),
+                 settings.TRENDING_POST_WEIGHT),
+        'comment': (Comment.objects.values_list('pk', 'post_id',
+                                                'post__group_id', 'created'),
+                    settings.TRENDING_COMMENT_WEIGHT),
+    }
+
+
+def _rate():
+    return math.log(2) / settings.TRENDING_HALF_LIFE
+
+
+def log_weight(weight, moment):
+    """Вклад события в рейтинг, в логарифме и приведённый к EPOCH."""
+    return math.log(weight) + _rate() * (moment - EPOCH).total_seconds()
+
+
+def logaddexp(left, right):
+    """log(exp(left) + exp(right)) без переполнения; left может быть None."""
+    if left is None:
+        return right
+    high, low = max(left, right), min(left, right)
+    return high + math.log1p(math.exp(low - high))
+
+
+def floor(now):
+    """Рейтинг, ниже которого запись к моменту now считается остывшей."""
+    return log_weight(settings.TRENDING_MIN_SCORE, now)
+
+
+def _merge(model, scores):
+    existing = model.objects.in_bulk(list(scores))
+    for pk, record in existing.items():
+        record.score = logaddexp(record.score, scores[pk])
+    model.objects.bulk_update(existing.values(), ['score'])
+    model.objects.bulk_create(
+        model(pk=pk, score=score) for pk, score in scores.items()
+        if pk not in existing)
+
+
+def _consume(source, events, weight, batch, now):
+    """Учитывает до batch событий источника; возвращает их число."""
+    with transaction.atomic():
+        mark, _ = TrendingMark.objects.get_or_create(source=source)
+        rows = list(events.filter(pk__gt=mark.last_id).order_by(
+            'pk')[:batch])
+        if not rows:
+            return 0
+        cold = floor(now)
+        posts, groups = {}, {}
+        for _, post_id, group_id, moment in rows:
+            value = log_weight(weight, moment)
+            if value < cold:
+                continue
+            posts[post_id] = logaddexp(posts.get(post_id), value)
+            if group_id is not None:
+                groups[group_id] = logaddexp(groups.get(group_id), value)
+        _merge(TrendingPost, posts)
+        _merge(TrendingGroup, groups)
+        mark.last_id = rows[-1][0]
+        mark.save()
+    return len(rows)
+
+
+def update(batch=1000, now=None):
+    """Добавляет в рейтинг новые события и убирает остывшие записи.
+
+    Каждая пачка фиксируется вместе со своей отметкой, поэтому
+    прерванный запуск продолжается с того же места. Возвращает число
+    учтённых событий и удалённых записей.
+    """
+    now = now or timezone.now()
+    events = 0
+    for source, (queryset, weight) in _sources().items():
+        while True:
+            done = _consume(source, queryset, weight, batch, now)
+            events += done
+            if done < batch:
+                break
+    cold = floor(now)
+    removed = (TrendingPost.objects.filter(score__lt=cold).delete()[0]
+               + TrendingGroup.objects.filter(score__lt=cold).delete()[0])
+    conditional.touch('trending')
+    return events, removed
+
+
+def posts():
+    """Посты по рейтингу: чтение по индексу posts_trending_post."""
+    return Post.objects.feed().filter(trending__isnull=False).order_by(
+        '-trending__score')
+
+
+def groups(limit=None):
+    """Группы по рейтингу для боковой панели."""
+    return Group.objects.filter(trending__isnull=False).order_by(
+        '-trending__score')[:limit or settings.TRENDING_GROUPS]
@@ -0,0 +1,114 @@
+"""Приём картинок постов: проверка на лету и очистка вне запроса.
+
+ImageUploadHandler смотрит на файл, пока тело запроса ещё читается.
+Формат и размеры Pillow берёт из заголовка, пиксели не декодирует.
+Файл больше IMAGE_UPLOAD_MAX_BYTES или с числом пикселей больше
+IMAGE_UPLOAD_MAX_PIXELS отбрасывается, не дочитываясь ни в память,
+ни во временный файл. Полное декодирование с перекодированием без
+метаданных (sanitize) выполняется вместе с миниатюрами, в фоне.
+"""
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.uploadhandler import FileUploadHandler, SkipFile
+from django.template.defaultfilters import filesizeformat
+from PIL import Image, ImageOps
+
+from .storage import media_storage
+
+# Сколько байт начала файла ждать, пока Pillow не распознает заголовок:
+# у JPEG перед размерами может лежать EXIF с миниатюрой.
+HEADER_LIMIT = 256 * 1024
+SAVE_OPTIONS = {
+    'JPEG': {'quality': 90, 'optimize': True},
+    'PNG': {'optimize': True},
+    'WEBP': {'quality': 90},
+    'GIF': {},
+}
+# Ключи Image.info с метаданными, которые sanitize убирает.
+METADATA_KEYS = ('exif', 'xmp', 'XML:com.adobe.xmp', 'comment')
+
+
+class ImageUploadHandler(FileUploadHandler):
+    """Фильтр перед штатными обработчиками загрузки Django.
+
+    Данные проходят дальше без изменений; отклонённый файл пропускается
+    через SkipFile, а причина остаётся в request.upload_errors для
+    PostForm.
+    """
+
+    def new_file(self, field_name, *args, **kwargs):
+        super().new_file(field_name, *args, **kwargs)
+        self.active = field_name in settings.IMAGE_UPLOAD_FIELDS
+        self.header = b''
+        self.size = 0
+        self.checked = False
+
+    def receive_data_chunk(self, raw_data, start):
+        if not self.active:
+            return raw_data
+        self.size += len(raw_data)
+        if self.size > settings.IMAGE_UPLOAD_MAX_BYTES:
+            self.reject('Файл больше {}.'.format(
+                filesizeformat(settings.IMAGE_UPLOAD_MAX_BYTES)))
+        if not self.checked:
+            self.header += raw_data
+            self.checked = self.check_header()
+        return raw_data
+
+    def file_complete(self, file_size):
+        # Заголовок так и не распознан: файл целиком проверит ImageField.
+        return None
+
+    def check_header(self):
+        """True, если заголовок прочитан и прошёл проверку."""
+        try:
+            image = Image.open(BytesIO(self.header))
+        except Image.DecompressionBombError:
+            self.reject_pixels()
+        except Exception:
+            if len(self.header) >= HEADER_LIMIT:
+                self.reject('Загрузите изображение в формате '
+                            + ', '.join(settings.IMAGE_UPLOAD_FORMATS) + '.')
+            return False
+        if image.format not in settings.IMAGE_UPLOAD_FORMATS:
+            self.reject(f'Формат {image.format} не поддерживается.')
+        width, height = image.size
+        if width * height > settings.IMAGE_UPLOAD_MAX_PIXELS:
+            self.reject_pixels()
+        self.header = b''
+        return True
+
+    def reject_pixels(self):
+        self.reject('В изображении больше {:g} Мпикс.'.format(
+            settings.IMAGE_UPLOAD_MAX_PIXELS / 1000000))
+
+    def reject(self, message):
+        errors = self.request.__dict__.setdefault('upload_errors', {})
+        errors[self.field_name] = message
+        raise SkipFile(message)
+
+
+def sanitize(name):
+    """Перекодирует картинку из хранилища без метаданных.
+
+    EXIF с геометкой и прочим не попадает в новый файл, а поворот
+    из EXIF применяется к пикселям. Анимированные GIF не трогаем:
+    кадры пришлось бы собирать заново, а картинку без метаданных —
+    незачем: повторное сжатие только теряет качество. Имя файла — хеш
+    содержимого, поэтому очищенная картинка ложится под новым именем;
+    его функция и возвращает (или прежнее, если файл не менялся).
+    """
+    with media_storage.open(name) as source:
+        image = Image.open(source)
+        fmt = image.format
+        if fmt not in SAVE_OPTIONS or getattr(image, 'is_animated', False):
+            return name
+        if not image.getexif() and not any(
+                key in image.info for key in METADATA_KEYS):
+            return name
+        image = ImageOps.exif_transpose(image)
+        buffer = BytesIO()
+        image.save(buffer, fmt, **SAVE_OPTIONS[fmt])
+    return media_storage.save(name, ContentFile(buffer.getvalue()))
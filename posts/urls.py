@@ -1,6 +1,6 @@
 from django.urls import path
 
-from . import views
+from . import feeds, views
 
 app_name = 'posts'
 
@@ -11,6 +11,21 @@ urlpatterns = [
     path('new/',
          views.post_new,
          name='post_new'),
+    path('feeds/posts.<str:fmt>',
+         feeds.index_feed,
+         name='index_feed'),
+    path('feeds/group/<slug:slug>.<str:fmt>',
+         feeds.group_feed,
+         name='group_feed'),
+    path('feeds/author/<str:username>.<str:fmt>',
+         feeds.author_feed,
+         name='author_feed'),
+    path('search/',
+         views.search,
+         name='search'),
+    path('trending/',
+         views.trending_posts,
+         name='trending'),
     path('follow/',
          views.follow_index,
          name='follow_index'),
@@ -28,6 +43,9 @@ urlpatterns = [
     path('<str:username>/<int:post_id>/edit/',
          views.post_edit,
          name='post_edit'),
+    path('<str:username>/<int:post_id>/comments/',
+         views.post_comments,
+         name='post_comments'),
     path('<str:username>/<int:post_id>/comment/',
          views.add_comment,
          name='add_comment'),
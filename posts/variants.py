@@ -0,0 +1,132 @@
+import json
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+from .models import Post
+from .storage import save_fixed
+
+# Пропорции карточки поста 960x339.
+ASPECT = 339 / 960
+# Порядок важен: браузер берёт первый понятный ему <source>.
+FORMATS = (
+    ('AVIF', 'image/avif', 'avif'),
+    ('WEBP', 'image/webp', 'webp'),
+    ('JPEG', 'image/jpeg', 'jpg'),
+)
+
+
+def supported_formats():
+    """Форматы из FORMATS, которые умеет сохранять установленный Pillow."""
+    Image.init()
+    return [fmt for fmt in FORMATS if fmt[0] in Image.SAVE]
+
+
+def _encode(image, fmt):
+    buffer = BytesIO()
+    image.save(buffer, fmt, quality=settings.IMAGE_VARIANT_QUALITY)
+    return buffer.getvalue()
+
+
+def build_variants(name, storage=default_storage):
+    """Режет изображение на набор ширин во всех доступных форматах.
+
+    Ширины больше исходника не строятся, самая узкая есть всегда.
+    Возвращает список {'width', 'format', 'name'}.
+    """
+    with storage.open(name) as source:
+        image = Image.open(source)
+        image.load()
+    image = ImageOps.exif_transpose(image).convert('RGB')
+    widths = [width for width in settings.IMAGE_VARIANT_WIDTHS
+              if width <= image.width] or settings.IMAGE_VARIANT_WIDTHS[:1]
+    stem = os.path.splitext(os.path.basename(name))[0]
+    variants = []
+    for width in widths:
+        resized = ImageOps.fit(image, (width, round(width * ASPECT)),
+                               Image.LANCZOS)
+        for fmt, mime, ext in supported_formats():
+            variant = save_fixed(
+                storage, f'posts/variants/{stem}-{width}.{ext}',
+                ContentFile(_encode(resized, fmt)))
+            variants.append({'width': width, 'format': mime,
+                             'name': variant})
+    return variants
+
+
+def generate(name, thumbnail=''):
+    """Строит варианты файла и записывает их во все посты с этим файлом.
+
+    Варианты строятся один раз на исходный файл: одинаковые картинки
+    разных постов — один файл с именем по хешу, и его готовые варианты
+    берутся у первого поста, где они уже записаны. Вместе с ними в пост
+    ложится имя готовой миниатюры thumbnail: запись в базе, а не в кэше,
+    и есть признак того, что картинка обработана.
+    """
+    posts = Post.objects.filter(image=name)
+    data = None
+    for recorded in posts.exclude(image_variants='').values_list(
+            'image_variants', flat=True).iterator():
+        loaded = _load(recorded)
+        if loaded is not None and loaded['source'] == name:
+            data = json.dumps({**loaded, 'thumbnail': thumbnail})
+            break
+    if data is None:
+        data = json.dumps({'source': name, 'thumbnail': thumbnail,
+                           'variants': build_variants(name)})
+    posts.exclude(image_variants=data).update(image_variants=data)
+
+
+def _load(raw):
+    """Разбирает запись о вариантах; битая или неполная запись — None."""
+    try:
+        data = json.loads(raw)
+    except ValueError:
+        return None
+    if (not isinstance(data, dict) or not data.get('source')
+            or not isinstance(data.get('variants'), list)):
+        return None
+    return data
+
+
+def _record(post):
+    """Запись о вариантах, если она сделана для текущей картинки поста."""
+    if not post.image or not post.image_variants:
+        return None
+    data = _load(post.image_variants)
+    if data is None or data['source'] != post.image.name:
+        return None
+    return data
+
+
+def files(post):
+    """Имена файлов вариантов, записанных в пост для его картинки."""
+    data = _record(post)
+    if data is None:
+        return []
+    return [variant['name'] for variant in data['variants']]
+
+
+def thumbnail(post):
+    """Имя готовой миниатюры картинки поста или пустая строка."""
+    data = _record(post)
+    return data.get('thumbnail', '') if data else ''
+
+
+def sources(post, storage=default_storage):
+    """Группы srcset по форматам в порядке предпочтения браузера."""
+    data = _record(post)
+    if data is None:
+        return []
+    result = []
+    for _, mime, _ in FORMATS:
+        srcset = ', '.join(
+            f'{storage.url(variant["name"])} {variant["width"]}w'
+            for variant in data['variants'] if variant['format'] == mime)
+        if srcset:
+            result.append({'type': mime, 'srcset': srcset})
+    return result
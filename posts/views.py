@@ -1,73 +1,171 @@
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
+from django.db import IntegrityError, transaction
+from django.http import JsonResponse
 from django.shortcuts import get_object_or_404, render, redirect
+from django.urls import reverse
 from django.core.paginator import Paginator
 
+from yatube.db_router import read_replica
 from yatube.settings import COUNT_PAGE
+from . import follow_graph, thumbnails, timeline, trending, variants
+from .conditional import (conditional_page, group_state, index_state,
+                          page_group, page_post, page_stats, page_user,
+                          post_state, profile_state, trending_state)
 from .forms import PostForm, CommentForm
-from .models import Group, Post, User, Comment, Follow
+from .models import Post, User, Comment, Follow
+from .pagination import CursorPaginator, encode_cursor
+from .search import search_posts
 
 
 def pagination_page(request, post_list=None, pages=COUNT_PAGE):
-    """Определяет кол-во страниц и записей на них."""
+    """Определяет кол-во страниц и записей на них.
+
+    Если в запросе передан курсор или включён PAGINATION_CURSOR,
+    страница строится по ключу (pub_date, id) без COUNT и OFFSET.
+    """
     if post_list is None:
         post_list = {}
+    cursor = request.GET.get('cursor')
+    if cursor is not None or settings.PAGINATION_CURSOR:
+        return CursorPaginator(post_list, pages).get_page(cursor)
     paginator = Paginator(post_list, pages)
     page_number = request.GET.get('page')
     return paginator.get_page(page_number)
 
 
+@read_replica
+@conditional_page(index_state)
 def index(request):
-    post_list = pagination_page(request, Post.objects.all())
+    post_list = pagination_page(request, Post.objects.feed())
     return render(request, 'index.html', {'page': post_list, 'index': True})
 
 
+@read_replica
+@conditional_page(trending_state)
+def trending_posts(request):
+    """Популярное: посты и группы по рейтингу из update_trending."""
+    # Курсор ключуется по дате, а лента упорядочена по рейтингу.
+    page = Paginator(trending.posts(), COUNT_PAGE).get_page(
+        request.GET.get('page'))
+    return render(request, 'trending.html', {
+        'page': page, 'groups': trending.groups(), 'trending': True})
+
+
+@read_replica
+@conditional_page(group_state)
 def group_posts(request, slug):
-    group = get_object_or_404(Group, slug=slug)
-    post_list = pagination_page(request, Post.objects.filter(group=group))
+    group = page_group(request, slug)
+    post_list = pagination_page(
+        request, Post.objects.feed().filter(group=group))
     return render(request, 'group.html',
                   {'group': group, 'page': post_list})
 
 
+def search(request):
+    """Поиск по текстам постов и комментариев, по релевантности."""
+    query = request.GET.get('q', '').strip()
+    page = search_posts(query, request.GET.get('cursor'), COUNT_PAGE)
+    return render(request, 'search.html', {'page': page, 'query': query})
+
+
+@read_replica
+@conditional_page(profile_state)
 def profile(request, username):
-    user = get_object_or_404(User, username=username)
-    post_list = Post.objects.filter(author=user)
-    user_following = Follow.objects.filter(author_id=user.id).values_list(
-        'author_id', flat=True).count()
+    user = page_user(request, username)
+    post_list = Post.objects.feed().filter(author=user)
+    stats = page_stats(request, user)
     following = Follow.objects.filter(
-        user_id=request.user.id, author_id=user.id).count()
-    follow = Follow.objects.filter(user_id=user.id).count()
+        user_id=request.user.id, author_id=user.id).exists()
+    recommended = (follow_graph.who_to_follow(user.pk)
+                   if request.user.pk == user.pk else [])
     context = {
         'author': user,
-        'count_posts': post_list.count(),
+        'count_posts': stats.posts,
         'page': pagination_page(request, post_list),
         'following': following,
-        'follow': follow,
-        'user_following': user_following}
+        'follow': stats.following,
+        'user_following': stats.followers,
+        'recommended': recommended}
     return render(request, 'profile.html', context)
 
 
+def _comments(post):
+    return Comment.objects.filter(post_id=post.pk).select_related(
+        'author').order_by('-created', '-id')
+
+
+def _comments_url(post, cursor):
+    return '{}?cursor={}'.format(reverse(
+        'posts:post_comments',
+        kwargs={'username': post.author.username, 'post_id': post.pk}),
+        cursor)
+
+
+def first_comments(post):
+    """Свежие комментарии для страницы поста и адрес подгрузки.
+
+    Есть ли продолжение, известно из счётчика comments_count,
+    поэтому хватает одного запроса на COMMENTS_PAGE строк.
+    """
+    comments = _comments(post)[:settings.COMMENTS_PAGE]
+    next_url = None
+    if post.comments_count > settings.COMMENTS_PAGE and comments:
+        last = list(comments)[-1]
+        next_url = _comments_url(post, encode_cursor(last.created, last.pk))
+    return comments, next_url
+
+
+@read_replica
+@conditional_page(post_state)
 def post_view(request, username, post_id):
-    user = get_object_or_404(User, username=username)
-    post_list = Post.objects.filter(author=user)
-    comment_list = Comment.objects.filter(post=post_id)
+    user = page_user(request, username)
     form = CommentForm(request.POST or None)
-    post = Post.objects.get(pk=post_id)
+    post = page_post(request, post_id)
+    comment_list, next_url = first_comments(post)
+    stats = page_stats(request, user)
     context = {
         'author': post.author,
         'text': post,
         'post_id': post.id,
         'comment_list': comment_list,
+        'comments_next_url': next_url,
         'form': form,
-        'count_posts': post_list.count()}
+        'count_posts': stats.posts,
+        'follow': stats.following,
+        'user_following': stats.followers}
     return render(request, 'post.html', context)
 
 
+def post_comments(request, username, post_id):
+    """Подгрузка комментариев: HTML-фрагмент или JSON при format=json."""
+    post = get_object_or_404(Post.objects.select_related('author'),
+                             pk=post_id, author__username=username)
+    page = CursorPaginator(_comments(post), settings.COMMENTS_PAGE,
+                           field='created').get_page(request.GET.get('cursor'))
+    next_url = (_comments_url(post, page.next_cursor)
+                if page.has_next() else None)
+    if request.GET.get('format') == 'json':
+        return JsonResponse({
+            'comments': [{'id': comment.id,
+                          'author': comment.author.username,
+                          'text': comment.text,
+                          'created': comment.created.isoformat()}
+                         for comment in page],
+            'next': next_url})
+    return render(request, 'includes/comment_list.html',
+                  {'comments': page, 'next_url': next_url})
+
+
 @login_required
+@transaction.atomic
 def post_new(request):
-    form = PostForm(request.POST or None, files=request.FILES or None)
+    form = PostForm(request.POST or None, files=request.FILES or None,
+                    upload_errors=getattr(request, 'upload_errors', None))
     if form and form.is_valid():
         form.instance.author = request.user
-        form.save()
+        post = form.save()
+        thumbnails.schedule(post)
         return redirect('posts:index')
     return render(
         request, 'post_new.html',
@@ -77,13 +175,19 @@ def post_new(request):
 @login_required
 def post_edit(request, username, post_id):
     post = get_object_or_404(Post, pk=post_id)
+    # Форма заменит картинку в post, старую отпускаем после сохранения.
+    old_image, old_files = post.image.name, variants.files(post)
     form = PostForm(request.POST or None, files=request.FILES or None,
-                    instance=post)
+                    instance=post,
+                    upload_errors=getattr(request, 'upload_errors', None))
     if post.author != request.user:
         return redirect('posts:post', username=username, post_id=post_id)
     if form and form.is_valid():
         post = form.save(commit=False)
         post.save()
+        if 'image' in form.changed_data:
+            thumbnails.schedule(post)
+            thumbnails.release_on_commit(old_image, old_files)
         return redirect('posts:post', username=username, post_id=post_id)
     return render(
         request, 'post_new.html', {'form': form, 'post': post,
@@ -105,6 +209,7 @@ def server_error(request):
 
 
 @login_required
+@transaction.atomic
 def add_comment(request, username, post_id):
     post = get_object_or_404(Post, pk=post_id)
     form = CommentForm(request.POST or None)
@@ -116,30 +221,41 @@ def add_comment(request, username, post_id):
     return render(request, 'comments.html', {'form': form})
 
 
+@read_replica
 @login_required
 def follow_index(request):
     """Посты авторов на которых подписан пользователь."""
+    if settings.FOLLOW_TIMELINE:
+        post_list = pagination_page(
+            request, timeline.timeline_posts(request.user))
+        return render(request, 'follow.html',
+                      {'page': post_list, 'follow': True})
     authors = Follow.objects.filter(user_id=request.user.id).values_list(
         'author_id', flat=True)
     username = User.objects.filter(id__in=authors)
-    post_list = pagination_page(request, Post.objects.filter(
+    post_list = pagination_page(request, Post.objects.feed().filter(
         author__in=username))
     return render(request, 'follow.html', {'page': post_list, 'follow': True})
 
 
 @login_required
+@transaction.atomic
 def profile_follow(request, username):
     """Подписка на интересного автора."""
     user = get_object_or_404(User, username=username)
-    following = Follow.objects.filter(
-        user_id=request.user.id, author_id=user.id).count()
-    if request.user.id != user.id and following < 1:
-        follow = Follow(user=request.user, author=user)
-        follow.save()
+    if request.user.id != user.id:
+        try:
+            # Повторная подписка упирается в уникальность (user, author);
+            # точка сохранения откатывает только её.
+            with transaction.atomic():
+                Follow.objects.create(user=request.user, author=user)
+        except IntegrityError:
+            pass
     return redirect('posts:follow_index')
 
 
 @login_required
+@transaction.atomic
 def profile_unfollow(request, username):
     user = get_object_or_404(User, username=username)
     Follow.objects.filter(user_id=request.user.id, author_id=user.id).delete()
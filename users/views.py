@@ -1,6 +1,8 @@
 from django.shortcuts import redirect, render
 from django.views.generic import CreateView
 from django.urls import reverse_lazy
+
+from posts import queue
 from .forms import ContactForm, CreationForm
 
 
@@ -9,6 +11,17 @@ class SignUp(CreateView):
     success_url = reverse_lazy('signup')
     template_name = 'signup.html'
 
+    def form_valid(self, form):
+        response = super().form_valid(form)
+        user = self.object
+        if user.email:
+            # Письмо отправит обработчик очереди, а не запрос.
+            queue.enqueue(
+                'mail.send', 'Добро пожаловать в Yatube',
+                f'{user.username}, вы зарегистрировались в Yatube.',
+                [user.email])
+        return response
+
 
 def user_contact(request):
     if request.method == 'POST':
@@ -0,0 +1,163 @@
+"""ASGI-точка входа: Django 2.2 под ASGI-сервером через пул потоков.
+
+Асинхронных представлений в Django 2.2 нет, поэтому приложение
+переводит ASGI-запрос в WSGI-окружение. Тело запроса читается и ответ
+отправляется в цикле событий, а поток пула занят только, пока работает
+Django: медленный клиент не держит поток, и один процесс обслуживает
+много таких клиентов. Потоковый ответ итерируется в своём потоке
+до конца: курсор базы привязан к соединению этого потока.
+"""
+import asyncio
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from tempfile import SpooledTemporaryFile
+
+from django.conf import settings
+from django.core.wsgi import get_wsgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+
+# Тело запроса больше этого размера уходит из памяти во временный файл.
+BODY_MEMORY_SIZE = 1024 * 1024
+
+
+def environ(scope, body):
+    """WSGI-окружение по ASGI-scope HTTP-запроса."""
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    result = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', ''),
+        # WSGI передаёт путь байтами в latin-1, ASGI — строкой UTF-8.
+        'PATH_INFO': scope['path'].encode().decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': f'HTTP/{scope.get("http_version", "1.1")}',
+        'REMOTE_ADDR': client[0],
+        'REMOTE_PORT': str(client[1]),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': body,
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    for name, value in scope.get('headers', ()):
+        key = name.decode('latin-1').upper().replace('-', '_')
+        if key not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            key = f'HTTP_{key}'
+        value = value.decode('latin-1')
+        if key in result:
+            separator = '; ' if key == 'HTTP_COOKIE' else ','
+            value = result[key] + separator + value
+        result[key] = value
+    return result
+
+
+class WsgiToAsgi:
+    """ASGI-приложение поверх WSGI-приложения и пула из workers потоков."""
+
+    def __init__(self, wsgi_application, workers):
+        self.wsgi_application = wsgi_application
+        self.executor = ThreadPoolExecutor(workers,
+                                           thread_name_prefix='asgi')
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+        elif scope['type'] == 'http':
+            await self.http(scope, receive, send)
+        else:
+            raise ValueError(f'Тип соединения не поддерживается: '
+                             f'{scope["type"]}')
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.executor.shutdown(wait=True)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def read_body(self, receive):
+        """Тело запроса или None, если клиент отключился раньше."""
+        body = SpooledTemporaryFile(BODY_MEMORY_SIZE)
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                body.close()
+                return None
+            body.write(message.get('body', b''))
+            if not message.get('more_body', False):
+                body.seek(0)
+                return body
+
+    async def http(self, scope, receive, send):
+        body = await self.read_body(receive)
+        if body is None:
+            return
+        loop = asyncio.get_running_loop()
+        with body:
+            ready = await loop.run_in_executor(
+                self.executor, self.handle, loop, environ(scope, body),
+                send, scope['method'] == 'HEAD')
+        if ready is not None:
+            start, content = ready
+            await send(start)
+            await send({'type': 'http.response.body', 'body': content})
+
+    def handle(self, loop, environ, send, head):
+        """Выполняется в потоке пула.
+
+        Собранный ответ Django возвращается в цикл событий, и поток
+        свободен, пока клиент его читает; потоковый ответ отправляется
+        отсюда же по мере итерации.
+        """
+        start = {'type': 'http.response.start'}
+
+        def start_response(status, headers, exc_info=None):
+            start['status'] = int(status.split(' ', 1)[0])
+            start['headers'] = [
+                (name.lower().encode('latin-1'), value.encode('latin-1'))
+                for name, value in headers]
+
+        result = self.wsgi_application(environ, start_response)
+        # HttpResponse Django и список — уже собранное тело.
+        buffered = (isinstance(result, (list, tuple))
+                    or getattr(result, 'streaming', None) is False)
+        try:
+            if buffered:
+                return start, b'' if head else b''.join(result)
+            self.stream(loop, send, start, result, head)
+        finally:
+            if hasattr(result, 'close'):
+                result.close()
+        return None
+
+    def stream(self, loop, send, start, chunks, head):
+        def emit(message):
+            asyncio.run_coroutine_threadsafe(send(message), loop).result()
+
+        started = False
+        for chunk in chunks:
+            if not started:
+                emit(start)
+                started = True
+            if chunk and not head:
+                emit({'type': 'http.response.body', 'body': chunk,
+                      'more_body': True})
+        if not started:
+            emit(start)
+        emit({'type': 'http.response.body', 'body': b''})
+
+
+def get_asgi_application():
+    return WsgiToAsgi(get_wsgi_application(), settings.ASGI_THREADS)
+
+
+application = get_asgi_application()
@@ -0,0 +1,110 @@
+import glob
+import os
+import random
+import re
+import threading
+from collections import Counter
+
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core.cache import caches
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.http import JsonResponse
+
+_MISS = object()
+# Счётчики общие для всех потоков процесса: django.core.cache.caches
+# создаёт отдельный экземпляр бэкенда на каждый поток.
+_stats = {}
+_stats_locks = {}
+
+
+def namespace(key):
+    """Пространство имён ключа по его префиксу до первого двоеточия."""
+    prefix = re.split('[:|]', key, 1)[0]
+    return settings.CACHE_NAMESPACES.get(prefix, 'other')
+
+
+class StatsMixin:
+    """Считает попадания, промахи и вытеснения по пространствам имён.
+
+    Счётчики живут в памяти процесса: это цена за то, что учёт
+    не добавляет обращений к самому кэшу.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(location, params)
+        name = (type(self).__name__, location)
+        self._stats_lock = _stats_locks.setdefault(name, threading.Lock())
+        self._stats = _stats.setdefault(name, {
+            'hits': Counter(), 'misses': Counter(), 'evictions': Counter()})
+
+    def _count(self, kind, name, amount=1):
+        with self._stats_lock:
+            self._stats[kind][name] += amount
+
+    def get(self, key, default=None, version=None):
+        value = super().get(key, _MISS, version)
+        if value is _MISS:
+            self._count('misses', namespace(key))
+            return default
+        self._count('hits', namespace(key))
+        return value
+
+    def stats(self):
+        with self._stats_lock:
+            names = set().union(*self._stats.values())
+            names.update(settings.CACHE_NAMESPACES.values())
+            return {name: {kind: counter[name]
+                           for kind, counter in self._stats.items()}
+                    for name in sorted(names)}
+
+
+class LocMemStatsCache(StatsMixin, LocMemCache):
+    """Кэш в памяти процесса: для разработки и тестов."""
+
+    def _cull(self):
+        before = dict.fromkeys(self._cache)
+        super()._cull()
+        for key in before.keys() - self._cache.keys():
+            self._count('evictions', namespace(key.split(':', 2)[2]))
+
+
+class FileStatsCache(StatsMixin, FileBasedCache):
+    """Общий для всех воркеров кэш в файлах.
+
+    Каждое пространство имён лежит в своём подкаталоге, поэтому
+    вытеснение можно учесть по пространствам.
+    """
+
+    def _key_to_file(self, key, version=None):
+        path = super()._key_to_file(key, version)
+        directory = os.path.join(self._dir, namespace(key))
+        os.makedirs(directory, 0o700, exist_ok=True)
+        return os.path.join(directory, os.path.basename(path))
+
+    def _list_cache_files(self):
+        if not os.path.exists(self._dir):
+            return []
+        return glob.glob(os.path.join(self._dir, '*', '*' + self.cache_suffix))
+
+    def _cull(self):
+        filelist = self._list_cache_files()
+        num_entries = len(filelist)
+        if num_entries < self._max_entries:
+            return
+        if self._cull_frequency:
+            filelist = random.sample(
+                filelist, int(num_entries / self._cull_frequency))
+        for fname in filelist:
+            self._delete(fname)
+            self._count('evictions',
+                        os.path.basename(os.path.dirname(fname)))
+
+
+@staff_member_required
+def cache_stats(request):
+    """Статистика кэшей текущего процесса в JSON."""
+    data = {alias: caches[alias].stats() for alias in settings.CACHES
+            if hasattr(caches[alias], 'stats')}
+    return JsonResponse({'pid': os.getpid(), 'caches': data})
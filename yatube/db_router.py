@@ -0,0 +1,85 @@
+"""Чтение лент из реплик, запись — в основную базу.
+
+Представления с декоратором read_replica читают из одной случайной
+реплики на запрос. Всё остальное, любые чтения после записи в том же
+запросе и запросы клиента, который недавно писал, идут в default:
+реплика может отставать, а автор должен сразу видеть свой пост.
+"""
+import random
+import threading
+from functools import wraps
+
+from django.conf import settings
+
+# Cookie «читать из основной базы», пока реплики догоняют запись.
+STICKY_COOKIE = 'db_primary'
+
+_local = threading.local()
+
+
+def current_replica():
+    """Реплика для чтений текущего запроса или None."""
+    if getattr(_local, 'wrote', False):
+        return None
+    return getattr(_local, 'replica', None)
+
+
+class PrimaryReplicaRouter:
+    """Роутер: чтения в реплику запроса, запись и миграции — в default."""
+
+    def db_for_read(self, model, **hints):
+        return current_replica() or 'default'
+
+    def db_for_write(self, model, **hints):
+        _local.wrote = True
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики — копии default, объекты из них связаны между собой.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in settings.DATABASE_REPLICAS
+
+
+def read_replica(view):
+    """Декоратор: чтения представления идут в реплику, если можно.
+
+    Реплика не выбирается для небезопасных методов и для клиента
+    с cookie STICKY_COOKIE.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        replicas = settings.DATABASE_REPLICAS
+        if (replicas and request.method in ('GET', 'HEAD')
+                and STICKY_COOKIE not in request.COOKIES):
+            _local.replica = random.choice(replicas)
+        try:
+            return view(request, *args, **kwargs)
+        finally:
+            _local.replica = None
+    return wrapper
+
+
+class PrimaryStickyMiddleware:
+    """Ставит STICKY_COOKIE клиенту, чей запрос писал в базу.
+
+    Стоит снаружи SessionMiddleware, чтобы учесть и запись сессии.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        _local.wrote = False
+        try:
+            response = self.get_response(request)
+            wrote = _local.wrote
+        finally:
+            _local.wrote = False
+        if wrote and settings.DATABASE_REPLICAS:
+            response.set_cookie(
+                STICKY_COOKIE, '1',
+                max_age=settings.DATABASE_REPLICA_STICKY_SECONDS,
+                httponly=True, samesite='Lax')
+        return response
@@ -0,0 +1,19 @@
+"""Раздача /media/ самим Django с долгим кэшем неизменяемых файлов.
+
+В продакшене /media/ обычно отдаёт nginx; ему нужен тот же заголовок
+для путей из posts.storage.IMMUTABLE.
+"""
+from django.conf import settings
+from django.views import static
+
+from posts.storage import IMMUTABLE
+
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+
+def serve(request, path):
+    """static.serve из MEDIA_ROOT; файлы с именем по хешу — на год."""
+    response = static.serve(request, path, settings.MEDIA_ROOT)
+    if IMMUTABLE.match(path):
+        response['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+    return response
@@ -28,6 +28,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'yatube.timing.TimingMiddleware',
+    'yatube.db_router.PrimaryStickyMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -43,7 +45,7 @@ ROOT_URLCONF = 'yatube.urls'
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'yatube.timing.TimedDjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -59,13 +61,56 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'yatube.wsgi.application'
 
+ASGI_APPLICATION = 'yatube.asgi.application'
+# Потоки, в которых ASGI-приложение выполняет Django.
+ASGI_THREADS = int(os.environ.get('YATUBE_ASGI_THREADS', 8))
+
+# Профиль соединений SQLite (yatube.sqlite): default — настройки SQLite
+# как есть, production — WAL, synchronous=NORMAL, mmap, ожидание
+# блокировки, BEGIN IMMEDIATE и постоянные соединения.
+SQLITE_PROFILE = os.environ.get('YATUBE_SQLITE_PROFILE', 'default')
+SQLITE_PROFILES = {
+    'default': {'pragmas': {}, 'immediate': False, 'conn_max_age': 0},
+    'production': {
+        'pragmas': {
+            'journal_mode': 'WAL',
+            # В WAL потеря питания откатывает лишь последние коммиты,
+            # целостность базы сохраняется.
+            'synchronous': 'NORMAL',
+            'mmap_size': 256 * 1024 * 1024,
+            'busy_timeout': 5000,
+        },
+        'immediate': True,
+        'conn_max_age': 600,
+    },
+}
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'CONN_MAX_AGE': SQLITE_PROFILES[SQLITE_PROFILE]['conn_max_age'],
     }
 }
 
+# Реплики для чтения лент: пути к базам SQLite через запятую. Локально
+# это копии db.sqlite3, которые обновляет команда sync_replicas.
+DATABASE_REPLICAS = []
+for number, path in enumerate(filter(None, os.environ.get(
+        'YATUBE_DB_REPLICAS', '').split(',')), 1):
+    DATABASES[f'replica{number}'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': path,
+        'CONN_MAX_AGE': DATABASES['default']['CONN_MAX_AGE'],
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(f'replica{number}')
+
+DATABASE_ROUTERS = ['yatube.db_router.PrimaryReplicaRouter']
+# Столько секунд после записи клиент читает из default, а не из реплик.
+DATABASE_REPLICA_STICKY_SECONDS = int(
+    os.environ.get('YATUBE_REPLICA_STICKY_SECONDS', 10))
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME':
@@ -86,12 +131,35 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Кэш задаётся окружением: locmem — свой у каждого процесса,
+# file — общий для всех воркеров каталог, либо полный путь к бэкенду.
+# locmem годится только для разработки: check --deploy его не пропустит.
+CACHE_BACKENDS = {
+    'locmem': 'yatube.cache.LocMemStatsCache',
+    'file': 'yatube.cache.FileStatsCache',
+}
+CACHE_BACKEND = os.environ.get('YATUBE_CACHE', 'locmem')
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'BACKEND': CACHE_BACKENDS.get(CACHE_BACKEND, CACHE_BACKEND),
+        'LOCATION': os.environ.get(
+            'YATUBE_CACHE_LOCATION', os.path.join(BASE_DIR, 'cache')),
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.environ.get('YATUBE_CACHE_MAX_ENTRIES',
+                                              10000)),
+        },
     }
 }
 
+# Префиксы ключей и пространства имён для статистики кэша.
+CACHE_NAMESPACES = {
+    'card': 'feed',
+    'timeline': 'feed',
+    'sorl-thumbnail': 'thumbnail',
+    'media': 'thumbnail',
+    'stamp': 'feed',
+}
+
 LANGUAGE_CODE = 'ru'
 
 TIME_ZONE = 'Europe/Moscow'
@@ -110,6 +178,13 @@ MEDIA_URL = '/media/'
 
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Отдавать /media/ из Django (yatube.media), а не только nginx.
+MEDIA_SERVE = os.environ.get(
+    'YATUBE_MEDIA_SERVE', '1' if DEBUG else '0') == '1'
+# Картинку без ссылок из постов удаляют не раньше, чем через столько
+# секунд после её последней загрузки; остальное — сборщику мусора.
+MEDIA_RELEASE_GRACE = 15 * 60
+
 LOGIN_URL = '/auth/login/'
 
 LOGIN_REDIRECT_URL = 'posts:index'
@@ -122,6 +197,86 @@ EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
 COUNT_PAGE = 10
 
+# Курсорная пагинация лент вместо номеров страниц.
+PAGINATION_CURSOR = False
+
+# Гостевые страницы лент и постов обратный прокси может отдавать
+# из своего кэша столько секунд, затем сверяет ETag.
+PAGE_PROXY_MAX_AGE = int(os.environ.get('YATUBE_PAGE_PROXY_MAX_AGE', 10))
+# Версия выкладки входит в ETag страниц: новые шаблоны — новые ETag.
+PAGE_RELEASE = os.environ.get('YATUBE_RELEASE', '')
+
+# Постов в лентах RSS, Atom и JSON Feed.
+FEED_ITEMS = 50
+
+# Комментариев на странице поста и в каждой подгрузке.
+COMMENTS_PAGE = 20
+
+# Готовые ленты подписок (fan-out on write) для follow_index.
+FOLLOW_TIMELINE = True
+# Посты авторов с большим числом подписчиков читаются при запросе.
+FOLLOW_TIMELINE_FANOUT_LIMIT = 1000
+FOLLOW_TIMELINE_POPULAR_TTL = 300
+FOLLOW_TIMELINE_BATCH = 1000
+
+# Граф подписок в памяти (posts.follow_graph) для блока «кого почитать»:
+# перечитывается раз в FOLLOW_GRAPH_TTL секунд или после стольких правок.
+FOLLOW_GRAPH_TTL = 300
+FOLLOW_GRAPH_MAX_DELTA = 10000
+FOLLOW_RECOMMENDATIONS = 5
+# Сколько подписок пользователя обходить в поисках кандидатов.
+FOLLOW_RECOMMEND_FRIENDS = 500
+
+# Популярное (posts.trending): рейтинг вдвое остывает за
+# TRENDING_HALF_LIFE секунд, записи остывшие ниже TRENDING_MIN_SCORE
+# убирает manage.py update_trending.
+TRENDING_HALF_LIFE = 6 * 60 * 60
+TRENDING_POST_WEIGHT = 1.0
+TRENDING_COMMENT_WEIGHT = 2.0
+TRENDING_MIN_SCORE = 0.01
+TRENDING_GROUPS = 10
+
+# Фоновые задачи (posts.queue): при TASKS_EAGER выполняются в процессе
+# после фиксации транзакции, без повторов — это режим разработки. Иначе
+# ложатся в posts_task; в продакшене YATUBE_TASKS_EAGER=0 и рядом с сайтом
+# запущен обработчик: python manage.py run_tasks.
+TASKS_EAGER = os.environ.get(
+    'YATUBE_TASKS_EAGER', '1' if DEBUG else '0') == '1'
+TASKS_MAX_ATTEMPTS = 5
+# Пауза перед повтором, с; удваивается с каждой попыткой.
+TASKS_RETRY_DELAY = 10
+# Сколько секунд задача числится за обработчиком, который её забрал.
+TASKS_LEASE = 300
+
+# Карточки постов в кэше сбрасываются сменой версии, а не по времени.
+POST_CARD_TIMEOUT = 60 * 60 * 24
+
+# Потоки, которые строят миниатюры в фоне; 0 — строить сразу в запросе.
+THUMBNAIL_WORKERS = int(os.environ.get('YATUBE_THUMBNAIL_WORKERS', 2))
+
+# Картинки проверяются ещё при загрузке (posts.uploads): поля форм,
+# размер файла, число пикселей по заголовку и допустимые форматы.
+FILE_UPLOAD_HANDLERS = [
+    'posts.uploads.ImageUploadHandler',
+    'django.core.files.uploadhandler.MemoryFileUploadHandler',
+    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+]
+IMAGE_UPLOAD_FIELDS = ('image',)
+IMAGE_UPLOAD_MAX_BYTES = 10 * 1024 * 1024
+IMAGE_UPLOAD_MAX_PIXELS = 40 * 1000 * 1000
+IMAGE_UPLOAD_FORMATS = ('JPEG', 'PNG', 'GIF', 'WEBP')
+
+# Ширины адаптивных вариантов картинки поста для srcset.
+IMAGE_VARIANT_WIDTHS = (320, 640, 960, 1280)
+IMAGE_VARIANT_QUALITY = 80
+
+# Запросы дольше порога (мс) пишутся в лог yatube.timing.
+TIMING_SLOW_REQUEST_MS = int(os.environ.get('YATUBE_SLOW_REQUEST_MS', 1000))
+
+# Поиск по постам: fts5 (SQLite FTS5), python (свой обратный индекс)
+# или auto — FTS5, если виртуальная таблица создана миграцией.
+SEARCH_BACKEND = os.environ.get('YATUBE_SEARCH_BACKEND', 'auto')
+
 INTERNAL_IPS = [
     "127.0.0.1",
 ]
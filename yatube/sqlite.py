@@ -0,0 +1,32 @@
+"""Настройка соединений SQLite по профилю SQLITE_PROFILE.
+
+Профиль production включает WAL: читатели не ждут писателя, а писатель
+не ждёт читателей. Транзакции начинаются с BEGIN IMMEDIATE: отложенная
+транзакция, которая сначала читает, а потом пишет, при встречной записи
+получает «database is locked» сразу, не дожидаясь busy_timeout.
+"""
+from django.conf import settings
+
+
+def profile(name=None):
+    return settings.SQLITE_PROFILES[name or settings.SQLITE_PROFILE]
+
+
+def _begin_immediate(connection):
+    connection.cursor().execute('BEGIN IMMEDIATE')
+
+
+def configure(sender, connection, **kwargs):
+    """Обработчик connection_created: PRAGMA профиля для нового соединения.
+
+    PRAGMA выполняются на сыром соединении, мимо учёта запросов Django.
+    """
+    if connection.vendor != 'sqlite':
+        return
+    current = profile()
+    for name, value in current['pragmas'].items():
+        connection.connection.execute(f'PRAGMA {name} = {value}')
+    if current['immediate']:
+        # Django 2.2 не умеет выбирать режим транзакции SQLite.
+        connection._start_transaction_under_autocommit = (
+            lambda: _begin_immediate(connection))
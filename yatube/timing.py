@@ -0,0 +1,191 @@
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.db import connections
+from django.http import JsonResponse
+from django.template import TemplateDoesNotExist
+from django.template.backends.django import DjangoTemplates, Template, reraise
+
+logger = logging.getLogger(__name__)
+
+# Верхние границы корзин гистограммы задержки, мс.
+BUCKETS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+_local = threading.local()
+# Сводка общая для всех потоков процесса, как и статистика кэша.
+_lock = threading.Lock()
+_views = {}
+
+
+class RequestTiming:
+    """Замеры одного запроса, время в секундах.
+
+    depth — глубина вложенных отрисовок: шаблон, отрисованный внутри
+    другого (карточки внутри страницы), уже входит во время внешнего.
+    """
+    __slots__ = ('queries', 'sql', 'render', 'depth')
+
+    def __init__(self):
+        self.queries = 0
+        self.sql = 0.0
+        self.render = 0.0
+        self.depth = 0
+
+
+def current():
+    """Замеры запроса, который обрабатывает текущий поток, или None."""
+    return getattr(_local, 'timing', None)
+
+
+def _record_sql(execute, sql, params, many, context):
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timing = current()
+        if timing is not None:
+            timing.queries += 1
+            timing.sql += time.perf_counter() - start
+
+
+class TimedTemplate(Template):
+    """Шаблон, который учитывает время отрисовки без времени SQL в ней.
+
+    Время прибавляется только у внешней отрисовки.
+    """
+
+    def render(self, context=None, request=None):
+        timing = current()
+        if timing is None:
+            return super().render(context, request)
+        start, sql = time.perf_counter(), timing.sql
+        timing.depth += 1
+        try:
+            return super().render(context, request)
+        finally:
+            timing.depth -= 1
+            if not timing.depth:
+                timing.render += (time.perf_counter() - start
+                                  - (timing.sql - sql))
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """Бэкенд шаблонов Django с замером времени отрисовки."""
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return TimedTemplate(self.engine.get_template(template_name),
+                                 self)
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
+
+
+def server_timing(timing, total):
+    """Значение заголовка Server-Timing, длительности в мс."""
+    return ', '.join((
+        f'db;desc="SQL, {timing.queries} queries";dur={timing.sql * 1000:.1f}',
+        f'render;dur={timing.render * 1000:.1f}',
+        f'total;dur={total * 1000:.1f}'))
+
+
+def record(view, timing, total):
+    """Добавляет запрос в сводку представления."""
+    total_ms = total * 1000
+    with _lock:
+        stats = _views.get(view)
+        if stats is None:
+            stats = _views[view] = {
+                'requests': 0, 'queries': 0, 'sql_ms': 0.0,
+                'render_ms': 0.0, 'total_ms': 0.0,
+                'buckets': [0] * (len(BUCKETS) + 1)}
+        stats['requests'] += 1
+        stats['queries'] += timing.queries
+        stats['sql_ms'] += timing.sql * 1000
+        stats['render_ms'] += timing.render * 1000
+        stats['total_ms'] += total_ms
+        stats['buckets'][bisect_left(BUCKETS, total_ms)] += 1
+    if total_ms >= settings.TIMING_SLOW_REQUEST_MS:
+        logger.warning(
+            'Медленный запрос %s: %.1f ms, %d queries, sql %.1f ms, '
+            'render %.1f ms', view, total_ms, timing.queries,
+            timing.sql * 1000, timing.render * 1000)
+
+
+def _percentile(buckets, requests, share):
+    """Верхняя граница корзины, в которую попал перцентиль."""
+    rank = requests * share
+    seen = 0
+    for bound, count in zip(BUCKETS + (None,), buckets):
+        seen += count
+        if seen >= rank:
+            return bound
+    return None
+
+
+def stats():
+    """Средние и гистограмма задержки по представлениям процесса."""
+    labels = [f'<={bound}' for bound in BUCKETS] + [f'>{BUCKETS[-1]}']
+    with _lock:
+        views = {view: dict(data, buckets=list(data['buckets']))
+                 for view, data in _views.items()}
+    result = {}
+    for view, data in sorted(views.items()):
+        requests = data['requests']
+        result[view] = {
+            'requests': requests,
+            'avg_queries': round(data['queries'] / requests, 2),
+            'avg_sql_ms': round(data['sql_ms'] / requests, 2),
+            'avg_render_ms': round(data['render_ms'] / requests, 2),
+            'avg_total_ms': round(data['total_ms'] / requests, 2),
+            'p50_ms': _percentile(data['buckets'], requests, 0.5),
+            'p95_ms': _percentile(data['buckets'], requests, 0.95),
+            'histogram_ms': dict(zip(labels, data['buckets']))}
+    return result
+
+
+def reset():
+    with _lock:
+        _views.clear()
+
+
+class TimingMiddleware:
+    """Считает запросы к базе, время SQL, отрисовки и всего запроса.
+
+    Замеры уходят в заголовок Server-Timing и в сводку процесса
+    по представлениям; медленные запросы пишутся в лог.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timing = _local.timing = RequestTiming()
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for alias in connections:
+                    stack.enter_context(
+                        connections[alias].execute_wrapper(_record_sql))
+                response = self.get_response(request)
+        finally:
+            _local.timing = None
+        total = time.perf_counter() - start
+        match = getattr(request, 'resolver_match', None)
+        record(match._func_path if match else 'unresolved', timing, total)
+        response['Server-Timing'] = server_timing(timing, total)
+        return response
+
+
+@staff_member_required
+def timing_stats(request):
+    """Сводка замеров представлений текущего процесса в JSON."""
+    return JsonResponse({'pid': os.getpid(), 'views': stats()})
@@ -1,8 +1,13 @@
 from django.contrib import admin
-from django.urls import include, path
+from django.urls import include, path, re_path
 from django.conf import settings
 from django.conf.urls.static import static
 from django.conf.urls import handler404, handler500
+
+from yatube import media
+from yatube.cache import cache_stats
+from yatube.timing import timing_stats
+
 handler404 = 'posts.views.page_not_found'  # noqa
 handler500 = 'posts.views.server_error'  # noqa
 
@@ -10,12 +15,15 @@ urlpatterns = [
     path('about/', include('about.urls', namespace='about')),
     path('auth/', include('users.urls')),
     path('auth/', include('django.contrib.auth.urls')),
+    path('admin/cache-stats/', cache_stats, name='cache_stats'),
+    path('admin/timing-stats/', timing_stats, name='timing_stats'),
     path('admin/', admin.site.urls),
     path('', include('posts.urls', namespace='posts'))]
+if settings.MEDIA_SERVE:
+    urlpatterns += (re_path(r'^%s(?P<path>.*)$'
+                            % settings.MEDIA_URL.lstrip('/'), media.serve),)
 if settings.DEBUG:
     import debug_toolbar
     urlpatterns += (path("__debug__/", include(debug_toolbar.urls)),)
-    urlpatterns += static(settings.MEDIA_URL,
-                          document_root=settings.MEDIA_ROOT)
     urlpatterns += static(settings.STATIC_URL,
                           document_root=settings.STATIC_ROOT)